@@ -34,6 +34,35 @@ PRICE_FLUCTUATION = {
     }
 }
 
+# Correlated noise in the price engine: share of each stock's return variance
+# driven by the whole market and by its sector (the rest is stock-specific)
+FACTOR_MODEL = {
+    'MARKET_SHARE': 0.3,
+    'SECTOR_SHARE': 0.3,
+    'SECTOR_CORRELATION': 0.2,  # Correlation between different sectors' factors
+}
+
+# News impacts glide each stock to its target over this many seconds
+NEWS_IMPACT_DURATION = 600
+NEWS_IMPACT_EASING = 'linear'  # 'linear', 'ease_in', 'ease_out' or 'ease_in_out'
+
+# Transactions kept in memory per team; older ones are spilled to the database
+TRANSACTION_TAIL_LENGTH = 200
+
+# Persistence settings
+PERSISTENCE_MODE = 'group_commit'  # 'sync', 'group_commit', 'best_effort' or 'disabled'
+PERSISTENCE_FLUSH_INTERVAL_MS = 50  # Commit queued writes at least this often
+PERSISTENCE_BATCH_SIZE = 500  # ...or as soon as this many rows are queued
+PERSISTENCE_QUEUE_SIZE = 10000
+MARKET_STATE_KEYFRAME_INTERVAL = 50  # Full market state every N delta records
+
+# Restart settings
+WARM_RESTART = True  # Restore the last checkpoint + journal on startup (run.py --fresh to skip)
+CHECKPOINT_INTERVAL = 60  # seconds between checkpoints during an active session
+
+# Randomness
+RANDOM_SEED = None  # Fixed integer for reproducible runs; None draws fresh entropy
+
 # Export configuration dictionary (if needed elsewhere)
 CONFIG = {
     'TEAM_COUNT': TEAM_COUNT,
@@ -48,11 +77,27 @@ CONFIG = {
     'IPO_AVAILABLE_QUANTITY': IPO_AVAILABLE_QUANTITY,
     'IPO_MARKET_CAP': IPO_MARKET_CAP,
     'PRICE_FLUCTUATION': PRICE_FLUCTUATION,
+    'FACTOR_MODEL': FACTOR_MODEL,
+    'NEWS_IMPACT_DURATION': NEWS_IMPACT_DURATION,
+    'NEWS_IMPACT_EASING': NEWS_IMPACT_EASING,
+    'TRANSACTION_TAIL_LENGTH': TRANSACTION_TAIL_LENGTH,
+    'PERSISTENCE_MODE': PERSISTENCE_MODE,
+    'PERSISTENCE_FLUSH_INTERVAL_MS': PERSISTENCE_FLUSH_INTERVAL_MS,
+    'PERSISTENCE_BATCH_SIZE': PERSISTENCE_BATCH_SIZE,
+    'PERSISTENCE_QUEUE_SIZE': PERSISTENCE_QUEUE_SIZE,
+    'MARKET_STATE_KEYFRAME_INTERVAL': MARKET_STATE_KEYFRAME_INTERVAL,
+    'WARM_RESTART': WARM_RESTART,
+    'CHECKPOINT_INTERVAL': CHECKPOINT_INTERVAL,
+    'RANDOM_SEED': RANDOM_SEED,
 }
 
 # Make all variables available when importing
 __all__ = [
     'TEAM_COUNT', 'STARTING_BUDGET', 'INITIAL_PRICE', 'AVAILABLE_QUANTITY',
     'MARKET_CAP', 'DEMAND_COEFFICIENT', 'EVENT_COEFFICIENT', 'RANDOM_NOISE',
-    'IPO_INITIAL_PRICE', 'IPO_AVAILABLE_QUANTITY', 'IPO_MARKET_CAP', 'CONFIG'
+    'IPO_INITIAL_PRICE', 'IPO_AVAILABLE_QUANTITY', 'IPO_MARKET_CAP', 'CONFIG',
+    'PERSISTENCE_MODE', 'PERSISTENCE_FLUSH_INTERVAL_MS', 'PERSISTENCE_BATCH_SIZE',
+    'PERSISTENCE_QUEUE_SIZE', 'MARKET_STATE_KEYFRAME_INTERVAL', 'WARM_RESTART',
+    'CHECKPOINT_INTERVAL', 'RANDOM_SEED', 'FACTOR_MODEL',
+    'NEWS_IMPACT_DURATION', 'NEWS_IMPACT_EASING', 'TRANSACTION_TAIL_LENGTH'
 ]
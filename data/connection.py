@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.logger import logger
+
+class ConnectionManager:
+    """Keeps one long-lived SQLite connection per thread.
+
+    Connections are opened lazily the first time a thread touches the
+    database and are reused for every later statement on that thread, so
+    the per-order cost is a cached statement execution instead of a
+    connect/commit/close cycle. Statements are compiled once per
+    connection and served from sqlite3's statement cache afterwards.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",
+        "PRAGMA busy_timeout=5000",
+    )
+    STATEMENT_CACHE_SIZE = 256
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # (thread, connection) pairs
+
+    def get_connection(self):
+        """Return the calling thread's connection, opening it if needed."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+            isolation_level=None  # Transactions are managed explicitly
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _prune_dead_threads(self):
+        """Close connections left behind by finished worker threads."""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    @contextmanager
+    def transaction(self):
+        """Run a block inside a single transaction on this thread's connection.
+
+        Nested calls join the outermost transaction, so several writes made
+        for one order share one commit.
+        """
+        conn = self.get_connection()
+        outermost = self._local.depth == 0
+        if outermost:
+            conn.execute("BEGIN")
+        self._local.depth += 1
+        try:
+            yield conn
+        except Exception:
+            self._local.depth -= 1
+            if outermost:
+                conn.execute("ROLLBACK")
+            raise
+        else:
+            self._local.depth -= 1
+            if outermost:
+                conn.execute("COMMIT")
+
+    def close_all(self):
+        """Close every connection opened by this manager."""
+        with self._lock:
+            for _, conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.error(f"Error closing database connection: {str(e)}")
+            self._connections = []
+        self._local = threading.local()
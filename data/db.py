@@ -1,17 +1,97 @@
 
-import sqlite3
 import json
 from datetime import datetime
 import os
+import atexit
+
+from config import (PERSISTENCE_MODE, PERSISTENCE_FLUSH_INTERVAL_MS,
+                    PERSISTENCE_BATCH_SIZE, PERSISTENCE_QUEUE_SIZE,
+                    MARKET_STATE_KEYFRAME_INTERVAL)
+from data.connection import ConnectionManager
+from data.event_journal import EventJournal
+from data.state_journal import MarketStateJournal
+from data.timeseries import TimeSeriesStore
+from data.write_behind import WriteBehindQueue
+
+# Statements are kept as constants so every call reuses the same compiled
+# statement from the per-connection cache.
+INSERT_ORDER_SQL = '''
+    INSERT INTO orders (team_id, stock, order_type, quantity, price, status)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+INSERT_EVENT_SQL = '''
+    INSERT INTO events (event_type, description, affected_stocks, impact)
+    VALUES (?, ?, ?, ?)
+'''
+INSERT_PORTFOLIO_SNAPSHOT_SQL = '''
+    INSERT INTO portfolio_snapshots
+    (team_id, cash_balance, holdings, total_value)
+    VALUES (?, ?, ?, ?)
+'''
+INSERT_TRANSACTION_SQL = '''
+    INSERT INTO transactions
+    (team_id, timestamp, type, stock, quantity, price, total_value,
+     counterparty, amount, old_balance, new_balance)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+DELETE_TRANSACTIONS_SQL = 'DELETE FROM transactions'
+DELETE_TEAM_TRANSACTIONS_SQL = 'DELETE FROM transactions WHERE team_id = ?'
+
+ORDER_COLUMNS = ('id', 'timestamp', 'team_id', 'stock', 'order_type',
+                 'quantity', 'price', 'status')
+EVENT_COLUMNS = ('id', 'timestamp', 'event_type', 'description',
+                 'affected_stocks', 'impact')
+TRANSACTION_COLUMNS = ('id', 'team_id', 'timestamp', 'type', 'stock', 'quantity',
+                       'price', 'total_value', 'counterparty', 'amount',
+                       'old_balance', 'new_balance')
+
+def _now():
+    # Imported on use: the simulation package imports this module
+    from simulation import clock
+    return clock.now()
+
+def default_db_path():
+    """data/simulation.db, unless the TRADEWARS_DB_PATH environment variable names another file."""
+    return os.environ.get('TRADEWARS_DB_PATH') or os.path.join(os.path.dirname(__file__), 'simulation.db')
 
 class SimulationDB:
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'simulation.db')
+    SCHEMA_VERSION = 1  # 1: normalized price_ticks/holdings tables and indexes
+
+    def __init__(self, db_path=None, mode=PERSISTENCE_MODE):
+        self.db_path = db_path or default_db_path()
+        self.connections = ConnectionManager(self.db_path)
+        self.writer = WriteBehindQueue(
+            self.connections,
+            mode=mode,
+            flush_interval_ms=PERSISTENCE_FLUSH_INTERVAL_MS,
+            batch_size=PERSISTENCE_BATCH_SIZE,
+            max_queue_size=PERSISTENCE_QUEUE_SIZE
+        )
+        self.market_journal = MarketStateJournal(
+            self.writer,
+            self.connections,
+            keyframe_interval=MARKET_STATE_KEYFRAME_INTERVAL
+        )
+        self.timeseries = TimeSeriesStore(self.writer, self.connections)
+        self.event_journal = EventJournal(self.writer, self.connections)
         self.init_database()
 
+    def transaction(self):
+        """Group several writes from the calling thread into one commit."""
+        return self.writer.batch()
+
+    def flush(self, timeout=None):
+        """Wait until every queued write has been committed."""
+        return self.writer.flush(timeout)
+
+    def close(self):
+        """Flush pending writes and close all pooled connections."""
+        self.writer.close()
+        self.connections.close_all()
+
     def init_database(self):
         """Initialize the database tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connections.transaction() as conn:
             cursor = conn.cursor()
             
             # Orders table
@@ -40,7 +120,7 @@ class SimulationDB:
                 )
             ''')
             
-            # Market states table
+            # Legacy full-copy market states table (superseded by the journal)
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS market_states (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -62,49 +142,124 @@ class SimulationDB:
                 )
             ''')
             
-            conn.commit()
+            # Transactions spilled from the in-memory per-team tails
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    team_id INTEGER,
+                    timestamp REAL,
+                    type TEXT,
+                    stock TEXT,
+                    quantity INTEGER,
+                    price REAL,
+                    total_value REAL,
+                    counterparty INTEGER,
+                    amount REAL,
+                    old_balance REAL,
+                    new_balance REAL
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_transactions_team
+                ON transactions (team_id, id)
+            ''')
+            
+            # Delta-encoded market state journal
+            self.market_journal.create_tables(cursor)
+            
+            # Normalized time-series tables and query indexes
+            self.timeseries.create_tables(cursor)
+            
+            # Sequenced journal of every market state mutation
+            self.event_journal.create_tables(cursor)
+            
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self.timeseries.migrate(conn)
+            if version < self.SCHEMA_VERSION:
+                cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            
+            self.timeseries.load(cursor)
+            self.event_journal.load(cursor)
 
     def log_order(self, team_id, order, status="executed"):
         """Log an order to the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO orders (team_id, stock, order_type, quantity, price, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (team_id, order['stock'], order['type'], 
-                 order['quantity'], order['price'], status))
-            conn.commit()
+        self.writer.submit(INSERT_ORDER_SQL, (team_id, order['stock'], order['type'],
+                           order['quantity'], order['price'], status))
 
     def log_event(self, event_type, description, affected_stocks, impact):
         """Log a market event to the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO events (event_type, description, affected_stocks, impact)
-                VALUES (?, ?, ?, ?)
-            ''', (event_type, description, json.dumps(affected_stocks), impact))
-            conn.commit()
-
-    def save_market_state(self, stock_prices, available_quantities):
-        """Save current market state."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO market_states (stock_prices, available_quantities)
-                VALUES (?, ?)
-            ''', (json.dumps(stock_prices), json.dumps(available_quantities)))
-            conn.commit()
-
-    def save_portfolio_snapshot(self, team_id, cash_balance, holdings, total_value):
-        """Save a portfolio snapshot."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO portfolio_snapshots 
-                (team_id, cash_balance, holdings, total_value)
-                VALUES (?, ?, ?, ?)
-            ''', (team_id, cash_balance, json.dumps(holdings), total_value))
-            conn.commit()
+        self.writer.submit(INSERT_EVENT_SQL, (event_type, description,
+                           json.dumps(affected_stocks), impact))
+
+    def log_transaction(self, team_id, record):
+        """Store one transaction tuple (timestamp through new_balance) for a team."""
+        self.writer.submit(INSERT_TRANSACTION_SQL, (team_id,) + tuple(record))
+
+    def last_transaction_id(self, team_id=None):
+        """Id of the newest committed transaction (of one team), or 0 if there is none.
+
+        Only rows already committed count; call flush() first to include queued ones.
+        """
+        query = "SELECT MAX(id) FROM transactions"
+        params = ()
+        if team_id is not None:
+            query += " WHERE team_id = ?"
+            params = (team_id,)
+        return self.connections.get_connection().execute(query, params).fetchone()[0] or 0
+
+    def clear_transactions(self, team_id=None):
+        """Delete the stored transactions of one team, or of every team."""
+        if team_id is None:
+            self.writer.submit(DELETE_TRANSACTIONS_SQL, ())
+        else:
+            self.writer.submit(DELETE_TEAM_TRANSACTIONS_SQL, (team_id,))
+
+    def save_market_state(self, stock_prices, available_quantities, timestamp=None):
+        """Journal the symbols that changed since the last saved state, stamped with the engine clock."""
+        if timestamp is None:
+            timestamp = _now()
+        changes = self.market_journal.record(stock_prices, available_quantities, timestamp)
+        if changes:
+            self.timeseries.record_ticks(timestamp, changes)
+        return bool(changes)
+
+    def get_market_state_at(self, timestamp):
+        """Rebuild (stock_prices, available_quantities) as of an epoch timestamp."""
+        self.flush()
+        return self.market_journal.state_at(timestamp)
+
+    def save_portfolio_snapshot(self, team_id, cash_balance, holdings, total_value, timestamp=None):
+        """Save a portfolio snapshot; holdings rows are stamped with the engine clock."""
+        if timestamp is None:
+            timestamp = _now()
+        self.writer.submit(INSERT_PORTFOLIO_SNAPSHOT_SQL, (team_id, cash_balance,
+                           json.dumps(holdings), total_value))
+        self.timeseries.record_holdings(timestamp, team_id, holdings)
+
+    def get_price_series(self, symbol, start_ts=None, end_ts=None):
+        """Return [(ts, price, qty), ...] for a symbol from the tick table."""
+        self.flush()
+        return self.timeseries.price_series(symbol, start_ts, end_ts)
+
+    def get_holdings_at(self, team_id, timestamp):
+        """Return a team's holdings {symbol: quantity} as of an epoch timestamp."""
+        self.flush()
+        return self.timeseries.holdings_at(team_id, timestamp)
+
+    def get_symbol_holders_at(self, symbol, timestamp):
+        """Return {team_id: quantity} for a symbol as of an epoch timestamp."""
+        self.flush()
+        return self.timeseries.holders_at(symbol, timestamp)
+
+    def record_event(self, event_type, payload):
+        """Append a state mutation to the event journal; returns its sequence number."""
+        return self.event_journal.append(event_type, payload)
+
+    def iter_journal(self, after_seq=0, until_seq=None, event_types=None):
+        """Stream (seq, ts, event_type, payload) from the event journal."""
+        self.flush()
+        return self.event_journal.iter_events(after_seq, until_seq, event_types=event_types)
 
     def get_order_history(self, team_id=None, start_date=None, end_date=None):
         """Query order history with optional filters."""
@@ -125,10 +280,9 @@ class SimulationDB:
             
         query += " ORDER BY timestamp DESC"
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+        self.flush()
+        cursor = self.connections.get_connection().execute(query, params)
+        return cursor.fetchall()
 
     def get_event_history(self, event_type=None, start_date=None, end_date=None):
         """Query event history with optional filters."""
@@ -149,10 +303,96 @@ class SimulationDB:
             
         query += " ORDER BY timestamp DESC"
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+        self.flush()
+        cursor = self.connections.get_connection().execute(query, params)
+        return cursor.fetchall()
+
+    def iter_order_history(self, team_id=None, start_date=None, end_date=None,
+                           after_id=None, limit=None, columns=None, chunk_size=500):
+        """Stream orders in id order, ``chunk_size`` rows per query.
+
+        Pass the last seen id as ``after_id`` to resume (keyset pagination);
+        ``columns`` restricts the returned tuple to the named columns.
+        """
+        filters = []
+        params = []
+        if team_id is not None:
+            filters.append("team_id = ?")
+            params.append(team_id)
+        if start_date:
+            filters.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            filters.append("timestamp <= ?")
+            params.append(end_date)
+        return self._iter_rows('orders', ORDER_COLUMNS, filters, params,
+                               after_id, limit, columns, chunk_size)
+
+    def iter_event_history(self, event_type=None, start_date=None, end_date=None,
+                           after_id=None, limit=None, columns=None, chunk_size=500):
+        """Stream events in id order; see iter_order_history for the paging arguments."""
+        filters = []
+        params = []
+        if event_type:
+            filters.append("event_type = ?")
+            params.append(event_type)
+        if start_date:
+            filters.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            filters.append("timestamp <= ?")
+            params.append(end_date)
+        return self._iter_rows('events', EVENT_COLUMNS, filters, params,
+                               after_id, limit, columns, chunk_size)
+
+    def iter_transactions(self, team_id=None, after_id=None, until_id=None, limit=None,
+                          columns=None, chunk_size=500):
+        """Stream stored transactions in id order; see iter_order_history for the paging arguments.
+
+        ``until_id`` stops the stream at that id, e.g. one from last_transaction_id().
+        """
+        filters = []
+        params = []
+        if team_id is not None:
+            filters.append("team_id = ?")
+            params.append(team_id)
+        if until_id is not None:
+            filters.append("id <= ?")
+            params.append(until_id)
+        return self._iter_rows('transactions', TRANSACTION_COLUMNS, filters, params,
+                               after_id, limit, columns, chunk_size)
+
+    def _iter_rows(self, table, table_columns, filters, params,
+                   after_id, limit, columns, chunk_size):
+        """Keyset-paginated generator over ``table``.
+
+        Each chunk is its own short query, so no read transaction is held
+        open between chunks and memory stays bounded by ``chunk_size``.
+        """
+        columns = tuple(columns or table_columns)
+        unknown = set(columns) - set(table_columns)
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+        # Always select the id so the next page can start after it
+        select = ', '.join(('id',) + columns)
+        where = ''.join(f" AND {condition}" for condition in filters)
+        query = f"SELECT {select} FROM {table} WHERE id > ?{where} ORDER BY id LIMIT ?"
+
+        self.flush()
+        conn = self.connections.get_connection()
+        last_id = after_id if after_id is not None else 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = chunk_size if remaining is None else min(chunk_size, remaining)
+            rows = conn.execute(query, [last_id] + params + [page_size]).fetchall()
+            for row in rows:
+                yield row[1:]
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
 
 # Create a global instance for easy import
 db = SimulationDB()
+atexit.register(db.close)
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import threading
+
+CREATE_EVENT_JOURNAL_SQL = '''
+    CREATE TABLE IF NOT EXISTS event_journal (
+        seq INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        event_type TEXT NOT NULL,
+        payload TEXT
+    )
+'''
+CREATE_EVENT_JOURNAL_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_event_journal_type_seq
+    ON event_journal (event_type, seq)
+'''
+INSERT_EVENT_JOURNAL_SQL = '''
+    INSERT INTO event_journal (seq, ts, event_type, payload) VALUES (?, ?, ?, ?)
+'''
+
+class JsonPayload:
+    """Event payload that sqlite3 serializes when the row is bound.
+
+    With write-behind persistence that happens on the writer thread, keeping
+    JSON encoding of large payloads (such as a full price tick) off the
+    simulation thread. Payloads must not be mutated after they are appended.
+    """
+    __slots__ = ('payload',)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __conform__(self, protocol):
+        if protocol is sqlite3.PrepareProtocol:
+            return json.dumps(self.payload)
+
+def _now():
+    # Imported on use: the simulation package imports this module through data.db
+    from simulation import clock
+    return clock.now()
+
+class EventJournal:
+    """Append-only, sequence-numbered log of every market state mutation.
+
+    Sequence numbers are assigned in process and events are queued to the
+    writer under the same lock, so the on-disk order always matches the
+    order in which mutations were applied.
+    """
+
+    def __init__(self, writer, connections):
+        self.writer = writer
+        self.connections = connections
+        self._lock = threading.Lock()
+        self.last_seq = 0
+
+    def create_tables(self, cursor):
+        cursor.execute(CREATE_EVENT_JOURNAL_SQL)
+        cursor.execute(CREATE_EVENT_JOURNAL_INDEX_SQL)
+
+    def load(self, cursor):
+        """Continue numbering after the last persisted event."""
+        self.last_seq = cursor.execute(
+            'SELECT COALESCE(MAX(seq), 0) FROM event_journal'
+        ).fetchone()[0]
+
+    def append(self, event_type, payload, timestamp=None):
+        """Record one event and return its sequence number.
+
+        ``timestamp`` defaults to the engine clock, so journals recorded on
+        a virtual clock (backtests, scenarios) carry simulated time.
+        """
+        if timestamp is None:
+            timestamp = _now()
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self.writer.submit(INSERT_EVENT_JOURNAL_SQL, (
+                seq, timestamp, event_type, JsonPayload(payload)
+            ))
+        return seq
+
+    def latest_seq(self, event_type):
+        """Sequence number of the most recent event of a type, or None."""
+        row = self.connections.get_connection().execute(
+            'SELECT MAX(seq) FROM event_journal WHERE event_type = ?', (event_type,)
+        ).fetchone()
+        return row[0]
+
+    def iter_events(self, after_seq=0, until_seq=None, chunk_size=1000, event_types=None):
+        """Yield (seq, ts, event_type, payload) in sequence order, optionally only ``event_types``."""
+        conn = self.connections.get_connection()
+        type_filter = ''
+        type_params = []
+        if event_types:
+            type_filter = f" AND event_type IN ({', '.join('?' * len(event_types))})"
+            type_params = list(event_types)
+        query = f'''
+            SELECT seq, ts, event_type, payload FROM event_journal
+            WHERE seq > ? AND seq <= ?{type_filter} ORDER BY seq LIMIT ?
+        '''
+        last_seq = after_seq
+        upper = until_seq if until_seq is not None else self.last_seq
+        while True:
+            rows = conn.execute(query, [last_seq, upper] + type_params + [chunk_size]).fetchall()
+            for seq, ts, event_type, payload in rows:
+                yield seq, ts, event_type, json.loads(payload)
+            if len(rows) < chunk_size:
+                return
+            last_seq = rows[-1][0]
@@ -0,0 +1,135 @@
+import json
+import threading
+
+CREATE_JOURNAL_SQL = '''
+    CREATE TABLE IF NOT EXISTS market_state_journal (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL,
+        is_keyframe INTEGER,
+        stock_prices TEXT,
+        available_quantities TEXT
+    )
+'''
+CREATE_JOURNAL_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_market_state_journal_keyframes
+    ON market_state_journal (is_keyframe, timestamp)
+'''
+INSERT_JOURNAL_SQL = '''
+    INSERT INTO market_state_journal
+    (timestamp, is_keyframe, stock_prices, available_quantities)
+    VALUES (?, ?, ?, ?)
+'''
+
+class MarketStateJournal:
+    """Append-only journal of market state changes.
+
+    Each record holds only the symbols whose price or quantity changed since
+    the previous record. Every ``keyframe_interval`` deltas (and whenever a
+    symbol disappears) a full keyframe is written instead, so any point in
+    time can be rebuilt from the nearest keyframe plus a bounded number of
+    deltas.
+    """
+
+    def __init__(self, writer, connections, keyframe_interval=50):
+        self.writer = writer
+        self.connections = connections
+        self.keyframe_interval = keyframe_interval
+        self._lock = threading.Lock()
+        self._last_prices = None
+        self._last_quantities = None
+        self._deltas_since_keyframe = 0
+
+    def create_tables(self, cursor):
+        cursor.execute(CREATE_JOURNAL_SQL)
+        cursor.execute(CREATE_JOURNAL_INDEX_SQL)
+
+    def record(self, stock_prices, available_quantities, timestamp=None):
+        """Append the changes since the last record.
+
+        ``timestamp`` defaults to the engine clock, like the event journal's.
+        Returns {symbol: (price, quantity)} for every symbol that changed,
+        or an empty dict if nothing was written.
+        """
+        with self._lock:
+            if timestamp is None:
+                timestamp = _now()
+            prices = dict(stock_prices)
+            quantities = dict(available_quantities)
+
+            if self._last_prices is None:
+                price_delta, quantity_delta = prices, quantities
+            else:
+                price_delta = _changed(self._last_prices, prices)
+                quantity_delta = _changed(self._last_quantities, quantities)
+            if not price_delta and not quantity_delta:
+                return {}
+
+            needs_keyframe = (
+                self._last_prices is None
+                or self._deltas_since_keyframe >= self.keyframe_interval
+                or not self._last_prices.keys() <= prices.keys()
+                or not self._last_quantities.keys() <= quantities.keys()
+            )
+            if needs_keyframe:
+                self._deltas_since_keyframe = 0
+            else:
+                self._deltas_since_keyframe += 1
+
+            self._last_prices = prices
+            self._last_quantities = quantities
+
+            # Submit while holding the lock so records reach the writer in order
+            self.writer.submit(INSERT_JOURNAL_SQL, (
+                timestamp, int(needs_keyframe),
+                json.dumps(prices if needs_keyframe else price_delta),
+                json.dumps(quantities if needs_keyframe else quantity_delta)
+            ))
+            return {
+                symbol: (prices.get(symbol), quantities.get(symbol))
+                for symbol in price_delta.keys() | quantity_delta.keys()
+            }
+
+    def reset(self):
+        """Force the next record to be a keyframe."""
+        with self._lock:
+            self._last_prices = None
+            self._last_quantities = None
+            self._deltas_since_keyframe = 0
+
+    def state_at(self, timestamp):
+        """Rebuild (stock_prices, available_quantities) as of ``timestamp``.
+
+        Returns None if the journal has no keyframe at or before that time.
+        """
+        conn = self.connections.get_connection()
+        keyframe = conn.execute('''
+            SELECT id FROM market_state_journal
+            WHERE is_keyframe = 1 AND timestamp <= ?
+            ORDER BY timestamp DESC, id DESC LIMIT 1
+        ''', (timestamp,)).fetchone()
+        if keyframe is None:
+            return None
+
+        prices = {}
+        quantities = {}
+        rows = conn.execute('''
+            SELECT stock_prices, available_quantities FROM market_state_journal
+            WHERE id >= ? AND timestamp <= ?
+            ORDER BY id
+        ''', (keyframe[0], timestamp))
+        for price_delta, quantity_delta in rows:
+            prices.update(json.loads(price_delta))
+            quantities.update(json.loads(quantity_delta))
+        return prices, quantities
+
+def _now():
+    # Imported on use: the simulation package imports this module through data.db
+    from simulation import clock
+    return clock.now()
+
+def _changed(previous, current):
+    """Entries of ``current`` that are new or differ from ``previous``."""
+    return {
+        key: value for key, value in current.items()
+        if key not in previous or previous[key] != value
+    }
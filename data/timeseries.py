@@ -0,0 +1,250 @@
+import json
+import threading
+from datetime import datetime, timezone
+
+from utils.logger import logger
+
+SCHEMA_SQL = (
+    '''
+    CREATE TABLE IF NOT EXISTS symbols (
+        id INTEGER PRIMARY KEY,
+        symbol TEXT UNIQUE NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS price_ticks (
+        ts REAL NOT NULL,
+        symbol_id INTEGER NOT NULL,
+        price REAL,
+        qty INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS holdings (
+        ts REAL NOT NULL,
+        team_id INTEGER NOT NULL,
+        symbol_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL
+    )
+    ''',
+    # Covering indexes: range scans never touch the base tables
+    '''
+    CREATE INDEX IF NOT EXISTS idx_price_ticks_symbol_ts
+    ON price_ticks (symbol_id, ts, price, qty)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_holdings_team_ts
+    ON holdings (team_id, ts, symbol_id, quantity)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_holdings_symbol_ts
+    ON holdings (symbol_id, ts, team_id, quantity)
+    ''',
+    # Indexes for the history queries on the original tables
+    'CREATE INDEX IF NOT EXISTS idx_orders_team_ts ON orders (team_id, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_orders_ts ON orders (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (event_type, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_events_ts ON events (timestamp)',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_portfolio_snapshots_team_ts
+    ON portfolio_snapshots (team_id, timestamp)
+    ''',
+)
+
+INSERT_SYMBOL_SQL = 'INSERT OR IGNORE INTO symbols (id, symbol) VALUES (?, ?)'
+INSERT_TICK_SQL = 'INSERT INTO price_ticks (ts, symbol_id, price, qty) VALUES (?, ?, ?, ?)'
+INSERT_HOLDING_SQL = '''
+    INSERT INTO holdings (ts, team_id, symbol_id, quantity) VALUES (?, ?, ?, ?)
+'''
+
+class TimeSeriesStore:
+    """Normalized price tick and holdings tables keyed by integer symbol IDs.
+
+    Price ticks are written only for symbols that changed. Holdings rows are
+    written only for positions that changed, with quantity 0 marking a
+    closed position, so a team's holdings at time ``t`` are the latest row
+    per symbol at or before ``t``.
+    """
+
+    def __init__(self, writer, connections):
+        self.writer = writer
+        self.connections = connections
+        self._lock = threading.Lock()
+        self._symbol_ids = {}
+        self._last_holdings = {}
+
+    def create_tables(self, cursor):
+        for statement in SCHEMA_SQL:
+            cursor.execute(statement)
+
+    def load(self, cursor):
+        """Load the symbol registry and each team's last recorded positions."""
+        self._symbol_ids = dict(
+            (symbol, symbol_id)
+            for symbol_id, symbol in cursor.execute('SELECT id, symbol FROM symbols')
+        )
+        names = {symbol_id: symbol for symbol, symbol_id in self._symbol_ids.items()}
+        self._last_holdings = {}
+        rows = cursor.execute('''
+            SELECT team_id, symbol_id, quantity, MAX(ts) FROM holdings
+            GROUP BY team_id, symbol_id
+        ''')
+        for team_id, symbol_id, quantity, _ in rows:
+            if quantity:
+                self._last_holdings.setdefault(team_id, {})[names[symbol_id]] = quantity
+
+    def symbol_id(self, symbol):
+        """Return the stable ID for a symbol, registering it on first use."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = self._symbol_ids.get(symbol)
+                if symbol_id is None:
+                    symbol_id = max(self._symbol_ids.values(), default=0) + 1
+                    self._symbol_ids[symbol] = symbol_id
+                    self.writer.submit(INSERT_SYMBOL_SQL, (symbol_id, symbol))
+        return symbol_id
+
+    def record_ticks(self, timestamp, changes):
+        """Write one tick per changed symbol; ``changes`` maps symbol -> (price, qty)."""
+        for symbol, (price, qty) in changes.items():
+            self.writer.submit(INSERT_TICK_SQL, (timestamp, self.symbol_id(symbol), price, qty))
+
+    def record_holdings(self, timestamp, team_id, holdings):
+        """Write the positions of a team that changed since its last snapshot."""
+        current = {symbol: _position_size(value) for symbol, value in holdings.items()}
+        with self._lock:
+            previous = self._last_holdings.get(team_id, {})
+            self._last_holdings[team_id] = current
+        for symbol in previous.keys() | current.keys():
+            quantity = current.get(symbol, 0)
+            if previous.get(symbol, 0) != quantity:
+                self.writer.submit(INSERT_HOLDING_SQL,
+                                   (timestamp, team_id, self.symbol_id(symbol), quantity))
+
+    def price_series(self, symbol, start_ts=None, end_ts=None):
+        """Return [(ts, price, qty), ...] for a symbol in time order."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return []
+        query = "SELECT ts, price, qty FROM price_ticks WHERE symbol_id = ?"
+        params = [symbol_id]
+        if start_ts is not None:
+            query += " AND ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            query += " AND ts <= ?"
+            params.append(end_ts)
+        query += " ORDER BY ts"
+        return self.connections.get_connection().execute(query, params).fetchall()
+
+    def holdings_at(self, team_id, timestamp):
+        """Rebuild a team's holdings as of ``timestamp``."""
+        names = {symbol_id: symbol for symbol, symbol_id in self._symbol_ids.items()}
+        positions = {}
+        rows = self.connections.get_connection().execute('''
+            SELECT symbol_id, quantity FROM holdings
+            WHERE team_id = ? AND ts <= ?
+            ORDER BY ts
+        ''', (team_id, timestamp))
+        for symbol_id, quantity in rows:
+            positions[names.get(symbol_id, symbol_id)] = quantity
+        return {symbol: qty for symbol, qty in positions.items() if qty}
+
+    def holders_at(self, symbol, timestamp):
+        """Return {team_id: quantity} for every team holding ``symbol`` at ``timestamp``."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return {}
+        positions = {}
+        rows = self.connections.get_connection().execute('''
+            SELECT team_id, quantity FROM holdings
+            WHERE symbol_id = ? AND ts <= ?
+            ORDER BY ts
+        ''', (symbol_id, timestamp))
+        for team_id, quantity in rows:
+            positions[team_id] = quantity
+        return {team_id: qty for team_id, qty in positions.items() if qty}
+
+    def migrate(self, conn):
+        """Backfill ticks and holdings from the JSON columns of older databases.
+
+        Runs inside the caller's transaction on a database whose normalized
+        tables have just been created.
+        """
+        self.load(conn)
+        ticks = 0
+        last_prices = {}
+        last_quantities = {}
+
+        legacy_states = conn.execute(
+            'SELECT timestamp, stock_prices, available_quantities FROM market_states ORDER BY id'
+        ).fetchall()
+        for timestamp, prices_json, quantities_json in legacy_states:
+            ticks += self._migrate_state(conn, _parse_timestamp(timestamp),
+                                         json.loads(prices_json or '{}'),
+                                         json.loads(quantities_json or '{}'),
+                                         last_prices, last_quantities)
+
+        journal = conn.execute(
+            'SELECT timestamp, stock_prices, available_quantities '
+            'FROM market_state_journal ORDER BY id'
+        ).fetchall()
+        for timestamp, prices_json, quantities_json in journal:
+            prices = dict(last_prices, **json.loads(prices_json))
+            quantities = dict(last_quantities, **json.loads(quantities_json))
+            ticks += self._migrate_state(conn, timestamp, prices, quantities,
+                                         last_prices, last_quantities)
+
+        positions = 0
+        last_holdings = {}
+        snapshots = conn.execute(
+            'SELECT timestamp, team_id, holdings FROM portfolio_snapshots ORDER BY id'
+        ).fetchall()
+        for timestamp, team_id, holdings_json in snapshots:
+            ts = _parse_timestamp(timestamp)
+            current = {
+                symbol: _position_size(value)
+                for symbol, value in json.loads(holdings_json or '{}').items()
+            }
+            previous = last_holdings.get(team_id, {})
+            for symbol in previous.keys() | current.keys():
+                quantity = current.get(symbol, 0)
+                if previous.get(symbol, 0) != quantity:
+                    conn.execute(INSERT_HOLDING_SQL,
+                                 (ts, team_id, self._migrate_symbol(conn, symbol), quantity))
+                    positions += 1
+            last_holdings[team_id] = current
+
+        logger.info(f"Time-series migration: {ticks} price ticks, {positions} holding rows")
+
+    def _migrate_state(self, conn, ts, prices, quantities, last_prices, last_quantities):
+        written = 0
+        for symbol, price in prices.items():
+            qty = quantities.get(symbol)
+            if last_prices.get(symbol) != price or last_quantities.get(symbol) != qty:
+                conn.execute(INSERT_TICK_SQL, (ts, self._migrate_symbol(conn, symbol), price, qty))
+                written += 1
+        last_prices.update(prices)
+        last_quantities.update(quantities)
+        return written
+
+    def _migrate_symbol(self, conn, symbol):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = max(self._symbol_ids.values(), default=0) + 1
+            self._symbol_ids[symbol] = symbol_id
+            conn.execute(INSERT_SYMBOL_SQL, (symbol_id, symbol))
+        return symbol_id
+
+def _position_size(value):
+    """Holdings are stored either as a plain quantity or as a dict with 'quantity'."""
+    if isinstance(value, dict):
+        return value.get('quantity', 0)
+    return value
+
+def _parse_timestamp(value):
+    """Convert SQLite CURRENT_TIMESTAMP text (UTC) to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
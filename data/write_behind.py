@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from itertools import groupby
+
+from utils.logger import logger
+
+SYNC = 'sync'
+GROUP_COMMIT = 'group_commit'
+BEST_EFFORT = 'best_effort'
+DISABLED = 'disabled'
+DURABILITY_MODES = (SYNC, GROUP_COMMIT, BEST_EFFORT, DISABLED)
+
+class _Batch:
+    """Context that holds back one thread's submits and queues them as a single item."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.outer = False
+
+    def __enter__(self):
+        local = self.writer._local
+        # Nested batches join the outermost one
+        self.outer = getattr(local, 'rows', None) is None
+        if self.outer:
+            local.rows = []
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.outer:
+            return False
+        rows = self.writer._local.rows
+        self.writer._local.rows = None
+        # Like a rollback: nothing from a batch that raised is written
+        if rows and exc_type is None:
+            self.writer._put(rows)
+        return False
+
+class _Barrier:
+    """Queue marker released once every write queued before it is committed."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """Moves database writes off the calling thread.
+
+    Modes:
+        sync         - execute and commit on the caller's thread (old behaviour)
+        group_commit - queue the write; a background writer commits batches
+                       every ``flush_interval_ms`` or ``batch_size`` rows.
+                       Callers block only when the queue is full.
+        best_effort  - like group_commit but never blocks the caller: writes
+                       are dropped when the queue is full and the writer runs
+                       with ``synchronous=OFF``.
+        disabled     - discard every write; for throwaway simulations that
+                       need the engine but no persistence.
+    """
+
+    def __init__(self, connections, mode=GROUP_COMMIT, flush_interval_ms=50,
+                 batch_size=500, max_queue_size=10000):
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {mode}")
+        self.connections = connections
+        self.mode = mode
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._local = threading.local()  # Rows held back by an open batch() on this thread
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run,
+                                                name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, sql, params):
+        """Queue a single statement for execution."""
+        if self.mode == DISABLED:
+            return True
+        if self.mode == SYNC:
+            with self.connections.transaction() as conn:
+                conn.execute(sql, params)
+            return True
+
+        rows = getattr(self._local, 'rows', None)
+        if rows is not None:
+            rows.append((sql, params))
+            return True
+        return self._put((sql, params))
+
+    def _put(self, item):
+        """Queue one statement, or a list of statements to be committed together."""
+        self._ensure_writer()
+        if self.mode == BEST_EFFORT:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1 if isinstance(item, tuple) else len(item)
+                if self.dropped % 1000 == 1:
+                    logger.warning(f"Persistence queue full - {self.dropped} writes dropped")
+                return False
+        else:
+            self._queue.put(item)
+        return True
+
+    def batch(self):
+        """Context for grouping several submits from this thread into one commit.
+
+        In sync mode this is a real transaction on the caller's connection.
+        In the queued modes the submits are held back until the context
+        exits and then queued as one item, which the writer commits in a
+        single transaction; if the context raises, none of them is written.
+        Only if that commit fails does the writer fall back to writing the
+        rows one by one.
+        """
+        if self.mode == SYNC:
+            return self.connections.transaction()
+        if self.mode == DISABLED:
+            return nullcontext()
+        return _Batch(self)
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far has been committed."""
+        if self.mode in (SYNC, DISABLED) or self._thread is None:
+            return True
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        # Wait in short slices so a writer that died cannot hang the caller
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            if barrier.done.wait(wait):
+                return True
+            if not self._thread.is_alive():
+                logger.error("Database writer thread stopped - pending writes were not flushed")
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self, timeout=5.0):
+        """Flush pending writes and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        if self.mode == BEST_EFFORT:
+            self.connections.get_connection().execute("PRAGMA synchronous=OFF")
+
+        while True:
+            rows, markers = self._collect()
+            if rows:
+                try:
+                    self._write(rows)
+                except Exception as e:
+                    # Keep the writer alive so later writes and flush() still work
+                    logger.error(f"Database writer error: {str(e)}")
+            for marker in markers:
+                if marker is _STOP:
+                    return
+                marker.done.set()
+
+    def _collect(self):
+        """Gather up to ``batch_size`` rows or until the flush interval ends."""
+        rows = []
+        markers = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if isinstance(item, tuple):
+                rows.append(item)
+            elif isinstance(item, list):
+                rows.extend(item)  # A batch() group, kept in one commit
+            else:
+                markers.append(item)
+                break  # Barriers and stop requests flush immediately
+            if len(rows) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        return rows, markers
+
+    def _write(self, rows):
+        """Commit a batch in one transaction, falling back row by row on error."""
+        try:
+            with self.connections.transaction() as conn:
+                for sql, group in groupby(rows, key=lambda row: row[0]):
+                    conn.executemany(sql, [params for _, params in group])
+        except Exception as e:
+            logger.error(f"Batch write of {len(rows)} rows failed: {str(e)}")
+            for sql, params in rows:
+                try:
+                    with self.connections.transaction() as conn:
+                        conn.execute(sql, params)
+                except Exception as row_error:
+                    logger.error(f"Dropping unwritable row: {str(row_error)}")
@@ -28,8 +28,8 @@ sys.path.insert(0, root_dir)
 
 try:
     from PyQt5.QtWidgets import QApplication
-    from PyQt5.QtCore import QTimer
     from simulation.market_simulation import market_session
+    from simulation.engine import engine
     from ui.main_window import MainWindow
     from utils.logger import logger
 except ImportError as e:
@@ -39,7 +39,8 @@ except ImportError as e:
     sys.exit(1)
 
 # Configuration
-MARKET_UPDATE_INTERVAL = 1000  # milliseconds
+MARKET_UPDATE_INTERVAL = 1000  # milliseconds, longest wait between market updates
+MIN_MARKET_UPDATE_INTERVAL = 10  # milliseconds, shortest wait for sub-second cadences
 
 # Initialize market state before creating UI
 def main():
@@ -47,25 +48,31 @@ def main():
         # Create the application
         app = QApplication(sys.argv)
         
-        # Initialize market state but don't start session
+        # Restore the previous market if possible, otherwise start fresh
         from simulation import market_state
-        market_state.initialize_market()
+        from simulation.checkpoint import warm_start
+        from config import WARM_RESTART
+        restored = WARM_RESTART and '--fresh' not in sys.argv and warm_start()
+        if restored:
+            market_session.current_session = restored.session
+        else:
+            market_state.initialize_market()
         logger.info("Market initialized with stocks: " + ", ".join(market_state.stock_prices.keys()))
         
         # Create and show the main window
         window = MainWindow()
         window.show()
         
-        # Setup market update timer
-        market_timer = QTimer()
-        market_timer.timeout.connect(market_session.update)
-        market_timer.start(MARKET_UPDATE_INTERVAL)
+        # Run the market on its own engine thread, waking whenever the next stock is due
+        engine.start(MARKET_UPDATE_INTERVAL / 1000, MIN_MARKET_UPDATE_INTERVAL / 1000)
         
         # Remove automatic session start
         logger.info("System ready - waiting for manual session start")
         
         # Start the event loop
-        return app.exec_()
+        result = app.exec_()
+        engine.stop()
+        return result
         
     except Exception as e:
         logger.error(f"Application error: {str(e)}")
@@ -6,6 +6,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         'PyQt5',
+        'numpy',
     ],
     entry_points={
         'console_scripts': [
@@ -0,0 +1,303 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from heapq import merge
+
+import numpy as np
+
+import config
+from data.db import SimulationDB, db as live_db
+from data.timeseries import _parse_timestamp
+from utils.logger import logger
+from . import clock, market_state, market_simulation
+from .market_simulation import MarketSession
+from .rng import random_streams
+
+COEFFICIENTS = ('DEMAND_COEFFICIENT', 'EVENT_COEFFICIENT')
+
+class SessionResult:
+    """Outcome of one replayed session."""
+
+    def __init__(self, number, start, symbols, start_values):
+        self.number = number
+        self.start = start
+        self.end = None
+        self.symbols = symbols
+        self.start_values = start_values
+        self.pnl = {}
+        self._times = []
+        self._prices = []
+
+    def sample(self, now):
+        self._times.append(now)
+        self._prices.append([market_state.stock_prices.get(symbol, np.nan) for symbol in self.symbols])
+
+    @property
+    def price_times(self):
+        """Seconds since session start for each row of ``price_path``."""
+        return np.array(self._times) - self.start
+
+    @property
+    def price_path(self):
+        """(samples, symbols) array of prices, sampled once per virtual second."""
+        return np.array(self._prices).reshape(len(self._prices), len(self.symbols))
+
+class BacktestResult:
+    """Per-session P&L and price paths for one coefficient scenario, plus throughput."""
+
+    def __init__(self, coefficients):
+        self.coefficients = coefficients
+        self.sessions = []
+        self.orders = 0
+        self.orders_executed = 0
+        self.news = 0
+        self.ticks = 0
+        self.virtual_seconds = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def ticks_per_second(self):
+        return self.ticks / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def orders_per_second(self):
+        return self.orders / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def speedup(self):
+        """Virtual seconds simulated per wall-clock second."""
+        return self.virtual_seconds / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        coefficients = ', '.join(f"{name}={value}" for name, value in self.coefficients.items())
+        lines = [
+            f"Scenario {coefficients}",
+            f"  {self.orders} orders ({self.orders_executed} executed), {self.news} news events, "
+            f"{len(self.sessions)} sessions in {self.elapsed:.2f}s ({self.speedup:.0f}x real time)",
+            f"  Throughput: {self.ticks_per_second:.0f} ticks/s, {self.orders_per_second:.0f} orders/s",
+        ]
+        for session in self.sessions:
+            total = sum(session.pnl.values())
+            best = max(session.pnl, key=session.pnl.get) if session.pnl else None
+            lines.append(f"  Session {session.number}: total P&L ${total:,.2f}"
+                         + (f", best team {best} (${session.pnl[best]:,.2f})" if best is not None else ""))
+        return '\n'.join(lines)
+
+def iter_inputs(source):
+    """Merge recorded orders, news events and session markers into one time-ordered stream.
+
+    Yields (epoch ts, kind, data) with kind 'session_start', 'session_end',
+    'order' or 'news'. Each source is paged from the DB, so memory stays
+    bounded regardless of history length.
+    """
+    markers = (
+        (ts, event_type, payload)
+        for _, ts, event_type, payload in source.iter_journal(event_types=('session_start', 'session_end'))
+    )
+    orders = (
+        (_parse_timestamp(ts), 'order', {'team_id': team_id, 'stock': stock,
+                                         'type': order_type, 'quantity': quantity})
+        for ts, team_id, stock, order_type, quantity in source.iter_order_history(
+            columns=('timestamp', 'team_id', 'stock', 'order_type', 'quantity'))
+    )
+    news = (
+        (_parse_timestamp(ts), 'news', {'stocks': json.loads(stocks or '[]'), 'impact': impact})
+        for ts, stocks, impact in source.iter_event_history(
+            event_type='news', columns=('timestamp', 'affected_stocks', 'impact'))
+    )
+    return merge(markers, orders, news, key=lambda item: item[0])
+
+@contextmanager
+def _isolated_engine(scratch, virtual_clock, coefficients):
+    """Point the engine at a scratch DB and a virtual clock, and apply the scenario's coefficients."""
+    saved_db = market_state.db, market_simulation.db
+    saved_coefficients = {name: getattr(config, name) for name in COEFFICIENTS}
+    saved_clock = clock.set_clock(virtual_clock)
+    saved_level = logger.level
+    market_state.db = market_simulation.db = scratch
+    for name, value in coefficients.items():
+        setattr(config, name, value)
+    logger.setLevel(logging.WARNING)  # Per-order logging would dominate the run time
+    try:
+        yield
+    finally:
+        logger.setLevel(saved_level)
+        for name, value in saved_coefficients.items():
+            setattr(config, name, value)
+        market_state.db, market_simulation.db = saved_db
+        clock.set_clock(saved_clock)
+
+def _team_values():
+    values = {}
+    for team_id, portfolio in market_state.team_portfolios.items():
+        holdings_value = sum(
+            market_state.stock_prices.get(stock, 0) * quantity
+            for stock, quantity in portfolio['holdings'].items()
+        )
+        values[team_id] = portfolio['cash'] + holdings_value
+    return values
+
+class _Replayer:
+    """Feeds a recorded input stream through the engine on a virtual clock."""
+
+    def __init__(self, result, virtual_clock, speed, demand_pressure, session_duration):
+        self.result = result
+        self.clock = virtual_clock
+        self.speed = speed
+        self.demand_pressure = demand_pressure
+        self.session = MarketSession()
+        self.session.checkpoint_path = None
+        self.session.session_duration = session_duration
+        self.current = None
+        self.sampler = None
+        self.wall_start = time.perf_counter()
+        self.virtual_start = virtual_clock.time()
+
+    def run(self, inputs, uses_markers):
+        for ts, kind, data in inputs:
+            self.advance(ts)
+            if kind == 'session_start':
+                self.end_session()
+                self.start_session()
+            elif kind == 'session_end':
+                self.end_session()
+            else:
+                # Without recorded session boundaries, the first input after a session opens the next one
+                if not uses_markers and not self.session.session_active:
+                    self.start_session()
+                if kind == 'order':
+                    self.process_order(data)
+                else:
+                    self.session.add_news_impact(data['stocks'], data['impact'])
+                    self.result.news += 1
+        # Let the last session run out its clock
+        if self.session.session_active:
+            self.advance(self.clock.time() + self.session.time_remaining + 1)
+        self.end_session()
+
+    def advance(self, ts):
+        """Run the virtual clock up to ``ts``; idle gaps between sessions are skipped instantly."""
+        while self.session.session_active and self.clock.time() < ts:
+            step = min(ts, self.clock.time() + 1.0) if self.speed else ts
+            self.clock.run_until(step, condition=lambda: not self.session.session_active)
+            if self.speed:
+                self.pace()
+        if self.current and not self.session.session_active:
+            self.finish_session()  # Session countdown expired
+        self.clock.run_until(max(ts, self.clock.time()))
+
+    def pace(self):
+        """Sleep so virtual time runs no faster than ``speed`` times real time."""
+        ahead = (self.clock.time() - self.virtual_start) / self.speed - (time.perf_counter() - self.wall_start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def start_session(self):
+        self.session.start_session()
+        self.session.start_update_loop()
+        self.current = SessionResult(self.session.current_session, self.clock.time(),
+                                     list(market_state.stock_prices), _team_values())
+        self.current.sample(self.clock.time())
+        self.sampler = clock.call_repeating(1.0, lambda: self.current.sample(self.clock.time()))
+
+    def end_session(self):
+        if self.session.session_active:
+            self.session.end_session()
+        if self.current:
+            self.finish_session()
+
+    def finish_session(self):
+        self.sampler.cancel()
+        self.session.stop_update_loop()
+        self.current.end = self.clock.time()
+        end_values = _team_values()
+        self.current.pnl = {
+            team_id: value - self.current.start_values.get(team_id, value)
+            for team_id, value in end_values.items()
+        }
+        self.result.sessions.append(self.current)
+        self.current = None
+
+    def process_order(self, data):
+        self.result.orders += 1
+        order = dict(data, timestamp=self.clock.time())
+        if not market_state.process_market_order(data['team_id'], order):
+            return
+        self.result.orders_executed += 1
+        if self.demand_pressure:
+            # Reprice with the demand/trend model so DEMAND_COEFFICIENT and EVENT_COEFFICIENT take effect
+            price = market_simulation.calculate_order_price(order)
+            market_state.stock_prices[order['stock']] = price
+            market_state.record_price_history(order['stock'], price)
+            market_state.record_event('price', stock=order['stock'], price=price)
+
+def backtest(source=None, coefficients=None, seed=0, speed=None, demand_pressure=True,
+             session_duration=600):
+    """Replay recorded orders and news through the engine faster than real time.
+
+    ``source`` is a SimulationDB or a path to one (default: the live DB). Its
+    history is only read; the replay writes to a temporary scratch DB. The market starts
+    from ``initialize_market`` and the live in-memory state is overwritten,
+    so run backtests in their own process. ``speed`` caps the run at that
+    many times real time (None runs as fast as possible).
+    """
+    if isinstance(source, str):
+        source = SimulationDB(source)
+    source = source or live_db
+    coefficients = dict(coefficients or {})
+    unknown = set(coefficients) - set(COEFFICIENTS)
+    if unknown:
+        raise ValueError(f"Unknown coefficients: {', '.join(sorted(unknown))}")
+    scenario = {name: coefficients.get(name, getattr(config, name)) for name in COEFFICIENTS}
+    result = BacktestResult(scenario)
+
+    inputs = iter_inputs(source)
+    first = next(inputs, None)
+    if first is None:
+        return result
+    uses_markers = source.event_journal.latest_seq('session_start') is not None
+
+    random_streams.reseed(seed)
+    virtual_clock = clock.VirtualClock(start=first[0])
+    scratch_dir = tempfile.mkdtemp(prefix='tradewars-backtest-')
+    scratch = SimulationDB(os.path.join(scratch_dir, 'backtest.db'), mode='best_effort')
+    try:
+        with _isolated_engine(scratch, virtual_clock, scenario):
+            market_state.initialize_market()
+            replayer = _Replayer(result, virtual_clock, speed, demand_pressure, session_duration)
+            replayer.session.price_manager = market_simulation.PriceFluctuationManager()
+            replayer.run(merge([first], inputs, key=lambda item: item[0]), uses_markers)
+            result.ticks = replayer.session.price_manager.tick_count
+            result.virtual_seconds = sum(s.end - s.start for s in result.sessions)
+            result.elapsed = time.perf_counter() - replayer.wall_start
+    finally:
+        scratch.close()
+        for name in os.listdir(scratch_dir):
+            os.remove(os.path.join(scratch_dir, name))
+        os.rmdir(scratch_dir)
+    return result
+
+def compare_coefficients(scenarios, source=None, **kwargs):
+    """Run one backtest per coefficient scenario over the same recorded input and seed."""
+    return [backtest(source, coefficients, **kwargs) for coefficients in scenarios]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions under different pricing coefficients")
+    parser.add_argument('--db', help="Source database (default: the live simulation DB)")
+    parser.add_argument('--demand', type=float, nargs='+', default=[config.DEMAND_COEFFICIENT])
+    parser.add_argument('--event', type=float, nargs='+', default=[config.EVENT_COEFFICIENT])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed', type=float, help="Cap at this many times real time, e.g. 1000")
+    args = parser.parse_args(argv)
+
+    scenarios = [{'DEMAND_COEFFICIENT': demand, 'EVENT_COEFFICIENT': event}
+                 for demand in args.demand for event in args.event]
+    for result in compare_coefficients(scenarios, args.db, seed=args.seed, speed=args.speed):
+        print(result.summary())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import json
+import math
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import deque
+
+from config import TRANSACTION_TAIL_LENGTH
+from utils.logger import logger
+from . import market_state
+from .replay import ReplayState, replay_journal, restore_market_state
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'checkpoint.bin')
+
+# File layout (little endian):
+#   header   magic, version, body crc32, last journal seq, created at,
+#            symbol count, team count, starting budget, session number
+#   names    length-prefixed, NUL-separated UTF-8 symbol names
+#   symbols  price, last price, available quantity, volume   (per symbol)
+#   teams    team id, holding count, cash, then (symbol index, quantity) pairs
+#   history  length-prefixed zlib-compressed JSON of each team's in-memory transactions
+MAGIC = b'TWCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHIQdIIdI')
+LENGTH = struct.Struct('<I')
+SYMBOL = struct.Struct('<ddqq')
+TEAM = struct.Struct('<iId')
+HOLDING = struct.Struct('<Iq')
+
+def write_checkpoint(path=CHECKPOINT_PATH, session=0):
+    """Write the live market and portfolio state to a binary checkpoint.
+
+    Every state lock is held while the journal sequence number and the
+    state are read, so no event can land in between and be replayed on
+    top of a state that already includes it. The file is written after
+    the locks are released.
+    """
+    with market_state.lock_all():
+        last_seq = market_state.db.event_journal.last_seq
+        names = list(market_state.stock_prices)
+        for portfolio in market_state.team_portfolios.values():
+            for symbol in portfolio['holdings']:
+                if symbol not in market_state.stock_prices and symbol not in names:
+                    names.append(symbol)  # Held but no longer quoted
+        index = {symbol: i for i, symbol in enumerate(names)}
+
+        body = bytearray()
+        encoded_names = '\0'.join(names).encode('utf-8')
+        body += LENGTH.pack(len(encoded_names)) + encoded_names
+
+        for symbol in names:
+            body += SYMBOL.pack(
+                market_state.stock_prices.get(symbol, math.nan),
+                market_state.last_prices.get(symbol, math.nan),
+                market_state.available_quantities.get(symbol, 0),
+                market_state.trading_volume.get(symbol, 0)
+            )
+
+        transactions = {}
+        for team_id, portfolio in market_state.team_portfolios.items():
+            holdings = portfolio['holdings']
+            body += TEAM.pack(team_id, len(holdings), portfolio['cash'])
+            for symbol, quantity in holdings.items():
+                body += HOLDING.pack(index[symbol], quantity)
+            transactions[team_id] = list(portfolio['transactions'])
+
+        history = zlib.compress(json.dumps(transactions).encode('utf-8'))
+        body += LENGTH.pack(len(history)) + history
+        team_count = len(market_state.team_portfolios)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, zlib.crc32(body), last_seq, time.time(),
+        len(names), team_count, market_state.STARTING_BUDGET, session
+    )
+
+    # Write to a temporary file and swap it in so a crash never leaves a torn checkpoint
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return last_seq
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """Read a checkpoint into a ReplayState, or return None if missing or corrupt."""
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+        return None
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        (magic, version, crc, last_seq, _, symbol_count,
+         team_count, starting_budget, session) = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            logger.warning(f"Ignoring checkpoint with unknown format: {path}")
+            return None
+        if zlib.crc32(mm[HEADER.size:]) != crc:
+            logger.warning(f"Ignoring corrupt checkpoint: {path}")
+            return None
+
+        state = ReplayState()
+        state.last_seq = last_seq
+        state.starting_budget = starting_budget
+        state.session = session
+
+        offset = HEADER.size
+        (names_length,) = LENGTH.unpack_from(mm, offset)
+        offset += LENGTH.size
+        names = mm[offset:offset + names_length].decode('utf-8').split('\0') if symbol_count else []
+        offset += names_length
+
+        for symbol in names:
+            price, last_price, available, volume = SYMBOL.unpack_from(mm, offset)
+            offset += SYMBOL.size
+            if math.isnan(price):
+                continue
+            state.stock_prices[symbol] = price
+            if not math.isnan(last_price):
+                state.last_prices[symbol] = last_price
+            state.available_quantities[symbol] = available
+            state.trading_volume[symbol] = volume
+
+        for _ in range(team_count):
+            team_id, holding_count, cash = TEAM.unpack_from(mm, offset)
+            offset += TEAM.size
+            holdings = {}
+            for _ in range(holding_count):
+                symbol_index, quantity = HOLDING.unpack_from(mm, offset)
+                offset += HOLDING.size
+                holdings[names[symbol_index]] = quantity
+            state.team_portfolios[team_id] = {
+                'cash': cash,
+                'holdings': holdings,
+                'transactions': deque(maxlen=TRANSACTION_TAIL_LENGTH),
+                'holdings_value': 0,
+                'total_value': cash
+            }
+
+        (history_length,) = LENGTH.unpack_from(mm, offset)
+        offset += LENGTH.size
+        history = json.loads(zlib.decompress(mm[offset:offset + history_length]))
+        for team_id, transactions in history.items():
+            state.team_portfolios[int(team_id)]['transactions'].extend(transactions)
+
+    return state
+
+def warm_start(path=CHECKPOINT_PATH):
+    """Restore market state from the checkpoint plus the journal tail.
+
+    Falls back to a full replay from the last reset when there is no usable
+    checkpoint. Returns the restored ReplayState, or False (leaving live
+    state untouched) when there is nothing to restore.
+    """
+    start = time.perf_counter()
+    state = load_checkpoint(path)
+    if state is not None:
+        checkpoint_seq = state.last_seq
+        state = replay_journal(after_seq=checkpoint_seq, state=state)
+        replayed = state.last_seq - checkpoint_seq
+    elif market_state.db.event_journal.latest_seq('reset'):
+        state = replay_journal()
+        replayed = state.last_seq
+    else:
+        return False
+
+    if not state.stock_prices:
+        return False
+
+    restore_market_state(state)
+    # Never reuse sequence numbers already covered by the checkpoint
+    journal = market_state.db.event_journal
+    journal.last_seq = max(journal.last_seq, state.last_seq)
+
+    logger.info(f"Warm restart: restored {len(state.stock_prices)} stocks and "
+                f"{len(state.team_portfolios)} teams at seq {state.last_seq} "
+                f"({replayed} journal events replayed) in "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    return state
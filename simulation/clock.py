@@ -0,0 +1,245 @@
+import abc
+import heapq
+import itertools
+import threading
+import time
+
+from utils.logger import logger
+
+class Timer:
+    """Handle for a scheduled callback; cancel() stops it from firing again."""
+
+    def __init__(self, cancel=None):
+        self._cancel = cancel
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            if self._cancel:
+                self._cancel()
+
+class Clock(abc.ABC):
+    """Time source and timer factory for the market engine.
+
+    The engine reads time and schedules its countdown and market updates
+    only through the active clock, so it can be driven by the Qt event loop,
+    by asyncio, or by a virtual clock that runs faster than real time.
+    """
+
+    @abc.abstractmethod
+    def time(self):
+        """Current time in epoch seconds."""
+
+    @abc.abstractmethod
+    def call_later(self, delay, callback):
+        """Run ``callback`` once after ``delay`` seconds; returns a Timer."""
+
+    @abc.abstractmethod
+    def call_repeating(self, interval, callback):
+        """Run ``callback`` every ``interval`` seconds until cancelled; returns a Timer."""
+
+def _repeat_with(clock, interval, callback):
+    """call_repeating built from ``clock.call_later``, rescheduling after each run."""
+    timer = Timer()
+
+    def fire():
+        if timer.cancelled:
+            return
+        try:
+            callback()
+        finally:
+            # An error in one run must not stop the timer, as with QTimer
+            if not timer.cancelled:
+                handle = clock.call_later(interval, fire)
+                timer._cancel = handle.cancel
+
+    timer._cancel = clock.call_later(interval, fire).cancel
+    return timer
+
+class QtClock(Clock):
+    """Wall-clock time with timers on the Qt event loop.
+
+    PyQt5 is imported on first use, so importing the engine does not need Qt.
+    """
+
+    def __init__(self):
+        self._timers = set()  # Keep Python references so Qt does not drop active timers
+
+    def time(self):
+        return time.time()
+
+    def call_later(self, delay, callback):
+        from PyQt5.QtCore import QTimer
+        qtimer = QTimer()
+        qtimer.setSingleShot(True)
+        self._timers.add(qtimer)
+
+        def fire():
+            self._timers.discard(qtimer)
+            callback()
+
+        def cancel():
+            qtimer.stop()
+            self._timers.discard(qtimer)
+
+        qtimer.timeout.connect(fire)
+        qtimer.start(max(0, int(delay * 1000)))
+        return Timer(cancel)
+
+    def call_repeating(self, interval, callback):
+        from PyQt5.QtCore import QTimer
+        qtimer = QTimer()
+        qtimer.setInterval(max(0, int(interval * 1000)))
+        qtimer.timeout.connect(callback)
+        self._timers.add(qtimer)
+        qtimer.start()
+
+        def cancel():
+            qtimer.stop()
+            self._timers.discard(qtimer)
+
+        return Timer(cancel)
+
+class AsyncioClock(Clock):
+    """Wall-clock time with timers on an asyncio event loop."""
+
+    def __init__(self, loop=None):
+        self.loop = loop
+
+    def time(self):
+        return time.time()
+
+    def call_later(self, delay, callback):
+        import asyncio
+        loop = self.loop or asyncio.get_event_loop()
+        return Timer(loop.call_later(max(0, delay), callback).cancel)
+
+    def call_repeating(self, interval, callback):
+        return _repeat_with(self, interval, callback)
+
+class VirtualClock(Clock):
+    """Simulated time that only moves when advanced.
+
+    Due callbacks run in time order (ties in scheduling order) with the clock
+    set to their due time, so a whole session can run in milliseconds.
+    """
+
+    def __init__(self, start=None):
+        self.now = start if start is not None else time.time()
+        self._queue = []
+        self._counter = itertools.count()
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        timer = Timer()
+        heapq.heappush(self._queue, (self.now + max(0, delay), next(self._counter), timer, callback))
+        return timer
+
+    def call_repeating(self, interval, callback):
+        return _repeat_with(self, interval, callback)
+
+    def pending(self):
+        """Number of callbacks still scheduled."""
+        return sum(1 for _, _, timer, _ in self._queue if not timer.cancelled)
+
+    def advance(self, seconds):
+        """Move time forward by ``seconds``, running every callback that falls due."""
+        return self.run_until(self.now + seconds)
+
+    def run_until(self, deadline, condition=None):
+        """Run due callbacks up to ``deadline``, or until ``condition()`` is true.
+
+        Returns the number of callbacks run.
+        """
+        ran = 0
+        while self._queue and self._queue[0][0] <= deadline:
+            if condition is not None and condition():
+                return ran
+            due, _, timer, callback = heapq.heappop(self._queue)
+            if timer.cancelled:
+                continue
+            self.now = max(self.now, due)
+            callback()
+            ran += 1
+        if condition is None or not condition():
+            self.now = max(self.now, deadline)
+        return ran
+
+class ThreadClock(Clock):
+    """Wall-clock time with timers run by one thread's own loop.
+
+    Any thread may schedule; the owning thread calls run_due() whenever
+    next_delay() has passed. ``wake`` is called after each call_later so a
+    loop blocked waiting for work can recompute how long to sleep. A
+    callback that raises is logged and skipped, so one failing timer
+    cannot take the owning thread down.
+    """
+
+    def __init__(self, wake=None):
+        self.wake = wake
+        self._queue = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def time(self):
+        return time.time()
+
+    def call_later(self, delay, callback):
+        timer = Timer()
+        with self._lock:
+            heapq.heappush(self._queue, (time.time() + max(0, delay), next(self._counter), timer, callback))
+        if self.wake:
+            self.wake()
+        return timer
+
+    def call_repeating(self, interval, callback):
+        return _repeat_with(self, interval, callback)
+
+    def next_delay(self):
+        """Seconds until the next live timer is due (0 if overdue), or None."""
+        with self._lock:
+            while self._queue and self._queue[0][2].cancelled:
+                heapq.heappop(self._queue)
+            if not self._queue:
+                return None
+            return max(0.0, self._queue[0][0] - time.time())
+
+    def run_due(self):
+        """Run every callback that is due, in time order; returns how many ran."""
+        ran = 0
+        while True:
+            with self._lock:
+                if not self._queue or self._queue[0][0] > time.time():
+                    return ran
+                _, _, timer, callback = heapq.heappop(self._queue)
+            if not timer.cancelled:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Timer callback error: {str(e)}")
+                ran += 1
+
+_clock = QtClock()
+
+def get_clock():
+    return _clock
+
+def set_clock(clock):
+    """Install the clock used by the market engine; returns the previous one."""
+    global _clock
+    previous = _clock
+    _clock = clock
+    return previous
+
+def now():
+    """Current engine time in epoch seconds."""
+    return _clock.time()
+
+def call_later(delay, callback):
+    return _clock.call_later(delay, callback)
+
+def call_repeating(interval, callback):
+    return _clock.call_repeating(interval, callback)
@@ -1,6 +1,6 @@
 # Simulation Modules (simulation/economic_simulation.py)
 
-import random
+from .rng import random_streams
 
 def simulate_periodic_adjustments(base_price, volatility):
     """Apply background adjustments to mimic real-world market fluctuations.
@@ -12,6 +12,6 @@ def simulate_periodic_adjustments(base_price, volatility):
     Returns:
         float: The adjusted price after simulating market fluctuations.
     """
-    price_change = random.uniform(-volatility, volatility)
+    price_change = random_streams.stream('economic').uniform(-volatility, volatility)
     adjusted_price = base_price * (1 + price_change)
     return adjusted_price
@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from utils.logger import logger
+from . import clock
+from . import market_state
+from .market_simulation import market_session, market_simulation
+
+# Commands accepted by MarketEngine.submit()
+PlaceOrder = namedtuple('PlaceOrder', 'team_id stock quantity type')
+OverridePrice = namedtuple('OverridePrice', 'stock price')
+ChangePrice = namedtuple('ChangePrice', 'stock percent')  # Fractional change, e.g. 0.05 for +5%
+InjectNews = namedtuple('InjectNews', 'stocks impact title description')  # Impact in percent
+ListIPO = namedtuple('ListIPO', 'stock initial_price available_quantity')
+AdjustCash = namedtuple('AdjustCash', 'team_id amount')
+StartSession = namedtuple('StartSession', '')
+PauseSession = namedtuple('PauseSession', '')
+ResumeSession = namedtuple('ResumeSession', '')
+EndSession = namedtuple('EndSession', '')  # Finishes news impacts, saves state and checkpoints
+
+_STOP = object()
+
+class MarketEngine:
+    """Single writer for the market: one thread applies every command and runs every timer.
+
+    Callers on any thread submit typed commands; the engine thread applies
+    them in submission order. Commands queued together are applied in one
+    pass, and each run of consecutive PlaceOrder commands goes through
+    market_state.process_orders_batch as a single batch (one commit,
+    one order_batch_listeners call). While the engine runs it installs a
+    ThreadClock, so session control, the countdown, price updates and
+    checkpoints also run on the engine thread and the GUI thread never
+    prices or persists anything.
+
+    ``submit(command, callback)`` calls ``callback(command, result, error)``
+    on the engine thread once the command has been applied; ``error`` is a
+    message or None. ``snapshot_listeners`` are called with the new
+    market_state.market_snapshot() after the market changes, at most every
+    PUBLISH_INTERVAL seconds. Qt widgets pass a signal's ``emit`` for
+    either, which queues the call onto the GUI thread.
+
+    When the engine has not been started, submit() applies the command
+    inline on the calling thread. If the engine thread has died, submit()
+    raises RuntimeError rather than quietly running commands elsewhere.
+    """
+
+    PUBLISH_INTERVAL = 0.1  # Seconds between snapshot publications
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self.clock = None
+        self.snapshot_listeners = []
+        self._published_version = None
+        self._last_publish = 0.0
+        self._handlers = {
+            OverridePrice: self._override_price,
+            ChangePrice: self._change_price,
+            InjectNews: self._inject_news,
+            ListIPO: self._list_ipo,
+            AdjustCash: self._adjust_cash,
+            StartSession: lambda command: market_session.start_session(),
+            PauseSession: lambda command: market_session.pause(),
+            ResumeSession: lambda command: market_session.resume(),
+            EndSession: lambda command: market_session.end_session(),
+        }
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, max_delay=1.0, min_delay=0.01):
+        """Start the engine thread and drive the session's update loop from it."""
+        if self.running:
+            return False
+        self.stop()  # Clean up after a thread that died
+        self._queue = queue.Queue()
+        self.clock = clock.ThreadClock(wake=lambda: self._queue.put(None))
+        self._previous_clock = clock.set_clock(self.clock)
+        self._thread = threading.Thread(target=self._run, name='market-engine', daemon=True)
+        self._thread.start()
+        market_session.start_update_loop(max_delay, min_delay)
+        logger.info("Market engine started")
+        return True
+
+    def stop(self, timeout=5.0):
+        """Apply everything already queued, then stop the thread and restore the previous clock."""
+        if self._thread is None:
+            return False
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        market_session.stop_update_loop()
+        clock.set_clock(self._previous_clock)
+        self._thread = None
+        logger.info("Market engine stopped")
+        return True
+
+    def submit(self, command, callback=None):
+        """Queue a command for the engine thread (or apply it now if the engine is stopped)."""
+        self.submit_all((command,), callback)
+
+    def submit_all(self, commands, callback=None):
+        """Queue several commands to be applied in the same pass, e.g. one order per team."""
+        items = []
+        for command in commands:
+            if type(command) is not PlaceOrder and type(command) not in self._handlers:
+                raise ValueError(f"Unknown engine command: {command!r}")
+            items.append((command, callback))
+        if self._thread is None:
+            self._apply(items)
+        elif self._thread.is_alive():
+            self._queue.put(items)
+        else:
+            raise RuntimeError("Market engine thread has died; see the log for the error")
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception:
+            logger.exception("Market engine thread died")
+
+    def _loop(self):
+        while True:
+            delay = self.clock.next_delay()
+            try:
+                batches = [self._queue.get(timeout=delay)]
+            except queue.Empty:
+                batches = []
+            # Take everything else already queued so it is applied in the same pass
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # None only wakes the loop (a timer was scheduled); _STOP ends it after this pass
+            stop = any(batch is _STOP for batch in batches)
+            self._apply([item for batch in batches if batch is not None and batch is not _STOP
+                         for item in batch])
+            self.clock.run_due()
+            self._publish()
+            if stop:
+                return
+
+    def _apply(self, items):
+        orders = []
+        for command, callback in items:
+            if type(command) is PlaceOrder:
+                orders.append((command, callback))
+                continue
+            if orders:
+                self._place_orders(orders)
+                orders = []
+            try:
+                result, error = self._handlers[type(command)](command), None
+            except Exception as e:
+                result, error = None, str(e)
+                logger.error(f"Engine command {command} failed: {error}")
+            self._reply(callback, command, result, error)
+        if orders:
+            self._place_orders(orders)
+
+    def _reply(self, callback, command, result, error):
+        if callback is not None:
+            try:
+                callback(command, result, error)
+            except Exception as e:
+                logger.error(f"Engine callback error: {str(e)}")
+
+    def _publish(self):
+        version = market_state.store.version
+        now = time.monotonic()
+        if version == self._published_version or now - self._last_publish < self.PUBLISH_INTERVAL:
+            return
+        snapshot = market_state.market_snapshot()
+        self._published_version = snapshot.version
+        self._last_publish = now
+        for listener in self.snapshot_listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener error: {str(e)}")
+
+    def _place_orders(self, orders):
+        results = market_state.process_orders_batch([command._asdict() for command, _ in orders])
+        for (command, callback), result in zip(orders, results):
+            self._reply(callback, command, result, result['error'])
+
+    def _override_price(self, command):
+        return market_state.manual_override_price(command.stock, command.price)
+
+    def _change_price(self, command):
+        return market_state.update_stock_price(command.stock, command.percent, is_percent_change=True)
+
+    def _inject_news(self, command):
+        market_simulation._process_news_event({'stocks': list(command.stocks), 'impact': command.impact,
+                                               'description': command.description or command.title})
+        return True
+
+    def _list_ipo(self, command):
+        market_simulation._process_IPO(command._asdict())
+        return True
+
+    def _adjust_cash(self, command):
+        return market_state.adjust_cash(command.team_id, command.amount)
+
+engine = MarketEngine()
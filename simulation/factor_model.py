@@ -0,0 +1,90 @@
+import numpy as np
+
+from config import FACTOR_MODEL
+
+def build_sector_index(stock_details):
+    """Return (sorted sector names, {stock: sector position}) from STOCK_DETAILS-style data."""
+    sectors = sorted({details['sector'] for details in stock_details.values()})
+    positions = {sector: i for i, sector in enumerate(sectors)}
+    return sectors, {stock: positions[details['sector']] for stock, details in stock_details.items()}
+
+class FactorModel:
+    """Correlated per-tick returns from one market factor and one factor per sector.
+
+    Each symbol's return is ``B[i] @ f + idio[i] * e`` where the factor draws
+    ``f = L @ z`` use the Cholesky factor ``L`` of the factor covariance
+    (sector factors are correlated with each other). Loadings are scaled so
+    every symbol keeps a return standard deviation of ``volatility``; only
+    the correlation between symbols changes. Symbols without a known sector
+    load on the market factor only.
+    """
+
+    def __init__(self, stock_details, volatility, market_share=None, sector_share=None,
+                 sector_correlation=None):
+        market_share = FACTOR_MODEL['MARKET_SHARE'] if market_share is None else market_share
+        sector_share = FACTOR_MODEL['SECTOR_SHARE'] if sector_share is None else sector_share
+        sector_correlation = (FACTOR_MODEL['SECTOR_CORRELATION']
+                              if sector_correlation is None else sector_correlation)
+        if market_share < 0 or sector_share < 0 or market_share + sector_share > 1:
+            raise ValueError("Factor variance shares must be non-negative and sum to at most 1")
+
+        self.volatility = volatility
+        self.market_share = market_share
+        self.sector_share = sector_share
+        self.sectors, self.stock_sectors = build_sector_index(stock_details)
+
+        # Factor covariance: unit-variance market factor, independent of the
+        # sector factors, which share a common pairwise correlation
+        k = 1 + len(self.sectors)
+        covariance = np.eye(k)
+        covariance[1:, 1:] += sector_correlation * (1 - np.eye(k - 1))
+        self.cholesky = np.linalg.cholesky(covariance)
+
+        self.loadings = np.zeros((0, k))
+        self.idiosyncratic = np.zeros(0)
+
+    def add_symbols(self, symbols):
+        """Append loading rows for newly listed symbols, in symbol-ID order."""
+        rows = np.zeros((len(symbols), self.loadings.shape[1]))
+        idiosyncratic = np.empty(len(symbols))
+        scale = self.volatility
+        for row, symbol in enumerate(symbols):
+            rows[row, 0] = np.sqrt(self.market_share) * scale
+            sector = self.stock_sectors.get(symbol)
+            if sector is None:
+                idiosyncratic[row] = np.sqrt(1 - self.market_share) * scale
+            else:
+                rows[row, 1 + sector] = np.sqrt(self.sector_share) * scale
+                idiosyncratic[row] = np.sqrt(1 - self.market_share - self.sector_share) * scale
+        self.loadings = np.vstack([self.loadings, rows])
+        self.idiosyncratic = np.concatenate([self.idiosyncratic, idiosyncratic])
+
+    def sample_factors(self, rng):
+        """One correlated draw of the factors: market first, then each sector in ``sectors`` order."""
+        return self.cholesky @ rng.standard_normal(self.cholesky.shape[0])
+
+    def sample(self, rng, ids):
+        """Correlated returns for the symbol IDs in ``ids``."""
+        factors = self.sample_factors(rng)
+        return self.loadings[ids] @ factors + self.idiosyncratic[ids] * rng.standard_normal(len(ids))
+
+    def sector_moves(self, rng):
+        """One move per sector, in ``sectors`` order, with standard deviation ``volatility``.
+
+        Each sector moves with the market factor and its own sector factor,
+        weighted by their variance shares, so sectors are correlated the
+        same way the symbols in them are.
+        """
+        factors = self.sample_factors(rng)
+        systematic = self.market_share + self.sector_share
+        if systematic == 0:
+            return np.zeros(len(self.sectors))
+        return self.volatility * (np.sqrt(self.market_share) * factors[0] +
+                                  np.sqrt(self.sector_share) * factors[1:]) / np.sqrt(systematic)
+
+    def correlation(self):
+        """Implied return correlation matrix for every registered symbol."""
+        factor_covariance = self.cholesky @ self.cholesky.T
+        covariance = self.loadings @ factor_covariance @ self.loadings.T + np.diag(self.idiosyncratic ** 2)
+        sd = np.sqrt(np.diag(covariance))
+        return covariance / np.outer(sd, sd)
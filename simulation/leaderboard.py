@@ -0,0 +1,119 @@
+from bisect import bisect_left
+from collections import deque
+
+class Leaderboard:
+    """Teams ordered by total value, updated incrementally as valuations change.
+
+    Entries are kept as a sorted list of (-value, team_id), so a rank query
+    or the position of an update is a binary search, and an update moves one
+    entry. When a team moves, every team it passes shifts by one place;
+    those teams, and any team whose value changed, are recorded against the
+    current version so displays can redraw only the rows that changed since
+    the version they last drew.
+    """
+
+    HISTORY = 1000  # Versions of change history kept for changed_since()
+    BULK_FRACTION = 0.25  # Re-sort outright when at least this share of teams changes at once
+
+    def __init__(self):
+        self.version = 0
+        self.clear()
+
+    def clear(self):
+        """Drop every team; versions keep counting up."""
+        self._entries = []
+        self._values = {}
+        self._log = deque(maxlen=self.HISTORY)  # (version, teams whose rank changed in it)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, team_id):
+        return team_id in self._values
+
+    def value(self, team_id):
+        return self._values.get(team_id)
+
+    def update_many(self, values):
+        """Apply {team_id: total value} as one new version; returns the version."""
+        if len(values) >= self.BULK_FRACTION * len(self._entries):
+            changed = self._resort(values)
+        else:
+            changed = set()
+            for team_id, value in values.items():
+                self._move(team_id, value, changed)
+        self.version += 1
+        if changed:
+            self._log.append((self.version, changed))
+        return self.version
+
+    def update(self, team_id, value):
+        return self.update_many({team_id: value})
+
+    def remove(self, team_id):
+        if team_id not in self._values:
+            return False
+        changed = set()
+        index = self._pop(team_id)
+        changed.update(team for _, team in self._entries[index:])
+        self.version += 1
+        if changed:
+            self._log.append((self.version, changed))
+        return True
+
+    def rank(self, team_id):
+        """1-based rank of a team (1 = highest value), or None if unknown."""
+        value = self._values.get(team_id)
+        if value is None:
+            return None
+        return bisect_left(self._entries, (-value, team_id)) + 1
+
+    def top(self, k=None):
+        """[(team_id, value)] for the ``k`` highest-valued teams (all teams by default)."""
+        entries = self._entries if k is None else self._entries[:k]
+        return [(team_id, -key) for key, team_id in entries]
+
+    def changed_since(self, version):
+        """Teams whose rank or value changed in any version after ``version``.
+
+        Readers further behind than the kept history get every team.
+        """
+        if len(self._log) == self._log.maxlen and version < self._log[0][0] - 1:
+            return set(self._values)
+        teams = set()
+        for logged, changed in reversed(self._log):
+            if logged <= version:
+                break
+            teams.update(changed)
+        return teams
+
+    def _resort(self, values):
+        old = [team_id for _, team_id in self._entries]
+        revalued = {team_id for team_id, value in values.items() if self._values.get(team_id) != value}
+        self._values.update(values)
+        self._entries = sorted((-value, team_id) for team_id, value in self._values.items())
+        changed = {team_id for (_, team_id), previous in zip(self._entries, old) if team_id != previous}
+        changed.update(team_id for _, team_id in self._entries[len(old):])
+        return changed | revalued
+
+    def _pop(self, team_id):
+        index = bisect_left(self._entries, (-self._values.pop(team_id), team_id))
+        del self._entries[index]
+        return index
+
+    def _move(self, team_id, value, changed):
+        if team_id in self._values:
+            if self._values[team_id] == value:
+                return
+            old = self._pop(team_id)
+        else:
+            old = len(self._entries)
+        entry = (-value, team_id)
+        new = bisect_left(self._entries, entry)
+        self._entries.insert(new, entry)
+        self._values[team_id] = value
+        changed.add(team_id)
+        if new != old:
+            # The moved team plus everyone it passed shift by one place
+            low, high = min(old, new), max(old, new)
+            changed.update(team for _, team in self._entries[low:high + 1])
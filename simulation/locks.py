@@ -0,0 +1,55 @@
+import threading
+
+class LockTable:
+    """Re-entrant locks keyed by symbol or team ID, created on first use."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def __getitem__(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(key, threading.RLock())
+        return lock
+
+class StateLocks:
+    """Per-symbol and per-team locks over the shared market state.
+
+    Writers hold the lock of every symbol and team they read-modify-write,
+    so orders on different symbols and teams run in parallel while two
+    updates to the same price or portfolio cannot interleave. To rule out
+    deadlock, locks are always taken symbols first, then teams, each kind
+    in sorted order, across nested hold() calls too: a thread holding a
+    team lock must not take a new symbol lock. Re-taking a lock already
+    held is always fine, as the locks are re-entrant.
+
+    Readers do not lock: they use market_state.market_snapshot(), which is
+    never mutated once built.
+    """
+
+    def __init__(self):
+        self.symbols = LockTable()
+        self.teams = LockTable()
+
+    def hold(self, symbols=(), teams=()):
+        """Context manager holding the locks of ``symbols`` and ``teams``."""
+        return _Held([self.symbols[symbol] for symbol in sorted(set(symbols))] +
+                     [self.teams[team_id] for team_id in sorted(set(teams))])
+
+class _Held:
+    __slots__ = ('locks',)
+
+    def __init__(self, locks):
+        self.locks = locks
+
+    def __enter__(self):
+        for lock in self.locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self.locks):
+            lock.release()
+        return False
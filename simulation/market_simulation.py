@@ -1,14 +1,19 @@
-from config import DEMAND_COEFFICIENT, EVENT_COEFFICIENT, RANDOM_NOISE, PRICE_FLUCTUATION
+import config
+from config import PRICE_FLUCTUATION, CHECKPOINT_INTERVAL, NEWS_IMPACT_DURATION, NEWS_IMPACT_EASING
 from . import market_state  # Changed this line
+from . import clock
+from .checkpoint import CHECKPOINT_PATH, write_checkpoint
+from .factor_model import FactorModel
+from .news_impacts import NewsImpactEngine
+from .rng import random_streams
+from .scheduler import UpdateScheduler
 from data.db import db
 from utils.logger import logger
 from utils.decorators import safe_operation
-import random
 import math
-import time
-import threading
 import logging
-from PyQt5.QtCore import QTimer
+from collections import deque
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +24,8 @@ class MarketTrend:
     NEUTRAL = 0
 
 class MarketSimulation:
+    SECTOR_TREND_VOLATILITY = 0.05 / math.sqrt(3)  # Same spread as the former uniform(-0.05, 0.05) draw
+
     def __init__(self):
         self.state = {
             'trend_duration': 0,  # How long current trend has lasted
@@ -29,16 +36,24 @@ class MarketSimulation:
         }
         self.trend_change_probability = 0.05  # 5% chance to change trend
         self.max_trend_duration = 300  # Maximum trend duration in seconds
+        # Built once; listed stocks missing from STOCK_DETAILS (IPOs) have no sector
+        self.factor_model = FactorModel(market_state.STOCK_DETAILS, volatility=self.SECTOR_TREND_VOLATILITY)
+        self.sectors, self.stock_sectors = self.factor_model.sectors, self.factor_model.stock_sectors
 
     def inject_IPO(self, ipo_data):
+        from .engine import engine, ListIPO
         logging.info("Injecting IPO with data: %s", ipo_data)
-        thread = threading.Thread(target=self._process_IPO, args=(ipo_data,))
-        thread.start()
+        engine.submit(ListIPO(ipo_data['stock'], ipo_data['initial_price'], ipo_data['available_quantity']))
 
     def _process_IPO(self, ipo_data):
         logging.info("Processing IPO: %s", ipo_data)
-        market_state.stock_prices[ipo_data['stock']] = ipo_data['initial_price']
-        market_state.available_quantities[ipo_data['stock']] = ipo_data['available_quantity']
+        # Listing may grow the column arrays, so no other writer may hold a reference to them
+        with market_state.lock_all(symbols=(ipo_data['stock'],)):
+            market_state.stock_prices[ipo_data['stock']] = ipo_data['initial_price']
+            market_state.available_quantities[ipo_data['stock']] = ipo_data['available_quantity']
+            market_state.record_event('listing', stock=ipo_data['stock'],
+                                      price=ipo_data['initial_price'],
+                                      quantity=ipo_data['available_quantity'])
         db.log_event(
             event_type="ipo",
             description=f"IPO: {ipo_data['stock']}",
@@ -48,9 +63,10 @@ class MarketSimulation:
         market_state.save_market_state()
 
     def inject_news_event(self, event_data):
+        from .engine import engine, InjectNews
         logging.info("Injecting news event with data: %s", event_data)
-        thread = threading.Thread(target=self._process_news_event, args=(event_data,))
-        thread.start()
+        engine.submit(InjectNews(event_data.get('stocks', []), event_data.get('impact', 0),
+                                 event_data.get('title', ''), event_data.get('description', '')))
 
     def _process_news_event(self, event_data):
         """Process news events directly with exact percentage"""
@@ -80,16 +96,18 @@ class MarketSimulation:
         
         # Increased chance of trend reversal as trend ages
         trend_change_chance = self.trend_change_probability * (1 + trend_age_factor)
+        rng = random_streams.stream('dynamics')
+        change_roll, strength_roll, momentum_roll = rng.random(3)
         
-        if random.random() < trend_change_chance or self.state['trend_duration'] >= self.max_trend_duration:
+        if change_roll < trend_change_chance or self.state['trend_duration'] >= self.max_trend_duration:
             # Reverse trend
             current_trend = -current_trend
             self.state['trend_duration'] = 0
-            self.state['trend_strength'] = 1.0 + random.uniform(0.2, 0.8)  # New trend strength
+            self.state['trend_strength'] = 1.2 + strength_roll * 0.6  # New trend strength in [1.2, 1.8)
             logger.info(f"Market trend changed to {'Bullish' if current_trend == MarketTrend.BULLISH else 'Bearish'}")
         
         # Update market momentum
-        momentum_change = random.uniform(-0.1, 0.1)
+        momentum_change = momentum_roll * 0.2 - 0.1
         self.state['market_momentum'] = max(-1.0, min(1.0, 
             self.state['market_momentum'] + momentum_change * self.state['trend_strength']))
         
@@ -100,15 +118,15 @@ class MarketSimulation:
         self._update_volatility()
 
     def _update_sector_trends(self):
-        """Update sector-specific market trends"""
-        sectors = {stock['sector'] for stock in market_state.STOCK_DETAILS.values()}
+        """Update sector-specific market trends from correlated market and sector factor draws"""
+        sector_changes = self.factor_model.sector_moves(random_streams.stream('sectors'))
         
-        for sector in sectors:
+        for sector, sector_change in zip(self.sectors, sector_changes.tolist()):
             if sector not in self.state['sector_performance']:
                 self.state['sector_performance'][sector] = 0.0
             
             # Update sector performance with trend influence
-            sector_change = random.uniform(-0.05, 0.05) * self.state['trend_strength']
+            sector_change *= self.state['trend_strength']
             current_perf = self.state['sector_performance'][sector]
             
             # Add trend bias - Fix the missing closing quote
@@ -125,17 +143,19 @@ class MarketSimulation:
         global volatility_factor
         
         base_volatility = volatility_factor
+        stocks = list(market_state.stock_prices.keys())
+        vol_changes = random_streams.stream('volatility').uniform(-0.1, 0.1, len(stocks))
         
-        for stock in market_state.stock_prices.keys():
+        for stock, vol_change in zip(stocks, vol_changes.tolist()):
             if stock not in self.state['volatility_factors']:
                 self.state['volatility_factors'][stock] = 1.0
             
             # Get stock's sector
-            sector = market_state.STOCK_DETAILS[stock]['sector']
-            sector_impact = abs(self.state['sector_performance'].get(sector, 0))
+            position = self.stock_sectors.get(stock)
+            sector_impact = 0 if position is None else abs(
+                self.state['sector_performance'].get(self.sectors[position], 0))
             
             # Calculate stock-specific volatility
-            vol_change = random.uniform(-0.1, 0.1)
             stock_vol = self.state['volatility_factors'][stock]
             
             # Include sector and momentum effects
@@ -175,15 +195,15 @@ def calculate_new_price(old_price, net_demand, news_impact, stock):  # Add stock
     # Apply volatility to all effects
     volatility = mods['volatility']
     
-    # Calculate final impact
+    # Calculate final impact (coefficients are read at call time so settings changes apply)
     total_impact = (
         (trend_impact + momentum_impact + sector_impact) * volatility +
-        net_demand * DEMAND_COEFFICIENT +
-        news_impact * EVENT_COEFFICIENT
+        net_demand * config.DEMAND_COEFFICIENT +
+        news_impact * config.EVENT_COEFFICIENT
     )
     
     # Add noise scaled by volatility
-    noise = random.uniform(-0.001, 0.001) * volatility
+    noise = random_streams.stream('order_pricing').uniform(-0.001, 0.001) * volatility
     total_impact += noise
     
     # Calculate new price
@@ -208,8 +228,8 @@ def calculate_momentum(stock):
     
     return momentum
 
-def process_order(order):
-    """Enhanced order processing with market impact - no session validation"""
+def calculate_order_price(order):
+    """Price after the demand and trend pressure of an order, without applying it"""
     stock = order['stock']
     quantity = order['quantity']
     order_type = order['type']
@@ -233,24 +253,35 @@ def process_order(order):
     trend_impact = current_trend * 0.01 * (1 + abs(net_demand))
     
     # Calculate new price with market depth consideration
-    new_price = calculate_new_price(
+    return calculate_new_price(
         current_price,
         net_demand,
         trend_impact,
         stock  # Add stock parameter here too
     )
-    
-    # Update market state
-    market_state.stock_prices[stock] = new_price
-    market_state.trading_volume[stock] = market_state.trading_volume.get(stock, 0) + quantity
-    
-    # Update volatility based on order impact
+
+def process_order(order):
+    """Enhanced order processing with market impact - no session validation"""
     global volatility_factor
-    price_change = abs(new_price - current_price) / current_price
-    volatility_factor = min(2.0, volatility_factor * (1 + price_change))
-    
-    # Save state changes
-    market_state.save_market_state()
+    stock = order['stock']
+    quantity = order['quantity']
+    with market_state.state_locks.hold(symbols=(stock,)):
+        current_price = market_state.stock_prices.get(stock, 0)
+        new_price = calculate_order_price(order)
+        
+        # Update market state
+        market_state.stock_prices[stock] = new_price
+        market_state.record_price_history(stock, new_price)
+        market_state.trading_volume[stock] = market_state.trading_volume.get(stock, 0) + quantity
+        market_state.record_event('price', stock=stock, price=new_price,
+                                  volume=market_state.trading_volume[stock])
+        
+        # Update volatility based on order impact
+        price_change = abs(new_price - current_price) / current_price
+        volatility_factor = min(2.0, volatility_factor * (1 + price_change))
+        
+        # Save state changes
+        market_state.save_market_state()
     
     return new_price
 
@@ -258,106 +289,125 @@ def update_market_conditions():
     """Periodically update market conditions."""
     global current_trend, volatility_factor, market_sentiment
     
+    rng = random_streams.stream('conditions')
+    trend_roll, volatility_change, sentiment_change = rng.random(3)
+    
     # Randomly shift market trend
-    if random.random() < 0.1:  # 10% chance to change trend
-        current_trend = random.choice([
+    if trend_roll < 0.1:  # 10% chance to change trend
+        current_trend = int(rng.choice([
             MarketTrend.BULLISH,
             MarketTrend.BEARISH,
             MarketTrend.NEUTRAL
-        ])
+        ]))
     
     # Update volatility
-    volatility_factor = max(0.5, min(2.0, volatility_factor + random.uniform(-0.1, 0.1)))
+    volatility_factor = max(0.5, min(2.0, volatility_factor + volatility_change * 0.2 - 0.1))
     
     # Update market sentiment
-    market_sentiment = max(-1.0, min(1.0, market_sentiment + random.uniform(-0.1, 0.1)))
+    market_sentiment = max(-1.0, min(1.0, market_sentiment + sentiment_change * 0.2 - 0.1))
 
 class PriceFluctuationManager:
+    """Random-walk price engine that moves every due symbol in one NumPy pass.
+
+    Per-symbol trends are kept in arrays indexed by the market store's
+    symbol IDs; an UpdateScheduler decides which symbols are due each tick.
+    """
+    SHOCK_PROBABILITY = 0.03  # Rare market shocks
+    SHOCK_MULTIPLIERS = np.array([-2.0, -1.5, 1.5, 2.0])
+    TREND_ADJUST_PROBABILITY = 0.10  # Chance to shift a stock's trend each update
+    MAX_TREND = 0.002
+    MAX_CHANGE = 0.1  # 10% max change per update
+    SIGNIFICANT_CHANGE = 0.03
+    NOISE = 0.002  # Standard deviation of the correlated noise component
+
     def __init__(self):
-        self.last_update = {}
-        self.stock_settings = {}
+        self.store = market_state.store
+        self.size = 0
+        self.symbols = np.empty(0, dtype=object)
+        self.scheduler = UpdateScheduler()
+        self.tick_count = 0  # Batches of price updates applied
+        self.trends = np.zeros(0)
+        self.factor_model = FactorModel(market_state.STOCK_DETAILS, volatility=self.NOISE)
         self.initialize_settings()
     
+    @property
+    def rng(self):
+        return random_streams.stream('prices')
+    
     def initialize_settings(self):
         """Initialize settings for each stock"""
+        self._sync_symbols(clock.now())
+
+    def _sync_symbols(self, now):
+        """Schedule stocks listed since the last update (e.g. IPOs)"""
+        count = len(self.store.registry)
+        if count == self.size:
+            return
         default = PRICE_FLUCTUATION['DEFAULT']
-        for stock in market_state.stock_prices.keys():
-            self.last_update[stock] = time.time()
+        symbols = self.store.registry.symbols[self.size:count]
+        for symbol_id, stock in enumerate(symbols, self.size):
             # Use stock-specific settings if available, otherwise use default
-            self.stock_settings[stock] = PRICE_FLUCTUATION.get(stock, default)
+            interval = PRICE_FLUCTUATION.get(stock, default).get('UPDATE_INTERVAL', default['UPDATE_INTERVAL'])
+            self.scheduler.add(symbol_id, interval, now)
+        added = count - self.size
+        self.symbols = np.concatenate([self.symbols, np.array(symbols, dtype=object)])
+        self.factor_model.add_symbols(symbols)
+        self.trends = np.concatenate([self.trends, self.rng.uniform(-0.001, 0.001, added)])
+        self.size = count
     
     @safe_operation
-    def update_prices(self):
-        """Update prices for all stocks based on their fluctuation settings"""
-        current_time = time.time()
-        
-        for stock in market_state.stock_prices.keys():
-            settings = self.stock_settings[stock]
-            update_interval = settings.get('UPDATE_INTERVAL', 
-                                        PRICE_FLUCTUATION['DEFAULT']['UPDATE_INTERVAL'])
-            
-            # Check if it's time to update this stock
-            if current_time - self.last_update[stock] >= update_interval:
-                self._fluctuate_stock_price(stock)
-                self.last_update[stock] = current_time
-    
-    def _fluctuate_stock_price(self, stock):
-        """Enhanced random price fluctuation with more realistic behavior"""
-        settings = self.stock_settings[stock]
+    def update_prices(self, current_time=None):
+        """Update the prices of the stocks whose update interval has elapsed"""
+        current_time = clock.now() if current_time is None else current_time
+        self._sync_symbols(current_time)
         
-        # More realistic, smaller base changes
-        base_change = random.uniform(-0.004, 0.004)  # Reduced from (-0.015, 0.015)
-        
-        # Add rare market shock events (3% chance instead of 5%)
-        if random.random() < 0.03:
-            shock_multiplier = random.choice([-2.0, -1.5, 1.5, 2.0])
-            base_change *= shock_multiplier
-        
-        # Add gradual trend component for smoother changes
-        if not hasattr(self, 'stock_trends'):
-            self.stock_trends = {}
-        if stock not in self.stock_trends:
-            self.stock_trends[stock] = random.uniform(-0.001, 0.001)
-        
-        # Gradually shift the trend direction
-        if random.random() < 0.10:  # 10% chance to adjust trend
-            self.stock_trends[stock] += random.uniform(-0.0005, 0.0005)
-            # Keep trend within bounds
-            self.stock_trends[stock] = max(-0.002, min(0.002, self.stock_trends[stock]))
-        
-        # Apply the trend
-        base_change += self.stock_trends[stock]
-        
-        # Add smaller noise component
-        noise = random.gauss(0, 0.002)  # Reduced from 0.005
-        total_change = base_change + noise
-        
-        # Apply change to current price
-        current_price = market_state.stock_prices[stock]
-        new_price = current_price * (1 + total_change)
+        due = self.scheduler.pop_due(current_time)
+        if due.size:
+            # Skip stocks that have been delisted since they were scheduled
+            due = due[self.store.mask('price')[due]]
+        if due.size:
+            self._fluctuate_prices(due)
+            self.tick_count += 1
+        return due.size
+
+    def next_due(self):
+        """Time of the next scheduled price update, or None"""
+        return self.scheduler.next_due()
+    
+    def _fluctuate_prices(self, ids):
+        """Apply base change, shocks, trend drift and noise to the given symbol IDs"""
+        rng = self.rng
+        count = ids.size
         
-        # Ensure price doesn't change too dramatically
-        max_change = 0.1  # Reduced from 0.2 (10% max change per update)
-        if abs(total_change) > max_change:
-            total_change = math.copysign(max_change, total_change)
-            new_price = current_price * (1 + total_change)
+        # Small base changes, occasionally amplified by a market shock
+        change = rng.uniform(-0.004, 0.004, count)
+        shocked = rng.random(count) < self.SHOCK_PROBABILITY
+        change[shocked] *= rng.choice(self.SHOCK_MULTIPLIERS, np.count_nonzero(shocked))
         
-        # Apply the new price
-        market_state.stock_prices[stock] = max(0.01, new_price)
+        # Gradually shift the trend direction, keeping it within bounds
+        adjusted = ids[rng.random(count) < self.TREND_ADJUST_PROBABILITY]
+        self.trends[adjusted] = np.clip(
+            self.trends[adjusted] + rng.uniform(-0.0005, 0.0005, adjusted.size),
+            -self.MAX_TREND, self.MAX_TREND
+        )
+        change += self.trends[ids]
         
-        # Safely update price history
-        if not hasattr(market_state, 'price_history'):
-            market_state.price_history = {}
-        if stock not in market_state.price_history:
-            market_state.price_history[stock] = []
+        # Noise component, then cap the total move
+        change += self.factor_model.sample(rng, ids)
+        np.clip(change, -self.MAX_CHANGE, self.MAX_CHANGE, out=change)
         
-        market_state.price_history[stock].append(new_price)
-        if len(market_state.price_history[stock]) > 100:
-            market_state.price_history[stock] = market_state.price_history[stock][-100:]
+        symbols = self.symbols[ids]
+        with market_state.state_locks.hold(symbols=symbols.tolist()):
+            prices = self.store.columns['price']
+            new_prices = np.maximum(0.01, prices[ids] * (1 + change))
+            prices[ids] = new_prices
+            self.store.touch()
+            self.store.append_history(ids, new_prices)
+            market_state.record_event('prices', stocks=symbols.tolist(), prices=new_prices.tolist())
         
-        # Log significant changes with higher threshold
-        if abs(total_change) > 0.03:  # Changed from 0.02
-            logger.info(f"Significant price change for {stock}: {total_change*100:.2f}%")
+        # Log significant changes only
+        for i in np.flatnonzero(np.abs(change) > self.SIGNIFICANT_CHANGE):
+            logger.info(f"Significant price change for {symbols[i]}: {change[i]*100:.2f}%")
 
 class MarketSession:
     def __init__(self):
@@ -376,10 +426,12 @@ class MarketSession:
         self.initialized = False  # Add flag to track if market is initialized
         self.session_duration = 600  # 10 minutes in seconds
         self.time_remaining = self.session_duration
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_session_time)
-        self.timer.setInterval(1000)  # Update every second
-        self.news_impacts = {}  # Add this to track active news impacts
+        self.timer = None  # Countdown timer, ticks every second while the session runs
+        self.update_timer = None
+        self.news_impacts = NewsImpactEngine(market_state.store)  # Active news impacts
+        self.pending_impacts = deque()  # Impacts waiting for the session to be active; appended from any thread
+        self.last_checkpoint = None
+        self.checkpoint_path = CHECKPOINT_PATH  # None disables checkpoints (e.g. for backtests)
 
     def initialize_session(self):
         """Initialize session without resetting market state"""
@@ -398,15 +450,17 @@ class MarketSession:
         try:
             # First fully initialize the session
             self.current_session += 1
-            self.start_time = time.time()
+            self.start_time = clock.now()
             self.last_update = self.start_time
             self.last_price_update = self.start_time
+            self.last_checkpoint = self.start_time
             self.tick_count = 0
             self.pause_lock = False
+            random_streams.begin_session(self.current_session)
             
             # Reset and start timer
             self.time_remaining = self.session_duration
-            self.timer.start()
+            self._start_countdown()
             
             # Initialize price manager if needed
             if not self.price_manager:
@@ -416,14 +470,15 @@ class MarketSession:
             self.session_active = True
             self.is_active = True
             
+            market_state.record_event('session_start', session=self.current_session,
+                                      seed=random_streams.seed)
+            
             # Log session start BEFORE processing impacts
             logger.info(f"Trading Session {self.current_session} started - Duration: 10 minutes")
             
             # ONLY NOW, after session is fully active, process impacts
             # Wait a short time to ensure session has truly started
-            timer = QTimer(singleShot=True)
-            timer.timeout.connect(self._process_pending_impacts)
-            timer.start(1000)  # Process impacts 1 second after session start
+            clock.call_later(1.0, self._process_pending_impacts)  # Process impacts 1 second after session start
             
             return True
             
@@ -433,6 +488,15 @@ class MarketSession:
             self.is_active = False
             return False
 
+    def _start_countdown(self):
+        self._stop_countdown()
+        self.timer = clock.call_repeating(1.0, self.update_session_time)
+
+    def _stop_countdown(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
     def update_session_time(self):
         """Update session countdown timer"""
         if not self.session_active or self.pause_lock:
@@ -452,42 +516,24 @@ class MarketSession:
             self.end_session()
 
     def end_session(self):
-        """Enhanced session end that GUARANTEES all news impacts reach exactly their target"""
+        """Enhanced session end that completes every unfinished news impact"""
         if not self.session_active:
             logger.warning("No active session to end")
             return False
             
         try:
-            # First, process any unfinished news impacts to ensure targets are hit EXACTLY
-            for stock, impact in list(self.news_impacts.items()):
-                # Get the original target values stored when impact was registered
-                start_price = impact['start_price']
-                target_percent = impact['target_percent']
-                target_price = impact['target_price']  # This is the exact price we want
-                
-                # Get the current price before forcing change
-                current_price = market_state.stock_prices[stock]
-                actual_percent = ((current_price - start_price) / start_price) * 100
-                
-                # FORCE the stock price to exactly match the target price
-                market_state.stock_prices[stock] = target_price
-                
-                # Calculate the new actual percentage after forcing the exact price
-                final_percent = ((target_price - start_price) / start_price) * 100
-                
-                # This is critical for debugging - log details about what happened
-                logger.info(f"SESSION END - FORCING TARGET PRICE: {stock}")
-                logger.info(f"  Start price: ${start_price:.2f}")
-                logger.info(f"  Before force: ${current_price:.2f} ({actual_percent:.2f}%)")
-                logger.info(f"  Target: ${target_price:.2f} ({target_percent:.2f}%)")
-                logger.info(f"  After force: ${market_state.stock_prices[stock]:.2f} ({final_percent:.2f}%)")
-                logger.info(f"  VERIFICATION: Target reached exactly: {market_state.stock_prices[stock] == target_price}")
-            
-            # Clear all impacts
-            self.news_impacts.clear()
+            # Apply the rest of each unfinished impact's move so its full effect lands this session
+            with self._news_locks():
+                if self.news_impacts:
+                    ids, prices = self.news_impacts.finish()
+                    symbols = market_state.store.symbols_for(ids)
+                    market_state.record_event('prices', stocks=symbols, prices=prices.tolist())
+                    for symbol, price in zip(symbols, prices.tolist()):
+                        logger.info(f"Session end - news impact completed for {symbol} at ${price:.2f}")
+                self.news_impacts.clear()
             
             # Stop the timer
-            self.timer.stop()
+            self._stop_countdown()
             self.time_remaining = self.session_duration
             
             # End session
@@ -508,6 +554,11 @@ class MarketSession:
                     
             # Save final market state
             market_state.save_market_state()
+            market_state.record_event('session_end', session=self.current_session)
+            self.save_checkpoint()
+            
+            # Wait for the background writer to commit everything from this session
+            db.flush()
             
             logger.info(f"Trading Session {self.current_session} ended successfully")
             return True
@@ -533,24 +584,71 @@ class MarketSession:
     def update(self):
         """Improved update logic with better session state checks"""
         # Don't update if session isn't properly started
-        if not self.start_time or not self.session_active or not self.is_active or self.pause_lock:
+        if self.start_time is None or not self.session_active or not self.is_active or self.pause_lock:
             return
             
-        current_time = time.time()
+        current_time = clock.now()
         
         # Only update if we're in an active session
         if self.session_active and not self.pause_lock:
-            self.tick_count += 1
-            
-            # Update prices at regular intervals
+            # Update market conditions at regular intervals
             if current_time - self.last_price_update >= self.price_update_interval:
+                self.tick_count += 1
                 self.update_market_conditions()
-                self.price_manager.update_prices()
                 self.last_price_update = current_time
                 
                 # Log market state periodically
                 if self.tick_count % 60 == 0:
                     self.log_market_status()
+            
+            # Each stock moves on its own cadence; the scheduler only returns those that are due
+            self.price_manager.update_prices(current_time)
+            
+            # Periodic checkpoint bounds how much journal a restart has to replay
+            if current_time - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+                self.save_checkpoint()
+                self.last_checkpoint = current_time
+    
+    def next_update_delay(self, max_delay=1.0):
+        """Seconds until update() next has work to do, capped at ``max_delay``"""
+        if not self.session_active or self.pause_lock or not self.price_manager:
+            return max_delay
+        due = [self.last_price_update + self.price_update_interval]
+        next_price = self.price_manager.next_due()
+        if next_price is not None:
+            due.append(next_price)
+        return max(0.0, min(min(due) - clock.now(), max_delay))
+    
+    def start_update_loop(self, max_delay=1.0, min_delay=0.01):
+        """Drive update() from the active clock, waking whenever the next stock is due"""
+        self.stop_update_loop()
+        
+        def run_update():
+            try:
+                self.update()
+            finally:
+                if self.update_timer is not None:
+                    delay = max(min_delay, self.next_update_delay(max_delay))
+                    self.update_timer = clock.call_later(delay, run_update)
+        
+        self.update_timer = clock.call_later(max_delay, run_update)
+    
+    def stop_update_loop(self):
+        if self.update_timer:
+            self.update_timer.cancel()
+            self.update_timer = None
+    
+    def save_checkpoint(self):
+        """Write a binary checkpoint of market and portfolio state"""
+        if not self.checkpoint_path:
+            return False
+        try:
+            seq = write_checkpoint(self.checkpoint_path, session=self.current_session)
+            logger.info(f"Checkpoint written at journal seq {seq}")
+            return True
+        except Exception as e:
+            logger.error(f"Error writing checkpoint: {str(e)}")
+            return False
     
     def pause(self):
         """Enhanced pause with timer pause"""
@@ -558,7 +656,7 @@ class MarketSession:
             return False
             
         self.pause_lock = True
-        self.timer.stop()  # Pause the countdown
+        self._stop_countdown()  # Pause the countdown
         logger.info("Session paused")
         return True
     
@@ -568,7 +666,7 @@ class MarketSession:
             return False
             
         self.pause_lock = False
-        self.timer.start()  # Resume the countdown
+        self._start_countdown()  # Resume the countdown
         logger.info("Session resumed")
         return True
     
@@ -577,39 +675,24 @@ class MarketSession:
         if not self.session_active or self.pause_lock:
             return
 
-        # Process news impacts first and exclusively
+        # Impacts added mid-session start on the next tick
+        if self.pending_impacts:
+            self._process_pending_impacts()
+
         if self.news_impacts:
             self._process_news_impacts()
-            return  # Skip other market movements when we have active impacts
 
     def _process_news_impacts(self):
-        """Process news impacts with steady progress toward target over 10 minutes"""
-        for stock, impact in list(self.news_impacts.items()):
-            current_price = market_state.stock_prices[stock]
-            target_price = impact['target_price']
-            start_price = impact['start_price']
-
-            # Calculate total distance to move and progress per update
-            total_price_change = target_price - start_price
-            total_steps = 600  # 10 minutes = 600 seconds
-            price_change_per_step = total_price_change / total_steps
-            
-            # Move price by one step
-            new_price = current_price + price_change_per_step
-            
-            # Verify we're moving in the right direction
-            if total_price_change > 0:  # Price should go up
-                new_price = min(new_price, target_price)  # Don't overshoot upward
-            else:  # Price should go down
-                new_price = max(new_price, target_price)  # Don't overshoot downward
-            
-            # Update price
-            market_state.stock_prices[stock] = new_price
-            
-            # Calculate and log progress percentage
-            progress = ((new_price - start_price) / (target_price - start_price)) * 100
-            logger.info(f"Stock: {stock} | Progress: {progress:.1f}% | " +
-                       f"Current: ${new_price:.2f} | Target: ${target_price:.2f}")
+        """Advance every active news impact by one tick along its glide path"""
+        with self._news_locks():
+            ids, prices = self.news_impacts.step(self.price_update_interval)
+            if ids.size:
+                market_state.record_event('prices', stocks=market_state.store.symbols_for(ids),
+                                          prices=prices.tolist())
+
+    def _news_locks(self):
+        # Impacts can move any listed symbol, and add() and step() share the engine's arrays
+        return market_state.state_locks.hold(symbols=market_state.stock_prices)
 
     def log_market_status(self):
         """Log current market status."""
@@ -689,16 +772,16 @@ class MarketSession:
         portfolio['total_value'] = total_value
         portfolio['holdings_value'] = total_value - portfolio['cash']
 
-    def add_news_impact(self, stocks, target_percent, duration=None):
-        """Queue news impacts ONLY, never apply them directly"""
+    def add_news_impact(self, stocks, target_percent, duration=None, easing=None):
+        """Queue news impacts ONLY, never apply them directly
+
+        ``duration`` (seconds) and ``easing`` default to NEWS_IMPACT_DURATION
+        and NEWS_IMPACT_EASING.
+        """
         logger.info(f"News impact for {stocks} recorded: {target_percent}% target")
         
-        # Always queue impacts, never apply them immediately
-        if not hasattr(self, 'pending_impacts'):
-            self.pending_impacts = []
-        
         # Store the impact for later application when session starts/is active
-        self.pending_impacts.append((stocks, target_percent, duration))
+        self.pending_impacts.append((stocks, target_percent, duration, easing))
         
         # Show message indicating it's queued
         if not self.session_active:
@@ -708,26 +791,20 @@ class MarketSession:
             
         # IMPORTANT: Do NOT call _apply_queued_impact here!
 
-    def _apply_queued_impact(self, stocks, target_percent, duration=None):
-        """Set up the impact with 10-minute duration"""
+    def _apply_queued_impact(self, stocks, target_percent, duration=None, easing=None):
+        """Start the impact's glide path from the current prices"""
         if not self.session_active:
             return
         
-        for stock in stocks:
-            current_price = market_state.stock_prices[stock]
-            # Calculate exact target price from percentage
-            target_price = current_price * (1 + (target_percent / 100.0))
-            
-            self.news_impacts[stock] = {
-                'target_percent': target_percent,
-                'start_price': current_price,
-                'target_price': target_price
-            }
-            
-            logger.info(f"Impact registered for {stock}:")
-            logger.info(f"  Start: ${current_price:.2f}")
-            logger.info(f"  Target: ${target_price:.2f} ({target_percent:+.1f}%)")
-            logger.info(f"  Duration: 10 minutes")
+        duration = NEWS_IMPACT_DURATION if duration is None else duration
+        easing = easing or NEWS_IMPACT_EASING
+        with self._news_locks():
+            registered = self.news_impacts.add(stocks, target_percent, duration, easing)
+        for stock in set(stocks) - set(registered):
+            logger.warning(f"Ignoring news impact for unlisted stock {stock}")
+        if registered:
+            logger.info(f"Impact registered for {', '.join(registered)}: {target_percent:+.1f}% "
+                        f"over {duration}s ({easing})")
 
     def _process_pending_impacts(self):
         """Process pending impacts after session has fully started"""
@@ -735,19 +812,17 @@ class MarketSession:
             logger.warning("Cannot process impacts - session not active")
             return
             
-        if hasattr(self, 'pending_impacts') and self.pending_impacts:
+        if self.pending_impacts:
             pending_count = len(self.pending_impacts)
             logger.info(f"Processing {pending_count} queued news impacts now that session is active")
             
-            # Make a copy of the queue to process
-            impacts_to_process = self.pending_impacts.copy()
-            # Clear the queue before processing
-            self.pending_impacts = []
-            
-            # Process each impact
-            for impact in impacts_to_process:
-                stocks, target_percent, duration = impact
-                self._apply_queued_impact(stocks, target_percent, duration)
+            # Pop one at a time: impacts queued meanwhile from another thread are kept
+            for _ in range(pending_count):
+                impact = self.pending_impacts.popleft()
+                try:
+                    self._apply_queued_impact(*impact)
+                except ValueError as e:
+                    logger.error(f"Invalid news impact for {impact[0]}: {str(e)}")
 
 def admin_place_order(team_id, stock, quantity, order_type, admin_key=None):
     """Process admin-placed orders for teams with admin validation"""
@@ -764,7 +839,7 @@ def admin_place_order(team_id, stock, quantity, order_type, admin_key=None):
         'stock': stock,
         'quantity': quantity,
         'type': order_type,
-        'timestamp': time.time(),
+        'timestamp': clock.now(),
         'admin_placed': True,
         'team_id': team_id
     }
@@ -807,7 +882,7 @@ def start_session(session_number=None):
     # Start new session
     session_active = True
     pause_lock = False
-    session_start_time = time.time()
+    session_start_time = clock.now()
     logger.info(f"Trading Session {current_session} started")
     
     return True
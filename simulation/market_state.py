@@ -1,17 +1,37 @@
-import time
+import threading
+import numpy as np
 from utils.logger import logger
 from utils.decorators import safe_operation
 from config import INITIAL_PRICE, AVAILABLE_QUANTITY, TEAM_COUNT, STARTING_BUDGET
 from data.db import db
+from . import clock
+from .state_store import MarketStateStore
+from .trade_feed import TradeFeed
+from .transactions import TransactionLog
+from .leaderboard import Leaderboard
+from .snapshots import SnapshotCache
+from .locks import StateLocks
+from .valuation import HoldingsIndex
+
+# Per-symbol market data lives in contiguous arrays indexed by symbol ID;
+# the module-level names are dict-compatible views over those arrays.
+store = MarketStateStore()
+stock_prices = store.view('price')
+available_quantities = store.view('quantity')
+last_prices = store.view('last_price')
+trading_volume = store.view('volume')
+# Reverse index symbol -> holding teams, for incremental portfolio valuation
+holdings_index = HoldingsIndex(store)
+leaderboard = Leaderboard()  # Teams ranked by total value; see refresh_leaderboard()
+trade_feed = TradeFeed()  # Every team's trades and transfers, read by sequence number
+snapshots = SnapshotCache(store)  # Shared read-only market views; see market_snapshot()
+state_locks = StateLocks()  # Per-symbol and per-team writer locks
+_leaderboard_lock = threading.Lock()
 
 # Initialize empty containers without data
-stock_prices = {}
-available_quantities = {}
 order_logs = []
 team_portfolios = {}
-last_prices = {}
-trading_volume = {}
-price_history = {}
+order_batch_listeners = []  # Called with the per-order results after each process_orders_batch
 
 # Add stock details dictionary
 STOCK_DETAILS = {
@@ -59,39 +79,60 @@ STOCK_DETAILS = {
     }
 }
 
+def lock_all(symbols=(), teams=()):
+    """Hold the lock of every listed symbol and team, plus ``symbols`` and ``teams``.
+
+    For operations that replace the whole market, such as a reset or a
+    warm restart.
+    """
+    return state_locks.hold(symbols=set(store.registry.symbols).union(symbols),
+                            teams=set(team_portfolios).union(teams))
+
+def record_event(event_type, **payload):
+    """Append a state mutation to the event journal for replay and recovery."""
+    return db.record_event(event_type, payload)
+
 def initialize_market():
     """Set up initial market data with enhanced stock information."""
-    global stock_prices, available_quantities, trading_volume, last_prices, team_portfolios, price_history
-    
-    # Clear any existing data
-    stock_prices.clear()
-    available_quantities.clear()
-    trading_volume.clear()
-    last_prices.clear()
-    team_portfolios.clear()
-    price_history.clear()
-    
-    # Initialize stocks from STOCK_DETAILS
-    for symbol, data in STOCK_DETAILS.items():
-        stock_prices[symbol] = data['price']
-        available_quantities[symbol] = data['quantity']
-        last_prices[symbol] = data['price']
-        trading_volume[symbol] = 0
-        price_history[symbol] = []
-    
-    # Initialize team portfolios
-    for i in range(TEAM_COUNT):
-        team_portfolios[i] = {
-            'cash': STARTING_BUDGET,
-            'holdings': {},
-            'transactions': [],
-            'holdings_value': 0,
-            'total_value': STARTING_BUDGET
-        }
-    
-    logger.info(f"Market initialized with {len(STOCK_DETAILS)} stocks")
-    for symbol, data in STOCK_DETAILS.items():
-        logger.info(f"{symbol} ({data['name']}) - ${data['price']} x {data['quantity']} shares")
+    with lock_all(symbols=STOCK_DETAILS, teams=range(TEAM_COUNT)):
+        # Clear any existing data
+        stock_prices.clear()
+        available_quantities.clear()
+        trading_volume.clear()
+        last_prices.clear()
+        team_portfolios.clear()
+        store.clear_history()
+        
+        # Initialize stocks from STOCK_DETAILS
+        for symbol, data in STOCK_DETAILS.items():
+            stock_prices[symbol] = data['price']
+            available_quantities[symbol] = data['quantity']
+            last_prices[symbol] = data['price']
+            trading_volume[symbol] = 0
+        
+        # Initialize team portfolios
+        for i in range(TEAM_COUNT):
+            team_portfolios[i] = {
+                'cash': STARTING_BUDGET,
+                'holdings': {},
+                'transactions': TransactionLog(i),
+                'holdings_value': 0,
+                'total_value': STARTING_BUDGET
+            }
+        holdings_index.rebuild(team_portfolios)
+        leaderboard.clear()
+        db.clear_transactions()
+        
+        record_event(
+            'reset',
+            stocks={symbol: [data['price'], data['quantity']] for symbol, data in STOCK_DETAILS.items()},
+            team_count=TEAM_COUNT,
+            starting_budget=STARTING_BUDGET
+        )
+        
+        logger.info(f"Market initialized with {len(STOCK_DETAILS)} stocks")
+        for symbol, data in STOCK_DETAILS.items():
+            logger.info(f"{symbol} ({data['name']}) - ${data['price']} x {data['quantity']} shares")
 
 def get_stock_info(symbol):
     """Get detailed information about a stock"""
@@ -111,86 +152,91 @@ def get_stock_prices():
     """Return current stock price data."""
     return stock_prices
 
+def get_price_history(symbol):
+    """Return the recent simulated prices for a stock, oldest first."""
+    return store.history_for(symbol)
+
+def record_price_history(stock, price):
+    """Push a new price onto the stock's history ring buffer."""
+    store.append_history(store.add_symbol(stock), price)
+
+def _price_changes(ids):
+    """Fractional change since the last price for the given symbol IDs."""
+    prices = store.column('price')[ids]
+    # Symbols without a last price count as unchanged
+    last = np.where(store.mask('last_price')[ids], store.column('last_price')[ids], prices)
+    return (prices - last) / last
+
+def market_snapshot():
+    """Immutable, versioned view of the market, rebuilt only after the market changes."""
+    return snapshots.current()
+
 def get_market_state():
-    """Get complete market state."""
+    """Get complete market state (read-only mappings shared with other readers)."""
+    snapshot = snapshots.current()
     return {
-        'prices': stock_prices.copy(),
-        'quantities': available_quantities.copy(),
-        'volumes': trading_volume.copy(),
-        'price_changes': {
-            symbol: ((stock_prices[symbol] - last_prices[symbol]) / last_prices[symbol] * 100)
-            for symbol in stock_prices
-        }
+        'prices': snapshot.prices,
+        'quantities': snapshot.quantities,
+        'volumes': snapshot.volumes,
+        'price_changes': snapshot.price_changes
     }
 
 def get_market_health():
     """Calculate market health indicators"""
-    global stock_prices, last_prices, trading_volume
-    
-    total_volume = sum(trading_volume.values())
-    average_change = sum(
-        ((stock_prices[s] - last_prices[s]) / last_prices[s])
-        for s in stock_prices
-    ) / len(stock_prices)
-    
-    volatility = sum(
-        abs((stock_prices[s] - last_prices[s]) / last_prices[s])
-        for s in stock_prices
-    ) / len(stock_prices)
+    ids = store.listed_ids('price')
+    changes = _price_changes(ids)
+    volumes = store.column('volume')[store.mask('volume')]
     
     return {
-        'total_volume': total_volume,
-        'average_change': average_change * 100,  # as percentage
-        'volatility': volatility * 100,  # as percentage
-        'active_stocks': len(stock_prices)
+        'total_volume': int(volumes.sum()),
+        'average_change': float(changes.mean()) * 100,  # as percentage
+        'volatility': float(np.abs(changes).mean()) * 100,  # as percentage
+        'active_stocks': len(ids)
     }
 
 def update_stock_price(stock, new_price, is_percent_change=False):
     """Update stock price and record the change"""
-    global stock_prices, last_prices
-    
-    try:
-        if stock not in stock_prices:
-            logger.error(f"Invalid stock symbol: {stock}")
-            return False
+    with state_locks.hold(symbols=(stock,)):
+        try:
+            if stock not in stock_prices:
+                logger.error(f"Invalid stock symbol: {stock}")
+                return False
+                
+            current_price = stock_prices[stock]
             
-        current_price = stock_prices[stock]
-        
-        # Handle percentage change calculation
-        if is_percent_change:
-            new_price = current_price * (1 + new_price)
+            # Handle percentage change calculation
+            if is_percent_change:
+                new_price = current_price * (1 + new_price)
+                
+            if new_price <= 0:
+                logger.error(f"Invalid price value: {new_price}")
+                return False
+            
+            # Store the last price before updating
+            last_prices[stock] = current_price
+            
+            # Update the price
+            stock_prices[stock] = new_price
+            record_price_history(stock, new_price)
+            record_event('price', stock=stock, price=new_price, last_price=current_price)
+            
+            # Calculate and log the price change
+            price_change = ((new_price - current_price) / current_price) * 100
+            logger.info(f"Price change: {stock} changed by {price_change:+.2f}% to ${new_price:.2f}")
+            
+            # Save the updated state
+            save_market_state()
+            
+            return True
             
-        if new_price <= 0:
-            logger.error(f"Invalid price value: {new_price}")
+        except Exception as e:
+            logger.error(f"Error updating stock price: {str(e)}")
             return False
-        
-        # Store the last price before updating
-        last_prices[stock] = current_price
-        
-        # Update the price
-        stock_prices[stock] = new_price
-        
-        # Calculate and log the price change
-        price_change = ((new_price - current_price) / current_price) * 100
-        logger.info(f"Price change: {stock} changed by {price_change:+.2f}% to ${new_price:.2f}")
-        
-        # Save the updated state
-        save_market_state()
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error updating stock price: {str(e)}")
-        return False
 
 def save_market_state():
     """Save current market state to database"""
     try:
         db.save_market_state(stock_prices, available_quantities)
-        # Add price history to saved state
-        for symbol in stock_prices.keys():  # Changed from using undefined 'stock'
-            if len(price_history.get(symbol, [])) > 100:
-                price_history[symbol] = price_history[symbol][-100:]
         return True
     except Exception as e:
         logger.error(f"Error saving market state: {str(e)}")
@@ -206,15 +252,30 @@ def process_market_order(team_id, order):
             logger.error(f"Invalid order format: {order}")
             return False
         
-        stock = order['stock']
-        quantity = order['quantity']
-        order_type = order['type']
+        error = _execute_market_order(team_id, order)
+        if error:
+            logger.error(error)
+            return False
+        
+        # Log success
+        logger.info(f"Order executed: {order['type']} {order['quantity']} {order['stock']} @ ${order['price']:.2f}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Order processing error: {str(e)}")
+        return False
+
+def _execute_market_order(team_id, order, persist=True):
+    """Price and settle a validated order; returns an error message, or None once executed."""
+    stock = order['stock']
+    quantity = order['quantity']
+    order_type = order['type']
+    with state_locks.hold(symbols=(stock,), teams=(team_id,)):
         current_price = stock_prices[stock]
         
         # Enhanced validation
         if quantity > available_quantities[stock] and order_type == 'buy':
-            logger.error(f"Insufficient {stock} available: {available_quantities[stock]}")
-            return False
+            return f"Insufficient {stock} available: {available_quantities[stock]}"
             
         # Calculate execution details
         slippage = calculate_slippage(stock, quantity, order_type)
@@ -223,8 +284,7 @@ def process_market_order(team_id, order):
         
         # Validate final price
         if not is_price_acceptable(current_price, execution_price):
-            logger.error(f"Price movement too large: {((execution_price/current_price)-1)*100:.1f}%")
-            return False
+            return f"Price movement too large: {((execution_price/current_price)-1)*100:.1f}%"
         
         # Update the order
         order['price'] = execution_price
@@ -232,21 +292,168 @@ def process_market_order(team_id, order):
         order['impact'] = price_impact
         
         # Execute the order
-        if update_portfolio(team_id, order):
-            # Update market state
-            stock_prices[stock] = execution_price
-            trading_volume[stock] = trading_volume.get(stock, 0) + quantity
-            last_prices[stock] = current_price
-            
-            # Log success
-            logger.info(f"Order executed: {order_type} {quantity} {stock} @ ${execution_price:.2f}")
-            return True
-            
-        return False
+        if not update_portfolio(team_id, order, persist=persist):
+            return f"Team {team_id}: {order_type} {quantity} {stock} could not be settled"
         
-    except Exception as e:
-        logger.error(f"Order processing error: {str(e)}")
-        return False
+        # Update market state
+        stock_prices[stock] = execution_price
+        record_price_history(stock, execution_price)
+        trading_volume[stock] = trading_volume.get(stock, 0) + quantity
+        last_prices[stock] = current_price
+        record_event('price', stock=stock, price=execution_price,
+                     last_price=current_price, volume=trading_volume[stock])
+        return None
+
+def process_orders_batch(orders, all_or_nothing=False):
+    """Validate and execute a block of market orders in list order.
+
+    Each order is a dict with 'team_id', 'stock', 'quantity' and 'type'.
+    Every order is validated before any executes: the batch is first
+    replayed against running copies of each team's cash and holdings and
+    each stock's price, volume and inventory, so an order is checked as it
+    would stand after the orders before it. With ``all_or_nothing`` one
+    order that would be invalid or fail rejects the whole batch, and
+    nothing is applied. The locks of every stock and team in the batch are
+    held from validation to the end of execution. Order rows and one
+    portfolio snapshot per affected team are written in a single
+    transaction (see WriteBehindQueue.batch), and ``order_batch_listeners``
+    are notified once at the end.
+
+    Returns one result dict per order, in order, with 'status' set to
+    'executed' (with 'price'), 'invalid', 'failed' or 'skipped' (with 'error').
+    """
+    results = []
+    for index, order in enumerate(orders):
+        result = {
+            'index': index,
+            'team_id': order.get('team_id'),
+            'stock': order.get('stock'),
+            'type': order.get('type'),
+            'quantity': order.get('quantity'),
+            'status': 'pending',
+            'price': None,
+            'error': None,
+        }
+        if order.get('team_id') not in team_portfolios:
+            result.update(status='invalid', error=f"Invalid team ID: {order.get('team_id')}")
+        elif not validate_order(order):
+            result.update(status='invalid', error=f"Invalid order format: {order}")
+        results.append(result)
+    
+    pending = [order for result, order in zip(results, orders) if result['status'] == 'pending']
+    with state_locks.hold(symbols={order['stock'] for order in pending},
+                          teams={order['team_id'] for order in pending}):
+        _check_batch(orders, results)
+        invalid = sum(result['status'] == 'invalid' for result in results)
+        failed = sum(result['status'] == 'failed' for result in results)
+        if (invalid or failed) and all_or_nothing:
+            for result in results:
+                if result['status'] == 'pending':
+                    result.update(status='skipped', error="Batch rejected: it contains orders that cannot execute")
+            logger.error(f"Order batch rejected: {invalid} of {len(orders)} orders are invalid, "
+                         f"{failed} would fail")
+            _notify_order_batch(results)
+            return results
+        
+        executed = []
+        for result, order in zip(results, orders):
+            if result['status'] != 'pending':
+                continue
+            team_id = order['team_id']
+            trade = {key: value for key, value in order.items() if key != 'team_id'}
+            trade.setdefault('timestamp', clock.now())
+            try:
+                error = _execute_market_order(team_id, trade, persist=False)
+            except Exception as e:
+                error = f"Order processing error: {str(e)}"
+            if error:
+                # Validation replays execution exactly, so this is unexpected
+                logger.error(f"Order {result['index']} of a validated batch failed: {error}")
+                result.update(status='failed', error=error)
+            else:
+                result.update(status='executed', price=trade['price'])
+                executed.append((team_id, trade))
+        
+        # Persist the whole batch in one commit
+        with db.transaction():
+            for team_id, trade in executed:
+                db.log_order(team_id, trade, "executed")
+            for team_id in sorted({team_id for team_id, _ in executed}):
+                portfolio = team_portfolios[team_id]
+                db.save_portfolio_snapshot(team_id, portfolio['cash'], portfolio['holdings'],
+                                           calculate_portfolio_value(team_id))
+    
+    logger.info(f"Order batch: {len(executed)} executed, "
+                f"{sum(result['status'] == 'failed' for result in results)} failed, {invalid} invalid")
+    _notify_order_batch(results)
+    return results
+
+def _check_batch(orders, results):
+    """Mark pending orders that would fail, replaying the batch on running balances.
+
+    Mirrors the checks and state changes of _execute_market_order and
+    update_portfolio without touching live state. The caller holds the
+    locks of every stock and team involved. Returns {order index: expected
+    execution price} for the orders that pass.
+    """
+    expected = {}
+    stocks = {}  # stock -> [price, last price, volume, available]
+    cash = {}
+    held = {}  # (team, stock) -> quantity
+    for result, order in zip(results, orders):
+        if result['status'] != 'pending':
+            continue
+        team_id = order['team_id']
+        stock = order['stock']
+        quantity = order['quantity']
+        order_type = order['type']
+        if stock not in stocks:
+            price = stock_prices[stock]
+            stocks[stock] = [price, last_prices.get(stock, price), trading_volume.get(stock),
+                             available_quantities[stock]]
+        if team_id not in cash:
+            cash[team_id] = team_portfolios[team_id]['cash']
+        if (team_id, stock) not in held:
+            held[team_id, stock] = team_portfolios[team_id]['holdings'].get(stock, 0)
+        current_price, last_price, volume, available = stocks[stock]
+        
+        try:
+            error = None
+            if order_type == 'buy' and quantity > available:
+                error = f"Insufficient {stock} available: {available}"
+            else:
+                slippage = _slippage(quantity, order_type, current_price, last_price,
+                                     1 if volume is None else volume)
+                price_impact = _price_impact(quantity, order_type, available)
+                execution_price = current_price * (1 + price_impact) * (1 + slippage)
+                order_value = execution_price * quantity
+                if not is_price_acceptable(current_price, execution_price):
+                    error = f"Price movement too large: {((execution_price/current_price)-1)*100:.1f}%"
+                elif order_type == 'buy' and cash[team_id] < order_value:
+                    error = f"Team {team_id}: Insufficient funds for purchase"
+                elif order_type == 'sell' and held[team_id, stock] < quantity:
+                    error = f"Team {team_id}: Insufficient {stock} holdings"
+        except Exception as e:
+            error = f"Order processing error: {str(e)}"
+        if error:
+            result.update(status='failed', error=error)
+            continue
+        
+        sign = 1 if order_type == 'buy' else -1
+        cash[team_id] -= sign * order_value
+        held[team_id, stock] += sign * quantity
+        # update_portfolio and _execute_market_order each add the quantity to the volume
+        stocks[stock] = [execution_price, current_price, (volume or 0) + 2 * quantity,
+                         available - sign * quantity]
+        expected[result['index']] = execution_price
+    return expected
+
+def _notify_order_batch(results):
+    for listener in order_batch_listeners:
+        try:
+            listener(results)
+        except Exception as e:
+            logger.error(f"Order batch listener error: {str(e)}")
 
 def validate_order(order):
     """Validate order structure and parameters."""
@@ -289,14 +496,17 @@ def validate_team_order(team_id, order):
 
 def calculate_slippage(stock, quantity, order_type):
     """Calculate order slippage based on volume and liquidity."""
-    daily_volume = trading_volume.get(stock, 1)
+    price = stock_prices[stock]
+    return _slippage(quantity, order_type, price, last_prices.get(stock, price), trading_volume.get(stock, 1))
+
+def _slippage(quantity, order_type, price, last_price, daily_volume):
     order_ratio = quantity / daily_volume if daily_volume > 0 else 1
     
     # Base slippage increases with order size
     base_slippage = min(order_ratio * 0.01, 0.05)  # Max 5% slippage
     
     # Add market volatility factor
-    volatility = abs(stock_prices[stock] - last_prices.get(stock, stock_prices[stock])) / stock_prices[stock]
+    volatility = abs(price - last_price) / price
     volatility_impact = volatility * 0.5
     
     total_slippage = base_slippage + volatility_impact
@@ -313,7 +523,9 @@ def is_price_acceptable(current_price, execution_price):
 
 def calculate_price_impact(stock, quantity, order_type):
     """Calculate price impact based on order size relative to available quantity."""
-    available = available_quantities[stock]
+    return _price_impact(quantity, order_type, available_quantities[stock])
+
+def _price_impact(quantity, order_type, available):
     impact_factor = quantity / available
     
     # Limit impact and adjust direction based on order type
@@ -322,167 +534,245 @@ def calculate_price_impact(stock, quantity, order_type):
     
     return impact if order_type == 'buy' else -impact
 
-def update_portfolio(team_id, order):
-    """Process an order and update portfolio."""
-    global stock_prices, available_quantities, trading_volume
-    
+def update_portfolio(team_id, order, house=True, persist=True):
+    """Process an order and update portfolio.
+
+    ``house`` orders trade against the market's available quantity; pass
+    False for fills between teams, which leave the inventory and volume to
+    the caller. With ``persist`` False the order row and portfolio snapshot
+    are left for the caller to write (see process_orders_batch).
+    """
+    with state_locks.hold(symbols=(order['stock'],), teams=(team_id,)):
+        try:
+            transaction = apply_trade(team_id, order, house)
+            if transaction is None:
+                return False
+            record_trade(team_id, order, transaction, house, persist)
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error processing order for Team {team_id}: {str(e)}")
+            db.log_order(team_id, order, f"failed: {str(e)}")
+            return False
+
+def apply_trade(team_id, order, house=True):
+    """Move the cash and shares of one order in a team's portfolio, recording nothing.
+
+    Returns the transaction dict for record_trade(), or None if the team
+    cannot afford the order. Callers hold the stock's and team's locks
+    until the trade is recorded or undone.
+    """
     stock = order['stock']
     quantity = order['quantity']
     order_type = order['type']
     price = order['price']
-    timestamp = time.time()
     
     if team_id not in team_portfolios:
         logger.error(f"Invalid team ID: {team_id}")
-        return False
+        return None
     
     portfolio = team_portfolios[team_id]
     order_value = price * quantity
     
-    try:
-        if order_type == 'buy':
-            if portfolio['cash'] < order_value:
-                logger.error(f"Team {team_id}: Insufficient funds for purchase")
-                return False
-            if available_quantities[stock] < quantity:
-                logger.error(f"Insufficient {stock} quantity available in market")
-                return False
-            
-            # Execute buy
-            portfolio['cash'] -= order_value
-            portfolio['holdings'][stock] = portfolio['holdings'].get(stock, 0) + quantity
+    if order_type == 'buy':
+        if portfolio['cash'] < order_value:
+            logger.error(f"Team {team_id}: Insufficient funds for purchase")
+            return None
+        if house and available_quantities[stock] < quantity:
+            logger.error(f"Insufficient {stock} quantity available in market")
+            return None
+        
+        # Execute buy
+        portfolio['cash'] -= order_value
+        portfolio['holdings'][stock] = portfolio['holdings'].get(stock, 0) + quantity
+        holdings_index.adjust(team_id, stock, quantity)
+        if house:
             available_quantities[stock] -= quantity
+    
+    elif order_type == 'sell':
+        if portfolio['holdings'].get(stock, 0) < quantity:
+            logger.error(f"Team {team_id}: Insufficient {stock} holdings")
+            return None
         
-        elif order_type == 'sell':
-            if portfolio['holdings'].get(stock, 0) < quantity:
-                logger.error(f"Team {team_id}: Insufficient {stock} holdings")
-                return False
-            
-            # Execute sell
-            portfolio['cash'] += order_value
-            portfolio['holdings'][stock] -= quantity
-            if portfolio['holdings'][stock] == 0:
-                del portfolio['holdings'][stock]
+        # Execute sell
+        portfolio['cash'] += order_value
+        portfolio['holdings'][stock] -= quantity
+        if portfolio['holdings'][stock] == 0:
+            del portfolio['holdings'][stock]
+        holdings_index.adjust(team_id, stock, -quantity)
+        if house:
             available_quantities[stock] += quantity
-        
-        # Record transaction with team details
-        transaction = {
-            'timestamp': timestamp,
-            'team_id': team_id,
-            'type': order_type,
-            'stock': stock,
-            'quantity': quantity,
-            'price': price,
-            'total_value': order_value
-        }
-        
-        portfolio['transactions'].append(transaction)
-        
-        # Update trading volume and last price
-        trading_volume[stock] = trading_volume.get(stock, 0) + quantity
-        last_prices[stock] = stock_prices[stock]
-        
-        # Log to database with team information
-        db.log_order(team_id, order, "executed")
-        
-        # Save portfolio snapshot
+    
+    # Transaction with team details
+    return {
+        'timestamp': clock.now(),
+        'team_id': team_id,
+        'type': order_type,
+        'stock': stock,
+        'quantity': quantity,
+        'price': price,
+        'total_value': order_value
+    }
+
+def record_trade(team_id, order, transaction, house=True, persist=True):
+    """Publish a trade made by apply_trade(): history, trade feed, journal and database."""
+    stock = transaction['stock']
+    portfolio = team_portfolios[team_id]
+    portfolio['transactions'].append(transaction)
+    trade_feed.append(transaction)
+    
+    # Update trading volume and last price
+    if house:
+        trading_volume[stock] = trading_volume.get(stock, 0) + transaction['quantity']
+    last_prices[stock] = stock_prices[stock]
+    
+    fill = {key: transaction[key] for key in ('team_id', 'stock', 'type', 'quantity', 'price', 'timestamp')}
+    if not house:
+        fill['house'] = False
+    record_event('fill', **fill)
+    
+    # Log order and portfolio snapshot in a single commit
+    if persist:
         portfolio_value = calculate_portfolio_value(team_id)
-        db.save_portfolio_snapshot(
-            team_id,
-            portfolio['cash'],
-            portfolio['holdings'],
-            portfolio_value
-        )
-                
+        with db.transaction():
+            db.log_order(team_id, order, "executed")
+            db.save_portfolio_snapshot(
+                team_id,
+                portfolio['cash'],
+                portfolio['holdings'],
+                portfolio_value
+            )
+            
         logger.info(f"Team {team_id} portfolio updated successfully")
-        return True
-    
-    except Exception as e:
-        logger.error(f"Error processing order for Team {team_id}: {str(e)}")
-        db.log_order(team_id, order, f"failed: {str(e)}")
-        return False
 
 def calculate_portfolio_value(team_id):
     """Calculate total portfolio value for a team."""
-    portfolio = team_portfolios[team_id]
-    holdings_value = sum(
-        stock_prices[stock] * quantity
-        for stock, quantity in portfolio['holdings'].items()
-    )
-    return portfolio['cash'] + holdings_value
+    return team_portfolios[team_id]['cash'] + holdings_index.value(team_id)
+
+def refresh_leaderboard():
+    """Re-rank the teams whose value changed since the last refresh; returns the leaderboard version."""
+    with _leaderboard_lock:
+        values = {}
+        for team_id in holdings_index.take_dirty():
+            portfolio = team_portfolios.get(team_id)
+            if portfolio is None:
+                leaderboard.remove(team_id)
+            else:
+                values[team_id] = portfolio['cash'] + holdings_index.values.get(team_id, 0.0)
+        if values:
+            leaderboard.update_many(values)
+        return leaderboard.version
 
 def get_team_portfolio(team_id):
     """Get detailed portfolio information for a team."""
     if team_id not in team_portfolios:
         raise ValueError(f"Invalid team ID: {team_id}")
     
-    portfolio = team_portfolios[team_id]
-    holdings_value = sum(
-        stock_prices[stock] * quantity
-        for stock, quantity in portfolio['holdings'].items()
-    )
-    
-    return {
-        'cash': portfolio['cash'],
-        'holdings': portfolio['holdings'].copy(),
-        'holdings_value': holdings_value,
-        'total_value': portfolio['cash'] + holdings_value,
-        'transactions': portfolio['transactions'][-10:]  # Last 10 transactions
-    }
+    with state_locks.hold(teams=(team_id,)):
+        portfolio = team_portfolios[team_id]
+        holdings_value = holdings_index.value(team_id)
+        
+        return {
+            'cash': portfolio['cash'],
+            'holdings': portfolio['holdings'].copy(),
+            'holdings_value': holdings_value,
+            'total_value': portfolio['cash'] + holdings_value,
+            'transactions': portfolio['transactions'].recent(10)  # Last 10 transactions
+        }
 
 def transfer_stock(from_team, to_team, stock, quantity):
     """Transfer stock between teams."""
-    if from_team not in team_portfolios or to_team not in team_portfolios:
-        raise ValueError("Invalid team ID")
-    
-    from_portfolio = team_portfolios[from_team]
-    to_portfolio = team_portfolios[to_team]
-    
-    if stock not in from_portfolio['holdings'] or from_portfolio['holdings'][stock] < quantity:
-        raise ValueError("Insufficient stock holdings")
-    
-    # Execute transfer
-    from_portfolio['holdings'][stock] -= quantity
-    to_portfolio['holdings'][stock] = to_portfolio['holdings'].get(stock, 0) + quantity
-    
-    # Clean up empty holdings
-    if from_portfolio['holdings'][stock] == 0:
-        del from_portfolio['holdings'][stock]
-    
-    # Record transaction for both teams
-    timestamp = time.time()
-    price = stock_prices[stock]
-    
-    from_portfolio['transactions'].append({
-        'timestamp': timestamp,
-        'type': 'transfer_out',
-        'stock': stock,
-        'quantity': quantity,
-        'price': price,
-        'counterparty': to_team
-    })
-    
-    to_portfolio['transactions'].append({
-        'timestamp': timestamp,
-        'type': 'transfer_in',
-        'stock': stock,
-        'quantity': quantity,
-        'price': price,
-        'counterparty': from_team
-    })
-    
-    return True
+    with state_locks.hold(symbols=(stock,), teams=(from_team, to_team)):
+        if from_team not in team_portfolios or to_team not in team_portfolios:
+            raise ValueError("Invalid team ID")
+        
+        from_portfolio = team_portfolios[from_team]
+        to_portfolio = team_portfolios[to_team]
+        
+        if stock not in from_portfolio['holdings'] or from_portfolio['holdings'][stock] < quantity:
+            raise ValueError("Insufficient stock holdings")
+        
+        # Execute transfer
+        from_portfolio['holdings'][stock] -= quantity
+        to_portfolio['holdings'][stock] = to_portfolio['holdings'].get(stock, 0) + quantity
+        holdings_index.adjust(from_team, stock, -quantity)
+        holdings_index.adjust(to_team, stock, quantity)
+        
+        # Clean up empty holdings
+        if from_portfolio['holdings'][stock] == 0:
+            del from_portfolio['holdings'][stock]
+        
+        # Record transaction for both teams
+        timestamp = clock.now()
+        price = stock_prices[stock]
+        
+        transfer_out = {
+            'timestamp': timestamp,
+            'type': 'transfer_out',
+            'stock': stock,
+            'quantity': quantity,
+            'price': price,
+            'counterparty': to_team
+        }
+        transfer_in = {
+            'timestamp': timestamp,
+            'type': 'transfer_in',
+            'stock': stock,
+            'quantity': quantity,
+            'price': price,
+            'counterparty': from_team
+        }
+        from_portfolio['transactions'].append(transfer_out)
+        to_portfolio['transactions'].append(transfer_in)
+        trade_feed.append(dict(transfer_out, team_id=from_team))
+        trade_feed.append(dict(transfer_in, team_id=to_team))
+        
+        record_event('transfer', from_team=from_team, to_team=to_team, stock=stock,
+                     quantity=quantity, price=price, timestamp=timestamp)
+        
+        return True
+
+def adjust_cash(team_id, amount):
+    """Add cash to (or, with a negative amount, remove cash from) a team."""
+    with state_locks.hold(teams=(team_id,)):
+        if team_id not in team_portfolios:
+            raise ValueError(f"Invalid team ID: {team_id}")
+        
+        portfolio = team_portfolios[team_id]
+        old_cash = portfolio['cash']
+        new_cash = old_cash + amount
+        if new_cash < 0:
+            raise ValueError("Operation would result in negative cash balance")
+        
+        timestamp = clock.now()
+        portfolio['cash'] = new_cash
+        portfolio['total_value'] = holdings_index.value(team_id) + new_cash
+        holdings_index.touch(team_id)
+        portfolio['transactions'].append({
+            'timestamp': timestamp,
+            'type': 'cash_adjustment',
+            'amount': amount,
+            'old_balance': old_cash,
+            'new_balance': new_cash
+        })
+        
+        record_event('cash', team_id=team_id, amount=amount, timestamp=timestamp)
+        return new_cash
 
 def reset_team_portfolio(team_id):
     """Reset a team's portfolio to initial state."""
-    if team_id in team_portfolios:
-        team_portfolios[team_id] = {
-            'cash': STARTING_BUDGET,
-            'holdings': {},
-            'transactions': []
-        }
-        return True
-    return False
+    with state_locks.hold(teams=(team_id,)):
+        if team_id in team_portfolios:
+            team_portfolios[team_id] = {
+                'cash': STARTING_BUDGET,
+                'holdings': {},
+                'transactions': TransactionLog(team_id)
+            }
+            holdings_index.drop_team(team_id)
+            db.clear_transactions(team_id)
+            record_event('portfolio_reset', team_id=team_id)
+            return True
+        return False
 
 def admin_place_order(team_id, stock, quantity, order_type, admin_key=None):
     """Process admin-placed orders for teams with validation"""
@@ -499,7 +789,7 @@ def admin_place_order(team_id, stock, quantity, order_type, admin_key=None):
         'stock': stock,
         'quantity': quantity,
         'type': order_type,
-        'timestamp': time.time(),
+        'timestamp': clock.now(),
         'admin_placed': True
     }
 
@@ -533,59 +823,48 @@ def get_session_summary(team_id):
 
 def manual_override_price(stock, new_price):
     """Enhanced manual price override with safety checks and logging"""
-    try:
-        # Input validation
-        if not stock or stock not in stock_prices:
-            logger.error(f"Invalid stock symbol: {stock}")
-            return False
+    with state_locks.hold(symbols=(stock,)):
+        try:
+            # Input validation
+            if not stock or stock not in stock_prices:
+                logger.error(f"Invalid stock symbol: {stock}")
+                return False
+                
+            if new_price <= 0:
+                logger.error(f"Invalid price value: {new_price}")
+                return False
             
-        if new_price <= 0:
-            logger.error(f"Invalid price value: {new_price}")
-            return False
-        
-        current_price = stock_prices[stock]
-        percent_change = ((new_price - current_price) / current_price) * 100
-        
-        # Additional validations
-        if new_price < 0.01:
-            logger.error("Price cannot be less than $0.01")
-            return False
+            current_price = stock_prices[stock]
+            percent_change = ((new_price - current_price) / current_price) * 100
+            
+            # Additional validations
+            if new_price < 0.01:
+                logger.error("Price cannot be less than $0.01")
+                return False
+                
+            if abs(percent_change) > 50:
+                logger.error(f"Price change of {percent_change:.1f}% exceeds 50% limit")
+                return False
+            
+            # Store the last price before updating
+            last_prices[stock] = current_price
+            
+            # Update the price
+            stock_prices[stock] = new_price
+            record_price_history(stock, new_price)
+            record_event('price', stock=stock, price=new_price, last_price=current_price)
+            
+            # Log the change with additional details
+            info = STOCK_DETAILS[stock]
+            logger.info(f"Manual price override: {stock} ({info['name']}) "
+                       f"changed by {percent_change:+.2f}% "
+                       f"from ${current_price:.2f} to ${new_price:.2f}")
             
-        if abs(percent_change) > 50:
-            logger.error(f"Price change of {percent_change:.1f}% exceeds 50% limit")
+            # Save market state
+            save_market_state()
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Price override failed: {str(e)}")
             return False
-        
-        # Store the last price before updating
-        last_prices[stock] = current_price
-        
-        # Update the price
-        stock_prices[stock] = new_price
-        
-        # Log the change with additional details
-        info = STOCK_DETAILS[stock]
-        logger.info(f"Manual price override: {stock} ({info['name']}) "
-                   f"changed by {percent_change:+.2f}% "
-                   f"from ${current_price:.2f} to ${new_price:.2f}")
-        
-        # Update price history
-        if stock not in price_history:
-            price_history[stock] = []
-        price_history[stock].append({
-            'timestamp': time.time(),
-            'price': new_price,
-            'type': 'manual_override',
-            'previous_price': current_price
-        })
-        
-        # Trim history if needed
-        if len(price_history[stock]) > 100:
-            price_history[stock] = price_history[stock][-100:]
-        
-        # Save market state
-        save_market_state()
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Price override failed: {str(e)}")
-        return False
@@ -0,0 +1,135 @@
+import logging
+
+import numpy as np
+
+from utils.logger import logger
+
+# Progress along the glide path (0..1) as a function of elapsed fraction (0..1)
+EASINGS = {
+    'linear': lambda t: t,
+    'ease_in': lambda t: t * t,
+    'ease_out': lambda t: t * (2 - t),
+    'ease_in_out': lambda t: t * t * (3 - 2 * t),
+}
+EASING_NAMES = list(EASINGS)
+
+class NewsImpactEngine:
+    """Active news impacts held in parallel arrays and advanced together.
+
+    Each impact moves one symbol's price by ``target - start`` over
+    ``duration`` seconds, shaped by an easing curve. A step adds each
+    impact's share of that move for the elapsed time on top of whatever
+    else moved the price, so several impacts on the same symbol simply
+    add up. Applied prices go onto the store's history ring like regular
+    ticks. Finished impacts are dropped.
+    """
+
+    LOG_EVERY = 60  # Steps between sampled debug lines
+
+    def __init__(self, store):
+        self.store = store
+        self.clear()
+
+    def clear(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.start = np.zeros(0)
+        self.target = np.zeros(0)
+        self.elapsed = np.zeros(0)
+        self.duration = np.zeros(0)
+        self.easing = np.zeros(0, dtype=np.int64)
+        self.steps = 0
+
+    def __len__(self):
+        return self.ids.size
+
+    @property
+    def remaining(self):
+        """Seconds left on each active impact."""
+        return self.duration - self.elapsed
+
+    def add(self, stocks, target_percent, duration, easing='linear'):
+        """Start gliding each listed stock ``target_percent`` away from its current price.
+
+        Returns the stocks that were registered; unlisted stocks are skipped.
+        """
+        if duration <= 0:
+            raise ValueError(f"Impact duration must be positive, got {duration}")
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing '{easing}', expected one of {', '.join(EASING_NAMES)}")
+
+        listed = self.store.mask('price')
+        registered, ids = [], []
+        for stock in stocks:
+            symbol_id = self.store.registry.get(stock)
+            if symbol_id is not None and listed[symbol_id]:
+                registered.append(stock)
+                ids.append(symbol_id)
+        ids = np.array(ids, dtype=np.int64)
+        start = self.store.columns['price'][ids]
+
+        self.ids = np.concatenate([self.ids, ids])
+        self.start = np.concatenate([self.start, start])
+        self.target = np.concatenate([self.target, start * (1 + target_percent / 100.0)])
+        self.elapsed = np.concatenate([self.elapsed, np.zeros(ids.size)])
+        self.duration = np.concatenate([self.duration, np.full(ids.size, float(duration))])
+        self.easing = np.concatenate([self.easing, np.full(ids.size, EASING_NAMES.index(easing))])
+        return registered
+
+    def _progress(self, fraction):
+        progress = np.empty_like(fraction)
+        for code in np.unique(self.easing):
+            selected = self.easing == code
+            progress[selected] = EASINGS[EASING_NAMES[code]](fraction[selected])
+        return progress
+
+    def step(self, seconds):
+        """Advance every impact by ``seconds``; returns (symbol IDs, new prices) that moved."""
+        if not self.ids.size:
+            return self.ids, np.zeros(0)
+        before = self._progress(np.minimum(self.elapsed / self.duration, 1.0))
+        self.elapsed += seconds
+        after = self._progress(np.minimum(self.elapsed / self.duration, 1.0))
+        self.steps += 1
+        return self._apply((self.target - self.start) * (after - before))
+
+    def finish(self):
+        """Complete every remaining impact at once (e.g. when the session ends)."""
+        if not self.ids.size:
+            return self.ids, np.zeros(0)
+        before = self._progress(np.minimum(self.elapsed / self.duration, 1.0))
+        self.elapsed = self.duration.copy()
+        return self._apply((self.target - self.start) * (1.0 - before))
+
+    def _apply(self, moves):
+        prices = self.store.columns['price']
+        # Overlapping impacts on one symbol accumulate
+        ids, positions = np.unique(self.ids, return_inverse=True)
+        totals = np.zeros(ids.size)
+        np.add.at(totals, positions, moves)
+        # Skip symbols delisted since the impact started
+        listed = self.store.mask('price')[ids]
+        ids, totals = ids[listed], totals[listed]
+        new_prices = np.maximum(0.01, prices[ids] + totals)
+        prices[ids] = new_prices
+        self.store.touch()
+        # Same history path as regular ticks, so charts show the glide
+        self.store.append_history(ids, new_prices)
+
+        if logger.isEnabledFor(logging.DEBUG) and self.steps % self.LOG_EVERY == 0:
+            self._log_progress()
+        self._drop_finished()
+        return ids, new_prices
+
+    def _log_progress(self):
+        symbols = self.store.symbols_for(self.ids)
+        fraction = np.minimum(self.elapsed / self.duration, 1.0)
+        for i, symbol in enumerate(symbols):
+            logger.debug(f"News impact {symbol}: {fraction[i]*100:.1f}% of {self.duration[i]:.0f}s | "
+                         f"Start: ${self.start[i]:.2f} | Target: ${self.target[i]:.2f}")
+
+    def _drop_finished(self):
+        active = self.elapsed < self.duration
+        if active.all():
+            return
+        for name in ('ids', 'start', 'target', 'elapsed', 'duration', 'easing'):
+            setattr(self, name, getattr(self, name)[active])
@@ -0,0 +1,348 @@
+import argparse
+import heapq
+import itertools
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from utils.logger import logger
+from . import market_state
+
+ORDER_KINDS = ('limit', 'market', 'ioc')
+TICK_SIZE = 0.01
+
+Fill = namedtuple('Fill', 'buy_order sell_order price quantity')
+
+class Order:
+    """One order in the book. ``remaining`` counts down as it fills."""
+
+    __slots__ = ('id', 'team_id', 'stock', 'type', 'kind', 'price', 'quantity', 'remaining', 'status')
+
+    def __init__(self, order_id, team_id, stock, order_type, kind, price, quantity):
+        self.id = order_id
+        self.team_id = team_id
+        self.stock = stock
+        self.type = order_type  # 'buy' or 'sell'
+        self.kind = kind
+        self.price = price  # None for market orders
+        self.quantity = quantity
+        self.remaining = quantity
+        self.status = 'open'  # 'open', 'filled', 'cancelled' or 'rejected'
+
+    def __repr__(self):
+        return (f"Order({self.id}, team {self.team_id}, {self.type} {self.remaining}/{self.quantity} "
+                f"{self.stock} {self.kind} @ {self.price}, {self.status})")
+
+class _BookSide:
+    """Price levels for one side: FIFO queue per price plus a heap of level keys for the best price.
+
+    Bids are keyed by negated price so the heap top is always the best
+    level. A level is pushed onto the heap once, when it is created, and
+    removed when it is found empty at the top; cancelled orders are
+    dropped lazily when they reach the front of their queue.
+    """
+
+    __slots__ = ('sign', 'levels', 'heap')
+
+    def __init__(self, sign):
+        self.sign = sign
+        self.levels = {}  # key -> deque of orders
+        self.heap = []
+
+    def add(self, order):
+        key = self.sign * order.price
+        queue = self.levels.get(key)
+        if queue is None:
+            queue = self.levels[key] = deque()
+            heapq.heappush(self.heap, key)
+        queue.append(order)
+
+    def best(self):
+        """(price, queue) of the best level with a live order at its head, or (None, None)."""
+        heap = self.heap
+        levels = self.levels
+        while heap:
+            key = heap[0]
+            queue = levels[key]
+            while queue and queue[0].remaining == 0:
+                queue.popleft()
+            if queue:
+                return self.sign * key, queue
+            heapq.heappop(heap)
+            del levels[key]
+        return None, None
+
+    def depth(self, max_levels=None):
+        """[(price, quantity, orders)] from the best level outwards."""
+        result = []
+        for key in sorted(self.levels):
+            live = [order.remaining for order in self.levels[key] if order.remaining]
+            if live:
+                result.append((self.sign * key, sum(live), len(live)))
+                if max_levels and len(result) == max_levels:
+                    break
+        return result
+
+class OrderBook:
+    """Central limit order book for one symbol with price-time priority.
+
+    Incoming orders match against the opposite side at the resting order's
+    price, best price first and oldest first within a price. Limit orders
+    rest whatever does not fill; market and IOC orders never rest. Orders
+    from the same team never trade with each other: the resting order is
+    cancelled instead.
+
+    ``settle(buy, sell, price, quantity)`` is called for every match before
+    the fill is applied. It returns None to accept the fill, or whichever of
+    the two orders cannot settle, which is then rejected. ``on_close(order)``
+    is called whenever a resting order leaves the book other than by cancel().
+    """
+
+    def __init__(self, stock, settle=None, on_close=None):
+        self.stock = stock
+        self.settle = settle
+        self.on_close = on_close
+        self.bids = _BookSide(-1)
+        self.asks = _BookSide(1)
+        self.last_price = None
+
+    def best_bid(self):
+        return self.bids.best()[0]
+
+    def best_ask(self):
+        return self.asks.best()[0]
+
+    def depth(self, max_levels=None):
+        return {'bids': self.bids.depth(max_levels), 'asks': self.asks.depth(max_levels)}
+
+    def submit(self, order):
+        """Match ``order`` against the book and rest any limit remainder; returns its fills."""
+        fills = []
+        if order.type == 'buy':
+            opposite, limit = self.asks, order.price
+        else:
+            opposite, limit = self.bids, None if order.price is None else -order.price
+        settle = self.settle
+        on_close = self.on_close
+
+        while order.remaining:
+            price, queue = opposite.best()
+            if price is None or (limit is not None and opposite.sign * price > limit):
+                break
+            maker = queue[0]
+            if maker.team_id == order.team_id:
+                maker.remaining = 0
+                maker.status = 'cancelled'
+                if on_close is not None:
+                    on_close(maker)
+                continue
+            quantity = min(order.remaining, maker.remaining)
+            if order.type == 'buy':
+                buy, sell = order, maker
+            else:
+                buy, sell = maker, order
+            if settle is not None:
+                failed = settle(buy, sell, price, quantity)
+                if failed is not None:
+                    failed.remaining = 0
+                    failed.status = 'rejected'
+                    if failed is order:
+                        break
+                    if on_close is not None:
+                        on_close(maker)
+                    continue
+            order.remaining -= quantity
+            maker.remaining -= quantity
+            if not maker.remaining:
+                maker.status = 'filled'
+                if on_close is not None:
+                    on_close(maker)
+            self.last_price = price
+            fills.append(Fill(buy, sell, price, quantity))
+
+        if order.remaining:
+            if order.kind == 'limit':
+                (self.bids if order.type == 'buy' else self.asks).add(order)
+            else:
+                order.remaining = 0
+                order.status = 'cancelled'
+        elif order.status == 'open':
+            order.status = 'filled'
+        return fills
+
+    def cancel(self, order):
+        """Cancel a resting order; it is removed from its queue lazily."""
+        if order.status != 'open':
+            return False
+        order.remaining = 0
+        order.status = 'cancelled'
+        return True
+
+class MatchingEngine:
+    """Order books for every listed symbol, settled against team portfolios.
+
+    Each fill is applied to the seller's and then the buyer's portfolio
+    with ``market_state.apply_trade``, without touching the house
+    inventory, and only once both legs succeed are they recorded together
+    and the trade price becomes the symbol's market price. If the buyer's
+    leg fails, the seller's portfolio is restored and the buy order is
+    rejected. Resting orders live only in memory and are not restored by
+    a warm restart.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.orders = {}  # Open orders by ID, for cancels
+        self._ids = itertools.count(1)
+
+    def book(self, stock):
+        book = self.books.get(stock)
+        if book is None:
+            book = self.books[stock] = OrderBook(stock, settle=self._settle, on_close=self._closed)
+        return book
+
+    def submit(self, team_id, order):
+        """Place an order dict with 'stock', 'type', 'quantity', 'kind' and (for limit/IOC) 'price'.
+
+        Returns the Order, whose ``status`` and ``remaining`` show what
+        happened, and the list of fills it produced.
+        """
+        stock = order.get('stock')
+        kind = order.get('kind', 'limit')
+        price = order.get('price')
+        quantity = order.get('quantity')
+        if team_id not in market_state.team_portfolios:
+            raise ValueError(f"Invalid team ID: {team_id}")
+        if stock not in market_state.stock_prices:
+            raise ValueError(f"Unknown stock: {stock}")
+        if order.get('type') not in ('buy', 'sell'):
+            raise ValueError(f"Order type must be 'buy' or 'sell', got {order.get('type')!r}")
+        if kind not in ORDER_KINDS:
+            raise ValueError(f"Order kind must be one of {', '.join(ORDER_KINDS)}, got {kind!r}")
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError(f"Quantity must be a positive integer, got {quantity!r}")
+        if kind == 'market':
+            price = None
+        elif price is None or price <= 0:
+            raise ValueError(f"{kind} orders need a positive price")
+        else:
+            price = round(round(price / TICK_SIZE) * TICK_SIZE, 2)
+
+        entry = Order(next(self._ids), team_id, stock, order['type'], kind, price, quantity)
+        # One symbol's book matches one order at a time; other symbols match in parallel
+        with market_state.state_locks.hold(symbols=(stock,)):
+            fills = self.book(stock).submit(entry)
+            if entry.status == 'open':
+                self.orders[entry.id] = entry
+        filled = sum(fill.quantity for fill in fills)
+        logger.info(f"Team {team_id} {kind} {order['type']} {quantity} {stock}"
+                    f"{'' if price is None else f' @ ${price:.2f}'}: {entry.status}, "
+                    f"{filled} filled in {len(fills)} trades")
+        return entry, fills
+
+    def cancel(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        with market_state.state_locks.hold(symbols=(order.stock,)):
+            return self.books[order.stock].cancel(order)
+
+    def clear(self):
+        with market_state.lock_all():
+            self.books.clear()
+            self.orders.clear()
+
+    def _closed(self, order):
+        self.orders.pop(order.id, None)
+
+    def _settle(self, buy, sell, price, quantity):
+        # Called by submit() with the symbol lock held; both teams stay locked from check to update
+        with market_state.state_locks.hold(teams=(buy.team_id, sell.team_id)):
+            if market_state.team_portfolios[sell.team_id]['holdings'].get(sell.stock, 0) < quantity:
+                return sell
+            if market_state.team_portfolios[buy.team_id]['cash'] < price * quantity:
+                return buy
+
+            stock = buy.stock
+            last_price = market_state.stock_prices[stock]
+            sell_leg = {'stock': stock, 'type': 'sell', 'quantity': quantity, 'price': price}
+            buy_leg = dict(sell_leg, type='buy')
+            seller = market_state.team_portfolios[sell.team_id]
+            seller_cash = seller['cash']
+
+            # Apply both legs before recording either, so a failed leg leaves no trace
+            sold = self._apply_leg(sell.team_id, sell_leg)
+            if sold is None:
+                return sell
+            bought = self._apply_leg(buy.team_id, buy_leg)
+            if bought is None:
+                logger.error(f"Fill of {quantity} {stock} failed for Team {buy.team_id}; "
+                             f"restoring Team {sell.team_id}'s portfolio")
+                seller['cash'] = seller_cash
+                seller['holdings'][stock] = seller['holdings'].get(stock, 0) + quantity
+                market_state.holdings_index.adjust(sell.team_id, stock, quantity)
+                return buy
+
+            # Both legs, the new price and their journal events reach the database in one commit
+            with market_state.db.transaction():
+                market_state.record_trade(sell.team_id, sell_leg, sold, house=False)
+                market_state.record_trade(buy.team_id, buy_leg, bought, house=False)
+                market_state.stock_prices[stock] = price
+                market_state.record_price_history(stock, price)
+                market_state.trading_volume[stock] = market_state.trading_volume.get(stock, 0) + quantity
+                market_state.record_event('price', stock=stock, price=price, last_price=last_price,
+                                          volume=market_state.trading_volume[stock])
+            return None
+
+    def _apply_leg(self, team_id, leg):
+        try:
+            return market_state.apply_trade(team_id, leg, house=False)
+        except Exception as e:
+            logger.error(f"Error settling Team {team_id}'s side of a {leg['stock']} fill: {str(e)}")
+            return None
+
+order_books = MatchingEngine()
+
+def benchmark(orders=200000, seed=0, levels=50):
+    """Time the matching loop alone (no settlement) on a random order flow; returns orders/s.
+
+    The flow is 70% limit, 10% market, 10% IOC and 10% cancels of a
+    random earlier order, priced within ``levels`` ticks of 100.
+    """
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(4, orders, p=[0.7, 0.1, 0.1, 0.1]).tolist()
+    sides = np.where(rng.random(orders) < 0.5, 'buy', 'sell').tolist()
+    prices = np.round(100 + rng.integers(-levels, levels + 1, orders) * TICK_SIZE, 2).tolist()
+    quantities = rng.integers(1, 100, orders).tolist()
+    teams = rng.integers(0, 1000, orders).tolist()
+    targets = rng.random(orders).tolist()
+
+    book = OrderBook('BENCH')
+    placed = []
+    fills = 0
+    start = time.perf_counter()
+    for i in range(orders):
+        kind = kinds[i]
+        if kind == 3:
+            if placed:
+                book.cancel(placed[int(targets[i] * len(placed))])
+            continue
+        order = Order(i, teams[i], 'BENCH', sides[i], ORDER_KINDS[kind],
+                      None if kind == 1 else prices[i], quantities[i])
+        fills += len(book.submit(order))
+        if kind == 0:
+            placed.append(order)
+    elapsed = time.perf_counter() - start
+    return orders / elapsed, fills, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Order book matching throughput on one core")
+    parser.add_argument('-n', '--orders', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    rate, fills, elapsed = benchmark(args.orders, args.seed)
+    print(f"{args.orders} orders, {fills} fills in {elapsed:.2f}s: {rate:,.0f} orders/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+from collections import deque
+
+from config import TRANSACTION_TAIL_LENGTH
+from .transactions import TransactionLog
+
+class ReplayState:
+    """Market and portfolio state rebuilt from journal events."""
+
+    def __init__(self):
+        self.stock_prices = {}
+        self.available_quantities = {}
+        self.last_prices = {}
+        self.trading_volume = {}
+        self.team_portfolios = {}
+        self.starting_budget = 0
+        self.session = 0
+        self.last_seq = 0
+
+def _new_portfolio(cash):
+    return {
+        'cash': cash,
+        'holdings': {},
+        # Only the in-memory tail; older transactions were spilled by the live run
+        'transactions': deque(maxlen=TRANSACTION_TAIL_LENGTH),
+        'holdings_value': 0,
+        'total_value': cash
+    }
+
+def _apply_reset(state, ts, payload):
+    state.stock_prices.clear()
+    state.available_quantities.clear()
+    state.last_prices.clear()
+    state.trading_volume.clear()
+    state.team_portfolios.clear()
+    for symbol, (price, quantity) in payload['stocks'].items():
+        state.stock_prices[symbol] = price
+        state.available_quantities[symbol] = quantity
+        state.last_prices[symbol] = price
+        state.trading_volume[symbol] = 0
+    state.starting_budget = payload['starting_budget']
+    for team_id in range(payload['team_count']):
+        state.team_portfolios[team_id] = _new_portfolio(state.starting_budget)
+
+def _apply_price(state, ts, payload):
+    stock = payload['stock']
+    if 'last_price' in payload:
+        state.last_prices[stock] = payload['last_price']
+    if 'volume' in payload:
+        state.trading_volume[stock] = payload['volume']
+    state.stock_prices[stock] = payload['price']
+
+def _apply_prices(state, ts, payload):
+    state.stock_prices.update(zip(payload['stocks'], payload['prices']))
+
+def _apply_listing(state, ts, payload):
+    state.stock_prices[payload['stock']] = payload['price']
+    state.available_quantities[payload['stock']] = payload['quantity']
+
+def _apply_fill(state, ts, payload):
+    """Mirror of market_state.update_portfolio for an executed order."""
+    portfolio = state.team_portfolios[payload['team_id']]
+    stock = payload['stock']
+    quantity = payload['quantity']
+    price = payload['price']
+    order_value = price * quantity
+    house = payload.get('house', True)  # False for fills between teams from the order book
+
+    if payload['type'] == 'buy':
+        portfolio['cash'] -= order_value
+        portfolio['holdings'][stock] = portfolio['holdings'].get(stock, 0) + quantity
+        if house:
+            state.available_quantities[stock] -= quantity
+    else:
+        portfolio['cash'] += order_value
+        portfolio['holdings'][stock] -= quantity
+        if portfolio['holdings'][stock] == 0:
+            del portfolio['holdings'][stock]
+        if house:
+            state.available_quantities[stock] += quantity
+
+    portfolio['transactions'].append({
+        'timestamp': payload['timestamp'],
+        'team_id': payload['team_id'],
+        'type': payload['type'],
+        'stock': stock,
+        'quantity': quantity,
+        'price': price,
+        'total_value': order_value
+    })
+    if house:
+        state.trading_volume[stock] = state.trading_volume.get(stock, 0) + quantity
+    state.last_prices[stock] = state.stock_prices[stock]
+
+def _apply_transfer(state, ts, payload):
+    from_portfolio = state.team_portfolios[payload['from_team']]
+    to_portfolio = state.team_portfolios[payload['to_team']]
+    stock = payload['stock']
+    quantity = payload['quantity']
+
+    from_portfolio['holdings'][stock] -= quantity
+    to_portfolio['holdings'][stock] = to_portfolio['holdings'].get(stock, 0) + quantity
+    if from_portfolio['holdings'][stock] == 0:
+        del from_portfolio['holdings'][stock]
+
+    for portfolio, kind, counterparty in (
+        (from_portfolio, 'transfer_out', payload['to_team']),
+        (to_portfolio, 'transfer_in', payload['from_team'])
+    ):
+        portfolio['transactions'].append({
+            'timestamp': payload['timestamp'],
+            'type': kind,
+            'stock': stock,
+            'quantity': quantity,
+            'price': payload['price'],
+            'counterparty': counterparty
+        })
+
+def _apply_cash(state, ts, payload):
+    portfolio = state.team_portfolios[payload['team_id']]
+    old_cash = portfolio['cash']
+    portfolio['cash'] = old_cash + payload['amount']
+    portfolio['transactions'].append({
+        'timestamp': payload['timestamp'],
+        'type': 'cash_adjustment',
+        'amount': payload['amount'],
+        'old_balance': old_cash,
+        'new_balance': portfolio['cash']
+    })
+
+def _apply_portfolio_reset(state, ts, payload):
+    state.team_portfolios[payload['team_id']] = _new_portfolio(state.starting_budget)
+
+def _apply_session_start(state, ts, payload):
+    state.session = payload['session']
+
+APPLIERS = {
+    'reset': _apply_reset,
+    'price': _apply_price,
+    'prices': _apply_prices,
+    'listing': _apply_listing,
+    'fill': _apply_fill,
+    'transfer': _apply_transfer,
+    'cash': _apply_cash,
+    'portfolio_reset': _apply_portfolio_reset,
+    'session_start': _apply_session_start,
+}
+
+def apply_event(state, seq, ts, event_type, payload):
+    """Apply a single journal event to ``state``."""
+    applier = APPLIERS.get(event_type)
+    if applier:
+        applier(state, ts, payload)
+    state.last_seq = seq
+
+def replay(events, state=None):
+    """Fold (seq, ts, event_type, payload) events into a ReplayState.
+
+    Events carry resulting values (prices after the RNG has run, fill prices
+    after slippage), so replay is deterministic and does no logging or I/O.
+    """
+    state = state or ReplayState()
+    for seq, ts, event_type, payload in events:
+        apply_event(state, seq, ts, event_type, payload)
+    return state
+
+def replay_journal(database=None, after_seq=None, until_seq=None, state=None):
+    """Rebuild state from the journal.
+
+    Without ``after_seq`` replay starts at the most recent market reset,
+    since nothing before it can affect the current state. ``database``
+    defaults to the one market_state currently writes to.
+    """
+    if database is None:
+        from simulation import market_state
+        database = market_state.db
+    if after_seq is None:
+        reset_seq = database.event_journal.latest_seq('reset')
+        after_seq = reset_seq - 1 if reset_seq else 0
+    return replay(database.iter_journal(after_seq, until_seq), state)
+
+def refresh_valuations(state):
+    """Recompute holdings_value/total_value for every portfolio in ``state``."""
+    for portfolio in state.team_portfolios.values():
+        holdings_value = sum(
+            state.stock_prices.get(stock, 0) * quantity
+            for stock, quantity in portfolio['holdings'].items()
+        )
+        portfolio['holdings_value'] = holdings_value
+        portfolio['total_value'] = portfolio['cash'] + holdings_value
+
+def restore_market_state(state):
+    """Install a replayed state into the live market_state containers.
+
+    The module-level dicts are updated in place because the UI and the
+    simulation hold references to them.
+    """
+    from simulation import market_state
+
+    refresh_valuations(state)
+    with market_state.lock_all(symbols=state.stock_prices, teams=state.team_portfolios):
+        for team_id, portfolio in state.team_portfolios.items():
+            portfolio['transactions'] = TransactionLog(team_id, portfolio['transactions'])
+        for live, replayed in (
+            (market_state.stock_prices, state.stock_prices),
+            (market_state.available_quantities, state.available_quantities),
+            (market_state.last_prices, state.last_prices),
+            (market_state.trading_volume, state.trading_volume),
+            (market_state.team_portfolios, state.team_portfolios),
+        ):
+            live.clear()
+            live.update(replayed)
+        market_state.holdings_index.rebuild(market_state.team_portfolios)
+        market_state.leaderboard.clear()
+        market_state.store.clear_history()
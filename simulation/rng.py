@@ -0,0 +1,44 @@
+import zlib
+
+import numpy as np
+
+from config import RANDOM_SEED
+
+class RandomStreams:
+    """Independent ``numpy.random.Generator`` streams for each engine component.
+
+    Every stream is derived from one base seed, the session number and the
+    component name, so a component's draws do not depend on how often any
+    other component (or thread) draws. The same seed reproduces a run.
+    """
+
+    def __init__(self, seed=None):
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Start over from ``seed`` (an int, a SeedSequence, or None for fresh entropy)."""
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.session = 0
+        self._streams = {}
+
+    @property
+    def seed(self):
+        """Base entropy; pass it to reseed() to reproduce this run."""
+        return self.seed_sequence.entropy
+
+    def begin_session(self, session):
+        """Switch every component to the streams for ``session``."""
+        self.session = session
+        self._streams = {}
+
+    def stream(self, component):
+        generator = self._streams.get(component)
+        if generator is None:
+            key = self.seed_sequence.spawn_key + (self.session, zlib.crc32(component.encode('utf-8')))
+            sequence = np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=key)
+            generator = self._streams[component] = np.random.default_rng(sequence)
+        return generator
+
+random_streams = RandomStreams(RANDOM_SEED)
@@ -0,0 +1,172 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import TEAM_COUNT
+from data.db import SimulationDB
+from utils.logger import logger
+from . import clock, market_state, market_simulation
+from .market_simulation import MarketSession, PriceFluctuationManager
+from .rng import random_streams
+
+# Scenario settings; any key can be overridden per run
+DEFAULT_SCENARIO = {
+    'duration': 600,  # Session length in seconds
+    'price_fluctuation': {},  # Overrides merged into PRICE_FLUCTUATION, e.g. {'NOVA': {'UPDATE_INTERVAL': 0.5}}
+    'news': [],  # (stocks, target percent) impacts queued before the session starts
+    'order_rate': 0.5,  # Random orders per second across all teams
+    'max_order_quantity': 50,
+}
+
+class ScenarioSummary:
+    """Distributions over many simulated sessions, one row per session."""
+
+    def __init__(self, symbols, team_ids, final_prices, max_drawdown, team_pnl, elapsed):
+        self.symbols = symbols
+        self.team_ids = team_ids
+        self.final_prices = final_prices  # (sessions, symbols)
+        self.max_drawdown = max_drawdown  # (sessions, symbols), fraction below running peak
+        self.team_pnl = team_pnl  # (sessions, teams)
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.final_prices)
+
+    def percentiles(self, name, q=(5, 50, 95)):
+        """Per-column percentiles of one summary array, shape (len(q), columns)."""
+        return np.percentile(getattr(self, name), q, axis=0)
+
+    def report(self):
+        q = (5, 50, 95)
+        lines = [f"{len(self)} sessions in {self.elapsed:.1f}s ({len(self) / self.elapsed:.0f} sessions/s)",
+                 f"{'':8}{'final price p5/p50/p95':>34}{'max drawdown p50/p95':>26}"]
+        prices = self.percentiles('final_prices', q)
+        drawdowns = self.percentiles('max_drawdown', (50, 95))
+        for i, symbol in enumerate(self.symbols):
+            lines.append(f"{symbol:8}{prices[0, i]:>12.2f}{prices[1, i]:>11.2f}{prices[2, i]:>11.2f}"
+                         f"{drawdowns[0, i]:>13.1%}{drawdowns[1, i]:>13.1%}")
+        pnl = self.percentiles('team_pnl', q)
+        for i, team_id in enumerate(self.team_ids):
+            lines.append(f"Team {team_id:<3} P&L {pnl[0, i]:>12,.2f}{pnl[1, i]:>12,.2f}{pnl[2, i]:>12,.2f}")
+        return '\n'.join(lines)
+
+def _init_worker():
+    """Per-process setup: no persistence and quiet logging."""
+    scratch = SimulationDB(':memory:', mode='disabled')
+    market_state.db = market_simulation.db = scratch
+    logger.setLevel(logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+def _simulate_session(scenario, seed_sequence):
+    """Run one session on a virtual clock; returns (final prices, max drawdown, team P&L)."""
+    random_streams.reseed(seed_sequence)
+    clock.set_clock(clock.VirtualClock(start=0.0))
+
+    market_state.initialize_market()
+    symbols = list(market_state.stock_prices)
+    ids = np.array([market_state.store.registry.get(symbol) for symbol in symbols])
+    prices = market_state.store.columns['price']
+    start_values = [market_state.calculate_portfolio_value(team_id) for team_id in range(TEAM_COUNT)]
+
+    session = MarketSession()
+    session.checkpoint_path = None
+    session.session_duration = scenario['duration']
+    session.price_manager = PriceFluctuationManager()
+    for stocks, percent in scenario['news']:
+        session.add_news_impact(stocks, percent)
+
+    path = np.empty((scenario['duration'] + 1, len(symbols)))
+    path[0] = prices[ids]
+    samples = 1
+
+    def every_second():
+        nonlocal samples
+        if samples < len(path):
+            path[samples] = market_state.store.columns['price'][ids]
+            samples += 1
+
+    def place_random_order():
+        stock = symbols[rng.integers(len(symbols))]
+        order = {
+            'stock': stock,
+            'type': 'buy' if rng.random() < 0.5 else 'sell',
+            'quantity': int(rng.integers(1, scenario['max_order_quantity'] + 1)),
+        }
+        market_state.process_market_order(int(rng.integers(TEAM_COUNT)), order)
+        if session.session_active:
+            clock.call_later(rng.exponential(1 / scenario['order_rate']), place_random_order)
+
+    session.start_session()
+    session.start_update_loop()
+    rng = random_streams.stream('scenario_orders')
+    clock.call_repeating(1.0, every_second)
+    if scenario['order_rate'] > 0:
+        clock.call_later(rng.exponential(1 / scenario['order_rate']), place_random_order)
+    clock.get_clock().run_until(scenario['duration'] + 2, condition=lambda: not session.session_active)
+    session.stop_update_loop()
+
+    path = path[:samples]
+    drawdown = (1 - path / np.maximum.accumulate(path, axis=0)).max(axis=0)
+    pnl = [market_state.calculate_portfolio_value(team_id) - start_values[team_id]
+           for team_id in range(TEAM_COUNT)]
+    return market_state.store.columns['price'][ids].copy(), drawdown, pnl
+
+def _run_chunk(scenario, seed_sequences):
+    """Worker entry point: simulate a chunk of sessions and return only summary arrays."""
+    fluctuation = market_simulation.PRICE_FLUCTUATION
+    saved = {key: dict(value) for key, value in fluctuation.items()}
+    for key, overrides in scenario['price_fluctuation'].items():
+        fluctuation.setdefault(key, {}).update(overrides)
+    try:
+        results = [_simulate_session(scenario, seed_sequence) for seed_sequence in seed_sequences]
+    finally:
+        fluctuation.clear()
+        fluctuation.update(saved)
+    final_prices, drawdowns, pnl = zip(*results)
+    return np.array(final_prices), np.array(drawdowns), np.array(pnl)
+
+def run_scenarios(sessions, scenario=None, seed=0, workers=None, chunk_size=None):
+    """Simulate ``sessions`` independent sessions across a process pool.
+
+    Each session gets its own RNG stream spawned from ``seed``, so results do
+    not depend on the number of workers or on how sessions are chunked.
+    """
+    scenario = dict(DEFAULT_SCENARIO, **(scenario or {}))
+    unknown = set(scenario) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown scenario settings: {', '.join(sorted(unknown))}")
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-sessions // (workers * 4)))  # ~4 chunks per worker for load balancing
+    seed_sequences = np.random.SeedSequence(seed).spawn(sessions)
+    chunks = [seed_sequences[i:i + chunk_size] for i in range(0, sessions, chunk_size)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        results = list(executor.map(_run_chunk, [scenario] * len(chunks), chunks))
+    elapsed = time.perf_counter() - start
+
+    final_prices, drawdowns, pnl = (np.concatenate(arrays) for arrays in zip(*results))
+    return ScenarioSummary(list(market_state.STOCK_DETAILS), list(range(TEAM_COUNT)),
+                           final_prices, drawdowns, pnl, elapsed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo distribution of simulated sessions")
+    parser.add_argument('-n', '--sessions', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--duration', type=int, default=DEFAULT_SCENARIO['duration'])
+    parser.add_argument('--order-rate', type=float, default=DEFAULT_SCENARIO['order_rate'])
+    parser.add_argument('--interval', type=float, help="UPDATE_INTERVAL for every stock")
+    args = parser.parse_args(argv)
+
+    scenario = {'duration': args.duration, 'order_rate': args.order_rate}
+    if args.interval:
+        scenario['price_fluctuation'] = {'DEFAULT': {'UPDATE_INTERVAL': args.interval}}
+    print(run_scenarios(args.sessions, scenario, args.seed, args.workers).report())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import heapq
+import math
+
+import numpy as np
+
+class UpdateScheduler:
+    """Priority queue of per-symbol update times.
+
+    Each entry is (due time, symbol ID, interval). Popping the due symbols
+    costs O(k log n) for k due symbols, so symbols that are not due are
+    never touched. Rescheduling is anchored to the previous due time rather
+    than to the time the tick actually ran, so a late tick does not make the
+    cadence drift; ticks missed entirely (e.g. while paused) are skipped.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._scheduled = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, symbol_id):
+        return symbol_id in self._scheduled
+
+    def add(self, symbol_id, interval, now):
+        """Schedule a symbol's first update one interval from ``now``."""
+        if interval <= 0:
+            raise ValueError(f"Update interval must be positive, got {interval}")
+        if symbol_id in self._scheduled:
+            return
+        self._scheduled.add(symbol_id)
+        heapq.heappush(self._heap, (now + interval, symbol_id, interval))
+
+    def next_due(self):
+        """Time of the earliest scheduled update, or None if nothing is scheduled."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Return the IDs of every symbol due at ``now`` and reschedule them."""
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            due_time, symbol_id, interval = heap[0]
+            # Next slot on the original grid that is still in the future
+            missed = math.floor((now - due_time) / interval)
+            heapq.heapreplace(heap, (due_time + (missed + 1) * interval, symbol_id, interval))
+            due.append(symbol_id)
+        return np.array(due, dtype=np.int64)
+
+    def clear(self):
+        self._heap.clear()
+        self._scheduled.clear()
@@ -0,0 +1,78 @@
+import threading
+from types import MappingProxyType
+
+import numpy as np
+
+class MarketSnapshot:
+    """Read-only view of the market at one store version.
+
+    The mappings are read-only and never change once built, so a snapshot
+    can be handed to any number of readers, on any thread, without copying.
+    """
+
+    __slots__ = ('version', 'symbols', 'prices', 'quantities', 'volumes', 'price_changes')
+
+    def __init__(self, version, symbols, prices, quantities, volumes, price_changes):
+        self.version = version
+        self.symbols = tuple(symbols)  # Listed symbols in listing order
+        self.prices = MappingProxyType(prices)
+        self.quantities = MappingProxyType(quantities)
+        self.volumes = MappingProxyType(volumes)
+        self.price_changes = MappingProxyType(price_changes)  # Percent change since the last price
+
+    def __repr__(self):
+        return f"MarketSnapshot(version {self.version}, {len(self.symbols)} symbols)"
+
+class SnapshotCache:
+    """Builds a MarketSnapshot at most once per store version.
+
+    current() returns the cached snapshot while ``store.version`` is
+    unchanged, so readers polling faster than the market moves share one
+    object. Readers keep the version they last drew and skip their
+    redraw when it has not changed.
+
+    Builds take no state locks. A build that overlaps a write (the version
+    moved while it ran) is retried, up to RETRIES times, so writers are
+    never blocked by readers.
+    """
+
+    RETRIES = 3
+
+    def __init__(self, store):
+        self.store = store
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.store.version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            # Read the version first so a write during the build makes the next call rebuild
+            version = self.store.version
+            if snapshot is None or snapshot.version != version:
+                for _ in range(self.RETRIES):
+                    snapshot = self._build(version)
+                    if self.store.version == version:
+                        break
+                    version = self.store.version
+                self._snapshot = snapshot
+        return snapshot
+
+    def _build(self, version):
+        store = self.store
+        ids = store.listed_ids('price')
+        symbols = store.symbols_for(ids)
+        prices = store.column('price')[ids]
+        # Symbols without a last price count as unchanged
+        last = np.where(store.mask('last_price')[ids], store.column('last_price')[ids], prices)
+        changes = (prices - last) / last * 100
+        return MarketSnapshot(
+            version,
+            symbols,
+            dict(zip(symbols, prices.tolist())),
+            store.view('quantity').copy(),
+            store.view('volume').copy(),
+            dict(zip(symbols, changes.tolist()))
+        )
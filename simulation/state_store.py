@@ -0,0 +1,183 @@
+import threading
+from collections.abc import MutableMapping
+
+import numpy as np
+
+class SymbolRegistry:
+    """Stable symbol <-> integer ID mapping. IDs are assigned in listing order and never reused."""
+
+    def __init__(self):
+        self._ids = {}
+        self.symbols = []
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._ids
+
+    def get(self, symbol):
+        """Return the ID for a symbol, or None if it was never listed."""
+        return self._ids.get(symbol)
+
+    def register(self, symbol):
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self._ids[symbol] = symbol_id
+            self.symbols.append(symbol)
+        return symbol_id
+
+# Column name -> dtype
+COLUMNS = {
+    'price': np.float64,
+    'last_price': np.float64,
+    'quantity': np.int64,
+    'volume': np.int64,
+}
+
+HISTORY_LENGTH = 100  # Prices kept per symbol in the history ring buffer
+
+class MarketStateStore:
+    """Columnar market state: one contiguous NumPy array per field, indexed by symbol ID.
+
+    Each column also has a presence mask so the dict views keep dict
+    semantics (a symbol can have a price before it has a volume). Arrays
+    grow by doubling when new symbols are listed. Recent prices are kept in
+    a (symbol, HISTORY_LENGTH) ring buffer.
+
+    ``version`` counts writes. The dict views bump it themselves; code that
+    writes a column array directly must call touch() afterwards.
+    """
+
+    def __init__(self, capacity=64):
+        self.registry = SymbolRegistry()
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in COLUMNS.items()}
+        self.present = {name: np.zeros(capacity, dtype=bool) for name in COLUMNS}
+        self.history = np.zeros((capacity, HISTORY_LENGTH))
+        self.history_cursor = np.zeros(capacity, dtype=np.int64)
+        self.history_count = np.zeros(capacity, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def touch(self):
+        """Record a write made directly to the column arrays."""
+        self.version += 1
+
+    def add_symbol(self, symbol):
+        """Return the ID for a symbol, registering it (e.g. for an IPO) if new."""
+        symbol_id = self.registry.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+        with self._lock:
+            symbol_id = self.registry.get(symbol)
+            if symbol_id is None:
+                if len(self.registry) == self.capacity:
+                    self._grow()
+                symbol_id = self.registry.register(symbol)
+        return symbol_id
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for arrays in (self.columns, self.present):
+            for name, array in arrays.items():
+                arrays[name] = _grown(array, new_capacity)
+        self.history = _grown(self.history, new_capacity)
+        self.history_cursor = _grown(self.history_cursor, new_capacity)
+        self.history_count = _grown(self.history_count, new_capacity)
+        self.capacity = new_capacity
+
+    def append_history(self, ids, prices):
+        """Push one price per symbol ID onto the history ring buffer."""
+        cursor = self.history_cursor[ids]
+        self.history[ids, cursor] = prices
+        self.history_cursor[ids] = (cursor + 1) % HISTORY_LENGTH
+        self.history_count[ids] = np.minimum(self.history_count[ids] + 1, HISTORY_LENGTH)
+
+    def clear_history(self):
+        self.history_count[:] = 0
+        self.history_cursor[:] = 0
+
+    def history_for(self, symbol):
+        """Recent prices for a symbol, oldest first."""
+        symbol_id = self.registry.get(symbol)
+        if symbol_id is None:
+            return []
+        count = self.history_count[symbol_id]
+        order = (self.history_cursor[symbol_id] - count + np.arange(count)) % HISTORY_LENGTH
+        return self.history[symbol_id, order].tolist()
+
+    def column(self, name):
+        """Array of ``name`` values for every registered symbol (a view, not a copy)."""
+        return self.columns[name][:len(self.registry)]
+
+    def mask(self, name):
+        """Boolean array marking which symbols have a value in column ``name``."""
+        return self.present[name][:len(self.registry)]
+
+    def listed_ids(self, name='price'):
+        """IDs of the symbols present in column ``name``, in listing order."""
+        return np.flatnonzero(self.mask(name))
+
+    def symbols_for(self, ids):
+        symbols = self.registry.symbols
+        return [symbols[i] for i in ids]
+
+    def view(self, name):
+        return ColumnView(self, name)
+
+def _grown(array, capacity):
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class ColumnView(MutableMapping):
+    """Dict-compatible view of one store column keyed by ticker."""
+
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+        self._cast = float if COLUMNS[name] is np.float64 else int
+
+    def _id(self, symbol):
+        symbol_id = self._store.registry.get(symbol)
+        if symbol_id is None or not self._store.present[self._name][symbol_id]:
+            raise KeyError(symbol)
+        return symbol_id
+
+    def __getitem__(self, symbol):
+        return self._cast(self._store.columns[self._name][self._id(symbol)])
+
+    def __setitem__(self, symbol, value):
+        symbol_id = self._store.add_symbol(symbol)
+        self._store.columns[self._name][symbol_id] = value
+        self._store.present[self._name][symbol_id] = True
+        self._store.version += 1
+
+    def __delitem__(self, symbol):
+        self._store.present[self._name][self._id(symbol)] = False
+        self._store.version += 1
+
+    def __contains__(self, symbol):
+        symbol_id = self._store.registry.get(symbol)
+        return symbol_id is not None and bool(self._store.present[self._name][symbol_id])
+
+    def __iter__(self):
+        return iter(self._store.symbols_for(self._store.listed_ids(self._name)))
+
+    def __len__(self):
+        return int(np.count_nonzero(self._store.mask(self._name)))
+
+    def clear(self):
+        self._store.mask(self._name)[:] = False
+        self._store.version += 1
+
+    def copy(self):
+        """Plain dict snapshot of the column."""
+        ids = self._store.listed_ids(self._name)
+        values = self._store.column(self._name)[ids].tolist()
+        return dict(zip(self._store.symbols_for(ids), values))
+
+    def __repr__(self):
+        return repr(self.copy())
@@ -0,0 +1,45 @@
+import threading
+
+FEED_LENGTH = 1000  # Most recent trades kept in the feed
+
+class TradeFeed:
+    """Append-only feed of trades across all teams, backed by a ring buffer.
+
+    Every entry gets the next sequence number, starting at 1 and never
+    reused (clear() keeps counting). Readers keep the last sequence number
+    they saw and ask for what came after it, so a refresh costs O(new
+    entries) however many trades came before. Readers that fall more than
+    FEED_LENGTH entries behind skip ahead to the oldest entry still kept.
+    """
+
+    def __init__(self, capacity=FEED_LENGTH):
+        self.capacity = capacity
+        self._entries = [None] * capacity
+        self.last_seq = 0
+        self.first_seq = 1  # Oldest sequence number still in the buffer
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.last_seq - self.first_seq + 1
+
+    def append(self, entry):
+        """Add a trade and return its sequence number."""
+        with self._lock:
+            self.last_seq += 1
+            self._entries[self.last_seq % self.capacity] = entry
+            if self.last_seq - self.first_seq >= self.capacity:
+                self.first_seq = self.last_seq - self.capacity + 1
+            return self.last_seq
+
+    def since(self, seq, limit=None):
+        """[(seq, entry)] for entries after ``seq``, oldest first; only the newest ``limit`` if given."""
+        with self._lock:
+            start = max(seq + 1, self.first_seq)
+            if limit is not None:
+                start = max(start, self.last_seq - limit + 1)
+            return [(n, self._entries[n % self.capacity]) for n in range(start, self.last_seq + 1)]
+
+    def clear(self):
+        with self._lock:
+            self._entries = [None] * self.capacity
+            self.first_seq = self.last_seq + 1
@@ -0,0 +1,104 @@
+import threading
+from collections import deque
+
+from config import TRANSACTION_TAIL_LENGTH
+
+FIELDS = ('timestamp', 'type', 'stock', 'quantity', 'price', 'total_value',
+          'counterparty', 'amount', 'old_balance', 'new_balance')
+
+class Transaction:
+    """One portfolio transaction; fields that do not apply to its type are None."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, timestamp, type, stock=None, quantity=None, price=None, total_value=None,
+                 counterparty=None, amount=None, old_balance=None, new_balance=None):
+        self.timestamp = timestamp
+        self.type = type  # 'buy', 'sell', 'transfer_in', 'transfer_out' or 'cash_adjustment'
+        self.stock = stock
+        self.quantity = quantity
+        self.price = price
+        self.total_value = total_value
+        self.counterparty = counterparty
+        self.amount = amount
+        self.old_balance = old_balance
+        self.new_balance = new_balance
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(**{field: entry[field] for field in FIELDS if field in entry})
+
+    def as_tuple(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def as_dict(self, team_id):
+        entry = {'team_id': team_id}
+        for field in FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                entry[field] = value
+        return entry
+
+def _db():
+    # Looked up on each use: backtests and scenario workers swap market_state.db for a scratch DB
+    from . import market_state
+    return market_state.db
+
+class TransactionLog:
+    """A team's transaction history: the newest records in memory, older ones on disk.
+
+    At most ``tail_length`` records are kept in memory. Appending to a full
+    tail spills the oldest record to the transactions table through the
+    write-behind queue, so memory per team stays flat however long the
+    event runs. Spills go to whatever market_state.db is at the time, so
+    a backtest or scenario run on a scratch DB never touches the live one.
+    Iterating the log yields the in-memory tail as dicts; history()
+    streams everything recorded since the last reset, oldest first,
+    reading the spilled part from the database page by page; records
+    appended after it starts are not included. With persistence disabled
+    the spilled records are dropped.
+    """
+
+    def __init__(self, team_id, records=(), tail_length=TRANSACTION_TAIL_LENGTH):
+        self.team_id = team_id
+        # Records passed in (e.g. from a warm restart) were spilled, if at all, by the run that made them
+        self._tail = deque((Transaction.from_dict(entry) for entry in records), maxlen=tail_length)
+        self._lock = threading.Lock()  # Keeps a spill and its tail append together for history()
+
+    def __len__(self):
+        return len(self._tail)
+
+    def __iter__(self):
+        team_id = self.team_id
+        return (record.as_dict(team_id) for record in self._tail)
+
+    def append(self, entry):
+        """Record a transaction dict as built by market_state."""
+        record = Transaction.from_dict(entry)
+        tail = self._tail
+        with self._lock:
+            if len(tail) == tail.maxlen:
+                _db().log_transaction(self.team_id, tail[0].as_tuple())
+            tail.append(record)
+
+    def recent(self, n=None):
+        """The ``n`` newest transactions (the whole tail by default) as dicts, oldest first."""
+        tail = self._tail
+        start = 0 if n is None else max(len(tail) - n, 0)
+        team_id = self.team_id
+        return [tail[i].as_dict(team_id) for i in range(start, len(tail))]
+
+    def history(self, chunk_size=500):
+        """Stream the team's full transaction history, oldest first."""
+        team_id = self.team_id
+        db = _db()
+        # Copy the tail and mark where the spilled part ends in one step, so a
+        # record spilled while the caller iterates is neither lost nor repeated
+        with self._lock:
+            tail = list(self._tail)
+            db.flush()
+            last_id = db.last_transaction_id(team_id)
+        for row in db.iter_transactions(team_id, until_id=last_id, columns=FIELDS, chunk_size=chunk_size):
+            yield Transaction(*row).as_dict(team_id)
+        for record in tail:
+            yield record.as_dict(team_id)
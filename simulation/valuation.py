@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+
+class HoldingsIndex:
+    """Mark-to-market holdings value per team, kept up to date incrementally.
+
+    ``holders`` maps symbol ID -> {team_id: quantity}, the reverse of every
+    portfolio's holdings. Team values are carried at the ``marked`` price of
+    each symbol; mark() compares the price column with those marks in one
+    vectorized pass and adjusts only the holders of symbols that moved by
+    (price change x quantity). A valuation therefore costs
+    O(changed symbols x holders) rather than O(teams x holdings).
+
+    Teams whose value may have changed are collected in ``dirty`` until
+    take_dirty() hands them to the leaderboard.
+
+    Every method takes the index's own lock, which is never held while
+    taking another lock, so it is safe to call with symbol or team locks held.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.holders = {}
+            self.values = {}  # team_id -> holdings value at the marked prices
+            self.marked = np.zeros(0)
+            self.dirty = set()
+
+    def rebuild(self, portfolios):
+        """Recompute the index from scratch, e.g. after a reset or warm restart."""
+        with self._lock:
+            self.reset()
+            for team_id, portfolio in portfolios.items():
+                self.values[team_id] = 0.0
+                self.dirty.add(team_id)
+                for stock, quantity in portfolio['holdings'].items():
+                    self.adjust(team_id, stock, quantity)
+
+    def adjust(self, team_id, stock, delta):
+        """Record that a team's holding of ``stock`` changed by ``delta`` shares."""
+        symbol_id = self.store.add_symbol(stock)
+        with self._lock:
+            self._sync()
+            holders = self.holders.setdefault(symbol_id, {})
+            quantity = holders.get(team_id, 0) + delta
+            if quantity:
+                holders[team_id] = quantity
+            else:
+                holders.pop(team_id, None)
+            self.values[team_id] = self.values.get(team_id, 0.0) + delta * float(self.marked[symbol_id])
+            self.dirty.add(team_id)
+
+    def drop_team(self, team_id):
+        """Forget every holding of a team whose portfolio was reset."""
+        with self._lock:
+            for holders in self.holders.values():
+                holders.pop(team_id, None)
+            self.values[team_id] = 0.0
+            self.dirty.add(team_id)
+
+    def touch(self, team_id):
+        """Flag a team whose value changed outside its holdings (e.g. cash)."""
+        with self._lock:
+            self.dirty.add(team_id)
+
+    def take_dirty(self):
+        """Return and reset the set of teams whose value may have changed."""
+        with self._lock:
+            self.mark()
+            dirty, self.dirty = self.dirty, set()
+            return dirty
+
+    def mark(self):
+        """Bring every team's value up to the current prices."""
+        with self._lock:
+            self._sync()
+            prices = self.store.columns['price'][:self.marked.size]
+            changed = np.flatnonzero(prices != self.marked)
+            if not changed.size:
+                return
+            values = self.values
+            dirty = self.dirty
+            moves = prices[changed] - self.marked[changed]
+            for symbol_id, move in zip(changed.tolist(), moves.tolist()):
+                holders = self.holders.get(symbol_id)
+                if holders:
+                    for team_id, quantity in holders.items():
+                        values[team_id] += move * quantity
+                    dirty.update(holders)
+            self.marked[changed] += moves
+
+    def value(self, team_id):
+        """Current holdings value of one team."""
+        with self._lock:
+            self.mark()
+            return self.values.get(team_id, 0.0)
+
+    def _sync(self):
+        # Symbols listed since the last call start out marked at their current price
+        count = len(self.store.registry)
+        if self.marked.size < count:
+            self.marked = np.concatenate([self.marked, self.store.columns['price'][self.marked.size:count]])
@@ -0,0 +1,56 @@
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# The module-level data.db.db opens its file on import; keep it off the tracked data/simulation.db
+_default_db_dir = tempfile.mkdtemp(prefix='tradewars-test-')
+atexit.register(shutil.rmtree, _default_db_dir, ignore_errors=True)
+os.environ['TRADEWARS_DB_PATH'] = os.path.join(_default_db_dir, 'simulation.db')
+
+import data.db
+from data.db import SimulationDB
+from simulation import clock, market_simulation, market_state
+from simulation.rng import random_streams
+from utils.logger import logger
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    saved_level = logger.level
+    logger.setLevel(logging.WARNING)
+    yield
+    logger.setLevel(saved_level)
+
+@pytest.fixture
+def virtual_clock():
+    """Install a VirtualClock starting at t=1000 for the duration of the test."""
+    virtual = clock.VirtualClock(start=1000.0)
+    saved = clock.set_clock(virtual)
+    yield virtual
+    clock.set_clock(saved)
+
+@pytest.fixture
+def default_db():
+    """The engine's default database, which in tests lives in a temporary directory."""
+    assert data.db.db.db_path == os.environ['TRADEWARS_DB_PATH']
+    return data.db.db
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """Point the engine at a throwaway database instead of the default one."""
+    database = SimulationDB(str(tmp_path / 'test.db'), mode='sync')
+    saved = market_state.db, market_simulation.db
+    market_state.db = market_simulation.db = database
+    yield database
+    market_state.db, market_simulation.db = saved
+    database.close()
+
+@pytest.fixture
+def market(scratch_db, virtual_clock):
+    """A freshly initialized market on a scratch DB and a virtual clock."""
+    random_streams.reseed(0)
+    market_state.initialize_market()
+    return market_state
@@ -0,0 +1,35 @@
+import sqlite3
+
+from simulation import market_state
+from simulation.backtest import backtest
+
+TABLES = ('orders', 'events', 'transactions', 'event_journal', 'price_ticks', 'portfolio_snapshots')
+
+def _row_counts(database):
+    database.flush()
+    conn = sqlite3.connect(database.db_path)
+    try:
+        return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in TABLES}
+    finally:
+        conn.close()
+
+def _record_orders(count):
+    """Fill the active DB with ``count`` alternating buy/sell orders, enough to spill team 0."""
+    for i in range(count):
+        order = {'stock': 'NOVA', 'type': 'buy' if i % 2 == 0 else 'sell', 'quantity': 1}
+        assert market_state.process_market_order(0, order)
+
+def test_backtest_leaves_live_db_unchanged(market, scratch_db, default_db):
+    _record_orders(500)
+    live_counts = _row_counts(scratch_db)
+    default_counts = _row_counts(default_db)
+    assert live_counts['orders'] == 500
+    assert live_counts['transactions'] == 300
+
+    result = backtest(source=scratch_db, session_duration=5)
+
+    assert result.orders == 500
+    assert result.orders_executed == 500
+    assert market_state.db is scratch_db
+    assert _row_counts(scratch_db) == live_counts
+    assert _row_counts(default_db) == default_counts
@@ -0,0 +1,91 @@
+import threading
+
+from simulation import market_state
+from simulation.checkpoint import load_checkpoint, warm_start, write_checkpoint
+from simulation.replay import replay_journal
+from simulation.transactions import TransactionLog
+
+def _trade():
+    for team_id, stock, order_type, quantity in ((0, 'NOVA', 'buy', 10), (1, 'FIN', 'buy', 5),
+                                                 (0, 'NOVA', 'sell', 4), (2, 'MED', 'buy', 7)):
+        assert market_state.process_market_order(team_id, {'stock': stock, 'type': order_type,
+                                                           'quantity': quantity})
+    assert market_state.transfer_stock(2, 3, 'MED', 2)
+    assert market_state.adjust_cash(4, 250.0)
+
+def _live_state():
+    return (dict(market_state.stock_prices), dict(market_state.available_quantities),
+            {team_id: (portfolio['cash'], dict(portfolio['holdings']), list(portfolio['transactions']))
+             for team_id, portfolio in market_state.team_portfolios.items()})
+
+def _replayed_state(state):
+    # Replayed tails are plain dicts until restore_market_state wraps them in a TransactionLog
+    return (state.stock_prices, state.available_quantities,
+            {team_id: (portfolio['cash'], portfolio['holdings'],
+                       TransactionLog(team_id, portfolio['transactions']).recent())
+             for team_id, portfolio in state.team_portfolios.items()})
+
+def test_journal_replay_matches_live_state(market):
+    _trade()
+    assert _replayed_state(replay_journal()) == _live_state()
+
+def test_checkpoint_round_trip(market, tmp_path):
+    _trade()
+    path = str(tmp_path / 'checkpoint.bin')
+    seq = write_checkpoint(path, session=3)
+
+    state = load_checkpoint(path)
+    assert state.last_seq == seq == market_state.db.event_journal.last_seq
+    assert state.session == 3
+    assert _replayed_state(state) == _live_state()
+
+def test_corrupt_checkpoint_is_ignored(market, tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    write_checkpoint(str(path))
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert load_checkpoint(str(path)) is None
+
+def test_warm_start_replays_only_events_after_checkpoint(market, tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    _trade()
+    write_checkpoint(path)
+    _trade()
+    expected = _live_state()
+
+    state = warm_start(path)
+    assert state.last_seq == market_state.db.event_journal.last_seq
+    assert _live_state() == expected
+
+def test_write_during_checkpoint_is_not_replayed_twice(market, tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    journal = market_state.db.event_journal
+    writers = []
+
+    class RacingJournal:
+        """Starts a deposit on another thread just after the checkpoint reads the sequence number."""
+
+        @property
+        def last_seq(self):
+            seq = journal.last_seq
+            writer = threading.Thread(target=market_state.adjust_cash, args=(0, 1.0))
+            writer.start()
+            writer.join(0.2)  # Blocks on the team lock if the checkpoint holds it
+            writers.append(writer)
+            return seq
+
+        def __getattr__(self, name):
+            return getattr(journal, name)
+
+    market_state.db.event_journal = RacingJournal()
+    try:
+        write_checkpoint(path)
+    finally:
+        market_state.db.event_journal = journal
+    writers[0].join()
+    expected = market_state.team_portfolios[0]['cash']
+    assert expected == market_state.STARTING_BUDGET + 1.0
+
+    warm_start(path)
+    assert market_state.team_portfolios[0]['cash'] == expected
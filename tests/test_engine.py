@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from simulation import market_state
+from simulation.engine import (MarketEngine, PlaceOrder, AdjustCash, StartSession, PauseSession,
+                               EndSession)
+from simulation.market_simulation import market_session
+
+class Replies:
+    """Collects engine callbacks and lets the test wait for them."""
+
+    def __init__(self):
+        self.items = []
+        self._done = threading.Event()
+        self.expected = 0
+
+    def __call__(self, command, result, error):
+        self.items.append((command, result, error))
+        if len(self.items) >= self.expected:
+            self._done.set()
+
+    def wait(self, count, timeout=5.0):
+        self.expected = count
+        if len(self.items) >= count:
+            return self.items
+        assert self._done.wait(timeout), f"only {len(self.items)} of {count} replies arrived"
+        return self.items
+
+@pytest.fixture
+def engine(market, monkeypatch):
+    monkeypatch.setattr(market_session, 'checkpoint_path', None)
+    engine = MarketEngine()
+    yield engine
+    engine.stop()
+    if market_session.session_active:
+        market_session.end_session()
+
+def test_session_commands_run_on_engine_thread(engine, monkeypatch):
+    threads = []
+    start = market_session.start_session
+    monkeypatch.setattr(market_session, 'start_session',
+                        lambda: threads.append(threading.current_thread().name) or start())
+    engine.start()
+    replies = Replies()
+    engine.submit_all([StartSession(), PauseSession(), EndSession()], replies)
+
+    assert [(type(command), result, error) for command, result, error in replies.wait(3)] == [
+        (StartSession, True, None), (PauseSession, True, None), (EndSession, True, None)]
+    assert threads == ['market-engine']
+    assert not market_session.session_active
+
+def test_failing_timer_callback_does_not_kill_engine(engine):
+    engine.start()
+    fired = threading.Event()
+    engine.clock.call_later(0, lambda: 1 / 0)
+    engine.clock.call_later(0.01, fired.set)
+
+    assert fired.wait(5.0)
+    assert engine.running
+    replies = Replies()
+    engine.submit(PauseSession(), replies)
+    assert replies.wait(1)[0][2] is None
+
+def test_submit_raises_once_engine_thread_has_died(engine, monkeypatch):
+    engine.start()
+    monkeypatch.setattr(engine, '_apply', lambda items: 1 / 0)
+    engine.submit(PauseSession())
+    engine._thread.join(5.0)
+
+    with pytest.raises(RuntimeError):
+        engine.submit(PauseSession())
+
+@pytest.fixture
+def order_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(market_state, 'order_batch_listeners', [batches.append])
+    return batches
+
+def test_consecutive_orders_are_placed_as_one_batch(engine, order_batches):
+    engine.start()
+    replies = Replies()
+    engine.submit_all([PlaceOrder(team_id, 'NOVA', 10, 'buy') for team_id in range(3)], replies)
+
+    assert [error for _, _, error in replies.wait(3)] == [None, None, None]
+    assert [len(batch) for batch in order_batches] == [3]
+    assert [portfolio['holdings'].get('NOVA') for portfolio in
+            (market_state.team_portfolios[team_id] for team_id in range(3))] == [10, 10, 10]
+
+def test_other_commands_split_order_batches_and_keep_their_place(engine, order_batches):
+    replies = Replies()
+    engine.submit_all([PlaceOrder(0, 'NOVA', 10, 'buy'), PlaceOrder(1, 'NOVA', 10, 'buy'),
+                       AdjustCash(2, 500), PlaceOrder(2, 'NOVA', 10, 'buy')], replies)
+
+    assert [type(command) for command, _, _ in replies.wait(4)] == [
+        PlaceOrder, PlaceOrder, AdjustCash, PlaceOrder]
+    assert [[result['index'] for result in batch] for batch in order_batches] == [[0, 1], [0]]
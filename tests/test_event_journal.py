@@ -0,0 +1,7 @@
+from simulation import market_state
+
+def test_journal_uses_engine_clock(market, virtual_clock):
+    virtual_clock.advance(42)
+    market_state.adjust_cash(0, 1.0)
+    events = list(market_state.db.iter_journal(event_types=('reset', 'cash')))
+    assert [(event_type, ts) for _, ts, event_type, _ in events] == [('reset', 1000.0), ('cash', 1042.0)]
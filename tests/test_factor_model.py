@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from simulation.factor_model import FactorModel
+
+DETAILS = {'A': {'sector': 'Tech'}, 'B': {'sector': 'Tech'}, 'C': {'sector': 'Energy'}}
+
+def test_symbol_returns_keep_volatility_and_sector_correlation():
+    model = FactorModel(DETAILS, volatility=0.01, market_share=0.3, sector_share=0.3,
+                        sector_correlation=0.2)
+    model.add_symbols(['A', 'B', 'C', 'IPO'])
+    correlation = model.correlation()
+
+    assert correlation[0, 1] == pytest.approx(0.6)  # Same sector: market + sector share
+    assert correlation[0, 2] == pytest.approx(0.3 + 0.3 * 0.2)  # Different sectors
+    assert correlation[0, 3] == pytest.approx(np.sqrt(0.3 * 0.3))  # IPO loads on the market only
+
+    rng = np.random.default_rng(0)
+    returns = np.array([model.sample(rng, np.arange(4)) for _ in range(20000)])
+    assert returns.std(axis=0) == pytest.approx([0.01] * 4, rel=0.05)
+
+def test_sector_moves_are_correlated_draws():
+    model = FactorModel(DETAILS, volatility=0.02, market_share=0.3, sector_share=0.3,
+                        sector_correlation=0.2)
+    rng = np.random.default_rng(0)
+    moves = np.array([model.sector_moves(rng) for _ in range(20000)])
+
+    assert moves.shape == (20000, len(model.sectors))
+    assert moves.std(axis=0) == pytest.approx([0.02, 0.02], rel=0.05)
+    assert np.corrcoef(moves.T)[0, 1] == pytest.approx((0.3 + 0.3 * 0.2) / 0.6, abs=0.03)
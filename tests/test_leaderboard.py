@@ -0,0 +1,52 @@
+from simulation.leaderboard import Leaderboard
+
+def _board(values):
+    board = Leaderboard()
+    board.update_many(values)
+    return board
+
+def test_orders_by_value_with_team_id_breaking_ties():
+    board = _board({0: 100.0, 1: 300.0, 2: 200.0, 3: 200.0})
+
+    assert board.top() == [(1, 300.0), (2, 200.0), (3, 200.0), (0, 100.0)]
+    assert board.top(2) == [(1, 300.0), (2, 200.0)]
+    assert [board.rank(team_id) for team_id in range(4)] == [4, 1, 2, 3]
+    assert board.rank(9) is None
+
+def test_single_update_moves_one_team_and_records_who_shifted():
+    board = _board({team_id: 100.0 * (10 - team_id) for team_id in range(10)})
+    version = board.version
+
+    board.update(7, 650.0)  # From 8th place to 5th, passing teams 4, 5 and 6
+    assert [team_id for team_id, _ in board.top()] == [0, 1, 2, 3, 7, 4, 5, 6, 8, 9]
+    assert board.changed_since(version) == {4, 5, 6, 7}
+
+    board.update(7, 650.0)  # Unchanged value: new version, no rank changes
+    assert board.changed_since(version + 1) == set()
+
+def test_bulk_update_matches_a_full_sort():
+    values = {team_id: float((team_id * 37) % 11) for team_id in range(20)}
+    board = _board(values)
+    changes = {0: 50.0, 5: -1.0, 6: 3.5, 19: 10.0, 12: 0.0, 2: 7.25}
+    board.update_many(changes)
+
+    values.update(changes)
+    expected = sorted(values.items(), key=lambda item: (-item[1], item[0]))
+    assert board.top() == expected
+
+def test_remove_shifts_the_teams_below():
+    board = _board({0: 300.0, 1: 200.0, 2: 100.0})
+    version = board.version
+
+    assert board.remove(0)
+    assert not board.remove(0)
+    assert board.top() == [(1, 200.0), (2, 100.0)]
+    assert board.changed_since(version) == {1, 2}
+
+def test_value_change_without_rank_change_is_recorded():
+    board = _board({0: 300.0, 1: 200.0, 2: 100.0})
+    version = board.version
+
+    board.update(1, 250.0)
+    assert [team_id for team_id, _ in board.top()] == [0, 1, 2]
+    assert board.changed_since(version) == {1}
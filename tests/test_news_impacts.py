@@ -0,0 +1,28 @@
+import pytest
+
+from simulation import market_state
+from simulation.news_impacts import NewsImpactEngine
+
+def test_glide_reaches_target_and_records_each_step(market):
+    impacts = NewsImpactEngine(market_state.store)
+    start = market_state.stock_prices['NOVA']
+    assert impacts.add(['NOVA', 'NOPE'], 10, duration=4) == ['NOVA']
+
+    for _ in range(2):
+        impacts.step(1.0)
+    assert market_state.stock_prices['NOVA'] == pytest.approx(start * 1.05)
+    impacts.finish()
+
+    assert market_state.stock_prices['NOVA'] == pytest.approx(start * 1.10)
+    assert len(impacts) == 0
+    assert list(market_state.get_price_history('NOVA')) == pytest.approx(
+        [start * 1.025, start * 1.05, start * 1.10])
+
+def test_overlapping_impacts_add_up(market):
+    impacts = NewsImpactEngine(market_state.store)
+    start = market_state.stock_prices['FIN']
+    impacts.add(['FIN'], 10, duration=2)
+    impacts.add(['FIN'], -20, duration=2, easing='ease_in_out')
+
+    impacts.step(2.0)
+    assert market_state.stock_prices['FIN'] == pytest.approx(start * 0.9)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from simulation import market_state
+
+def _order(team_id, stock, order_type, quantity):
+    return {'team_id': team_id, 'stock': stock, 'type': order_type, 'quantity': quantity}
+
+def _pending(orders):
+    return [{'index': index, 'status': 'pending'} for index in range(len(orders))]
+
+def test_validation_replays_execution_exactly(market):
+    rng = np.random.default_rng(7)
+    stocks = list(market_state.STOCK_DETAILS)
+    statuses = set()
+    for _ in range(10):
+        orders = [_order(int(rng.integers(3)), stocks[rng.integers(len(stocks))],
+                         'buy' if rng.random() < 0.6 else 'sell', int(rng.integers(1, 400)))
+                  for _ in range(40)]
+        predicted = _pending(orders)
+        expected = market_state._check_batch(orders, predicted)
+
+        results = market_state.process_orders_batch(orders)
+        assert [result['status'] for result in results] == [
+            'executed' if result['status'] == 'pending' else result['status'] for result in predicted]
+        assert {result['index']: result['price'] for result in results
+                if result['status'] == 'executed'} == expected
+        statuses.update(result['status'] for result in results)
+    assert statuses == {'executed', 'failed'}
+
+def test_all_or_nothing_rejects_batch_that_runs_out_of_cash(market):
+    budget = market_state.team_portfolios[0]['cash']
+    price = market_state.stock_prices['NOVA']
+    quantity = int(budget / price * 0.6)
+    before = (market_state.team_portfolios[0]['cash'], dict(market_state.available_quantities))
+
+    # Each order is affordable on its own; the second is not after the first
+    results = market_state.process_orders_batch([_order(0, 'NOVA', 'buy', quantity // 2),
+                                                 _order(0, 'FIN', 'buy', 1),
+                                                 _order(0, 'NOVA', 'buy', quantity)],
+                                                all_or_nothing=True)
+
+    assert [result['status'] for result in results] == ['skipped', 'skipped', 'failed']
+    assert (market_state.team_portfolios[0]['cash'], dict(market_state.available_quantities)) == before
+    assert market_state.team_portfolios[0]['transactions'].recent() == []
+
+def test_sell_can_use_shares_bought_earlier_in_batch(market):
+    results = market_state.process_orders_batch([_order(1, 'MED', 'buy', 10), _order(1, 'MED', 'sell', 10),
+                                                 _order(1, 'MED', 'sell', 1)])
+    assert [result['status'] for result in results] == ['executed', 'executed', 'failed']
+    assert 'MED' not in market_state.team_portfolios[1]['holdings']
+
+def test_fills_and_price_writes_land_in_price_history(market):
+    results = market_state.process_orders_batch([_order(0, 'NOVA', 'buy', 10),
+                                                 _order(1, 'NOVA', 'buy', 5)])
+    fills = [result['price'] for result in results]
+    override = market_state.stock_prices['NOVA'] * 1.1
+    assert market_state.manual_override_price('NOVA', override)
+    assert market_state.update_stock_price('NOVA', -0.05, is_percent_change=True)
+
+    assert market_state.get_price_history('NOVA') == pytest.approx(fills + [override, override * 0.95])
@@ -0,0 +1,95 @@
+from simulation import market_state
+from simulation.order_book import MatchingEngine, Order, OrderBook
+
+def _order(order_id, team_id, order_type, price, quantity, kind='limit'):
+    return Order(order_id, team_id, 'NOVA', order_type, kind, price, quantity)
+
+def test_best_price_fills_first_then_oldest_within_a_price():
+    book = OrderBook('NOVA')
+    late = _order(1, 1, 'sell', 101.0, 10)
+    early = _order(2, 2, 'sell', 100.0, 10)
+    later = _order(3, 3, 'sell', 100.0, 10)
+    for order in (late, early, later):
+        assert book.submit(order) == []
+
+    taker = _order(4, 9, 'buy', 101.0, 25)
+    fills = book.submit(taker)
+
+    assert [(fill.sell_order.id, fill.price, fill.quantity) for fill in fills] == [
+        (2, 100.0, 10), (3, 100.0, 10), (1, 101.0, 5)]
+    assert taker.status == 'filled'
+    assert (early.status, later.status, late.status) == ('filled', 'filled', 'open')
+    assert book.depth() == {'bids': [], 'asks': [(101.0, 5, 1)]}
+
+def test_limit_remainder_rests_and_market_remainder_is_cancelled():
+    book = OrderBook('NOVA')
+    book.submit(_order(1, 1, 'buy', 99.0, 5))
+    book.submit(_order(2, 2, 'buy', 99.5, 5))
+
+    seller = _order(3, 3, 'sell', 99.5, 8)
+    fills = book.submit(seller)
+    assert [(fill.buy_order.id, fill.quantity) for fill in fills] == [(2, 5)]
+    assert book.best_ask() == 99.5 and seller.remaining == 3
+
+    market = _order(4, 4, 'sell', None, 20, kind='market')
+    fills = book.submit(market)
+    assert [(fill.buy_order.id, fill.price, fill.quantity) for fill in fills] == [(1, 99.0, 5)]
+    assert market.status == 'cancelled'
+    assert book.best_bid() is None
+
+def test_cancelled_and_self_trade_orders_lose_their_place():
+    book = OrderBook('NOVA')
+    cancelled = _order(1, 1, 'sell', 100.0, 10)
+    own = _order(2, 5, 'sell', 100.0, 10)
+    other = _order(3, 3, 'sell', 100.0, 10)
+    for order in (cancelled, own, other):
+        book.submit(order)
+    assert book.cancel(cancelled)
+
+    fills = book.submit(_order(4, 5, 'buy', 100.0, 10))
+    assert [fill.sell_order.id for fill in fills] == [3]
+    assert own.status == 'cancelled'  # Resting order from the same team is cancelled, not traded
+
+def _fill_events(database):
+    return [payload for _, _, _, payload in database.iter_journal(event_types=('fill',))]
+
+def test_failed_buyer_leg_reverses_seller_and_rejects_order(market, scratch_db, monkeypatch):
+    market_state.process_orders_batch([{'team_id': 1, 'stock': 'NOVA', 'type': 'buy', 'quantity': 10}])
+    seller = market_state.team_portfolios[1]
+    seller_before = (seller['cash'], dict(seller['holdings']), seller['transactions'].recent())
+    seller_value = market_state.holdings_index.value(1)
+    feed_seq = market_state.trade_feed.last_seq
+    fills = _fill_events(scratch_db)
+    price = market_state.stock_prices['NOVA']
+    engine = MatchingEngine()
+    engine.submit(1, {'stock': 'NOVA', 'type': 'sell', 'quantity': 10, 'price': 100.0})
+
+    apply_trade = market_state.apply_trade
+
+    def failing_buyer(team_id, order, house=True):
+        if team_id == 2:
+            return None
+        return apply_trade(team_id, order, house)
+
+    monkeypatch.setattr(market_state, 'apply_trade', failing_buyer)
+    buy, trades = engine.submit(2, {'stock': 'NOVA', 'type': 'buy', 'quantity': 10, 'price': 100.0})
+
+    assert trades == [] and buy.status == 'rejected'
+    assert (seller['cash'], seller['holdings'], seller['transactions'].recent()) == seller_before
+    assert market_state.holdings_index.value(1) == seller_value
+    assert market_state.trade_feed.last_seq == feed_seq
+    assert _fill_events(scratch_db) == fills
+    assert market_state.stock_prices['NOVA'] == price
+
+def test_settled_fill_records_both_legs(market, scratch_db):
+    market_state.process_orders_batch([{'team_id': 1, 'stock': 'NOVA', 'type': 'buy', 'quantity': 10}])
+    fills = _fill_events(scratch_db)
+    engine = MatchingEngine()
+    engine.submit(1, {'stock': 'NOVA', 'type': 'sell', 'quantity': 4, 'price': 101.0})
+    buy, trades = engine.submit(2, {'stock': 'NOVA', 'type': 'buy', 'quantity': 4, 'price': 101.0})
+
+    assert len(trades) == 1 and buy.status == 'filled'
+    assert [(fill['team_id'], fill['type']) for fill in _fill_events(scratch_db)[len(fills):]] == [
+        (1, 'sell'), (2, 'buy')]
+    assert market_state.team_portfolios[2]['holdings'] == {'NOVA': 4}
+    assert market_state.stock_prices['NOVA'] == 101.0
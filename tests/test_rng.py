@@ -0,0 +1,33 @@
+import numpy as np
+
+from simulation import market_state
+from simulation.market_simulation import PriceFluctuationManager
+from simulation.rng import random_streams
+
+def _prices_after_ticks(seed, ticks=25, other_draws=0):
+    """Reseed, reset the market and run ``ticks`` rounds of price updates."""
+    random_streams.reseed(seed)
+    market_state.initialize_market()
+    manager = PriceFluctuationManager()
+    for tick in range(1, ticks + 1):
+        random_streams.stream('conditions').random(other_draws)  # Another component drawing
+        manager.update_prices(1000.0 + 2 * tick)
+    assert manager.tick_count == ticks
+    return market_state.store.column('price').copy()
+
+def test_same_seed_reproduces_price_ticks(market):
+    first = _prices_after_ticks(42)
+    assert not np.array_equal(first, [details['price'] for details in market_state.STOCK_DETAILS.values()])
+    np.testing.assert_array_equal(_prices_after_ticks(42), first)
+    assert not np.array_equal(_prices_after_ticks(43), first)
+
+def test_other_components_drawing_more_does_not_change_prices(market):
+    quiet = _prices_after_ticks(42)
+    np.testing.assert_array_equal(_prices_after_ticks(42, other_draws=100), quiet)
+
+def test_streams_are_independent_of_draw_order():
+    random_streams.reseed(7)
+    expected = random_streams.stream('prices').random(5)
+    random_streams.reseed(7)
+    random_streams.stream('orders').random(1000)
+    np.testing.assert_array_equal(random_streams.stream('prices').random(5), expected)
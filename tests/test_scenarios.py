@@ -0,0 +1,13 @@
+import numpy as np
+
+from simulation.scenarios import run_scenarios
+
+def test_same_seed_gives_same_results_for_any_worker_count():
+    scenario = {'duration': 30, 'order_rate': 2.0, 'news': [(['NOVA'], 10)]}
+    single = run_scenarios(4, scenario, seed=3, workers=1)
+    pooled = run_scenarios(4, scenario, seed=3, workers=2, chunk_size=1)
+
+    assert single.final_prices.shape == (4, len(single.symbols))
+    for name in ('final_prices', 'max_drawdown', 'team_pnl'):
+        np.testing.assert_array_equal(getattr(single, name), getattr(pooled, name))
+    assert not np.array_equal(single.final_prices[0], single.final_prices[1])
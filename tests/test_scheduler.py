@@ -0,0 +1,34 @@
+import pytest
+
+from simulation.scheduler import UpdateScheduler
+
+def test_late_ticks_stay_on_the_original_grid():
+    scheduler = UpdateScheduler()
+    scheduler.add(0, 1.0, now=0.0)
+
+    assert scheduler.pop_due(0.5).tolist() == []
+    assert scheduler.pop_due(1.3).tolist() == [0]  # Ran 0.3s late
+    assert scheduler.next_due() == 2.0  # Anchored to the due time, not to 1.3 + 1
+    assert scheduler.pop_due(2.05).tolist() == [0]
+    assert scheduler.next_due() == 3.0
+
+def test_missed_ticks_are_skipped_not_replayed():
+    scheduler = UpdateScheduler()
+    scheduler.add(0, 1.0, now=0.0)
+
+    assert scheduler.pop_due(4.5).tolist() == [0]  # Once, not four times
+    assert scheduler.next_due() == 5.0
+
+def test_only_due_symbols_are_popped():
+    scheduler = UpdateScheduler()
+    scheduler.add(0, 0.5, now=0.0)
+    scheduler.add(1, 2.0, now=0.0)
+    scheduler.add(1, 0.1, now=0.0)  # Already scheduled; ignored
+
+    assert scheduler.pop_due(1.0).tolist() == [0]
+    assert sorted(scheduler.pop_due(2.0).tolist()) == [0, 1]
+    assert len(scheduler) == 2
+
+def test_rejects_non_positive_interval():
+    with pytest.raises(ValueError):
+        UpdateScheduler().add(0, 0, now=0.0)
@@ -0,0 +1,21 @@
+import pytest
+
+from simulation import market_state
+
+def test_market_state_journal_uses_the_engine_clock(market, scratch_db, virtual_clock):
+    market_state.stock_prices['NOVA'] = 150.0
+    market_state.save_market_state()
+    virtual_clock.advance(60)
+    market_state.stock_prices['NOVA'] = 160.0
+    market_state.save_market_state()
+
+    prices, _ = scratch_db.get_market_state_at(1030.0)
+    assert prices['NOVA'] == pytest.approx(150.0)
+    assert [ts for ts, _, _ in scratch_db.get_price_series('NOVA')][-2:] == [1000.0, 1060.0]
+
+def test_holdings_rows_use_the_engine_clock(market, scratch_db, virtual_clock):
+    virtual_clock.advance(60)
+    assert market_state.process_market_order(0, {'stock': 'NOVA', 'type': 'buy', 'quantity': 10})
+
+    assert scratch_db.get_holdings_at(0, 1030.0) == {}
+    assert scratch_db.get_holdings_at(0, 1060.0) == {'NOVA': 10}
@@ -0,0 +1,40 @@
+from simulation.trade_feed import TradeFeed
+
+def test_cursor_returns_only_newer_entries():
+    feed = TradeFeed(capacity=10)
+    for i in range(3):
+        assert feed.append({'n': i}) == i + 1
+
+    assert feed.since(0) == [(1, {'n': 0}), (2, {'n': 1}), (3, {'n': 2})]
+    assert feed.since(2) == [(3, {'n': 2})]
+    assert feed.since(3) == []
+    assert feed.since(0, limit=2) == [(2, {'n': 1}), (3, {'n': 2})]
+
+def test_reader_that_falls_behind_skips_to_the_oldest_kept_entry():
+    feed = TradeFeed(capacity=4)
+    for i in range(10):
+        feed.append(i)
+
+    assert len(feed) == 4
+    assert feed.first_seq == 7
+    assert feed.since(2) == [(7, 6), (8, 7), (9, 8), (10, 9)]
+
+def test_clear_keeps_sequence_numbers_counting():
+    feed = TradeFeed(capacity=4)
+    feed.append('a')
+    feed.append('b')
+    feed.clear()
+
+    assert len(feed) == 0
+    assert feed.since(0) == []
+    assert feed.append('c') == 3
+    assert feed.since(2) == [(3, 'c')]
+
+def test_market_trades_and_transfers_reach_the_feed(market):
+    cursor = market.trade_feed.last_seq
+    assert market.process_market_order(0, {'stock': 'NOVA', 'type': 'buy', 'quantity': 5})
+    assert market.transfer_stock(0, 1, 'NOVA', 2)
+
+    entries = [entry for _, entry in market.trade_feed.since(cursor)]
+    assert [(entry['team_id'], entry['type']) for entry in entries] == [
+        (0, 'buy'), (0, 'transfer_out'), (1, 'transfer_in')]
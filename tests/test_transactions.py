@@ -0,0 +1,40 @@
+from simulation.transactions import TransactionLog
+
+def _buy(i):
+    return {'timestamp': 1000.0 + i, 'type': 'buy', 'stock': 'NOVA', 'quantity': i + 1,
+            'price': 100.0, 'total_value': 100.0 * (i + 1)}
+
+def test_full_tail_spills_oldest_to_db(scratch_db):
+    log = TransactionLog(3, tail_length=5)
+    for i in range(12):
+        log.append(_buy(i))
+
+    assert len(log) == 5
+    assert [entry['quantity'] for entry in log.recent()] == [8, 9, 10, 11, 12]
+    assert [entry['quantity'] for entry in log.recent(2)] == [11, 12]
+    spilled = list(scratch_db.iter_transactions(3, columns=('quantity',)))
+    assert [row[0] for row in spilled] == [1, 2, 3, 4, 5, 6, 7]
+
+def test_history_streams_spilled_records_then_tail(scratch_db):
+    log = TransactionLog(3, tail_length=4)
+    for i in range(10):
+        log.append(_buy(i))
+
+    history = list(log.history(chunk_size=3))
+    assert [entry['quantity'] for entry in history] == list(range(1, 11))
+    assert all(entry['team_id'] == 3 for entry in history)
+    assert 'counterparty' not in history[0]  # Fields that do not apply are left out
+
+def test_history_is_a_snapshot_when_records_spill_mid_iteration(scratch_db):
+    log = TransactionLog(3, tail_length=4)
+    for i in range(10):
+        log.append(_buy(i))
+
+    history = log.history(chunk_size=2)
+    seen = [next(history)['quantity']]
+    for i in range(10, 20):
+        log.append(_buy(i))  # Spills records that were in the tail when history() started
+    seen.extend(entry['quantity'] for entry in history)
+
+    assert seen == list(range(1, 11))
+    assert [entry['quantity'] for entry in log.history()] == list(range(1, 21))
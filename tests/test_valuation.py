@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from simulation import market_state
+from simulation.market_simulation import MarketSimulation, PriceFluctuationManager
+
+def _assert_values_match_full_recomputation():
+    for team_id, portfolio in market_state.team_portfolios.items():
+        expected = sum(market_state.stock_prices[stock] * quantity
+                       for stock, quantity in portfolio['holdings'].items())
+        assert market_state.holdings_index.value(team_id) == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+def test_incremental_values_track_full_recomputation(market):
+    rng = np.random.default_rng(11)
+    prices = PriceFluctuationManager()
+    teams = list(market_state.team_portfolios)
+    now = 1000.0
+
+    for step in range(300):
+        stocks = list(market_state.stock_prices)
+        team_id = int(rng.choice(teams))
+        holdings = market_state.team_portfolios[team_id]['holdings']
+        action = rng.random()
+        if step == 100:
+            MarketSimulation()._process_IPO({'stock': 'IPO1', 'initial_price': 50.0, 'available_quantity': 500})
+        elif step == 200:
+            market_state.reset_team_portfolio(team_id)
+        elif step == 250:
+            market_state.holdings_index.rebuild(market_state.team_portfolios)
+        elif action < 0.4 or not holdings:
+            market_state.process_market_order(team_id, {'stock': str(rng.choice(stocks)), 'type': 'buy',
+                                                        'quantity': int(rng.integers(1, 30))})
+        elif action < 0.55:
+            stock = str(rng.choice(list(holdings)))
+            market_state.process_market_order(team_id, {'stock': stock, 'type': 'sell',
+                                                        'quantity': int(rng.integers(1, holdings[stock] + 1))})
+        elif action < 0.7:
+            stock = str(rng.choice(list(holdings)))
+            other = int(rng.choice([team for team in teams if team != team_id]))
+            market_state.transfer_stock(team_id, other, stock, int(rng.integers(1, holdings[stock] + 1)))
+        elif action < 0.85:
+            market_state.update_stock_price(str(rng.choice(stocks)), float(rng.uniform(-0.05, 0.05)),
+                                            is_percent_change=True)
+        else:
+            now += 2.0
+            prices.update_prices(now)
+        _assert_values_match_full_recomputation()
+
+    assert any('IPO1' in portfolio['holdings'] for portfolio in market_state.team_portfolios.values())
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from data.connection import ConnectionManager
+from data.db import SimulationDB
+from data.write_behind import WriteBehindQueue
+
+@pytest.fixture
+def queued_db(tmp_path):
+    database = SimulationDB(str(tmp_path / 'queued.db'), mode='group_commit')
+    yield database
+    database.close()
+
+def _order_count(database):
+    database.flush()
+    conn = sqlite3.connect(database.db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    finally:
+        conn.close()
+
+def _order(i):
+    return {'stock': 'NOVA', 'type': 'buy', 'quantity': i + 1, 'price': 100.0}
+
+def test_batch_holds_writes_back_until_it_exits(queued_db):
+    with queued_db.transaction():
+        for i in range(3):
+            queued_db.log_order(0, _order(i))
+        assert _order_count(queued_db) == 0
+    assert _order_count(queued_db) == 3
+
+def test_batch_that_raises_writes_nothing(queued_db):
+    with pytest.raises(RuntimeError):
+        with queued_db.transaction():
+            queued_db.log_order(0, _order(0))
+            with queued_db.transaction():  # Nested batches join the outer one
+                queued_db.log_order(0, _order(1))
+            raise RuntimeError("abort")
+    queued_db.log_order(0, _order(2))
+    assert _order_count(queued_db) == 1
+
+def test_writer_survives_non_sqlite_errors(queued_db, monkeypatch):
+    writer = queued_db.writer
+    original = writer._write
+    failures = []
+
+    def flaky_write(rows):
+        if not failures:
+            failures.append(rows)
+            raise TypeError("bad parameter")
+        original(rows)
+
+    monkeypatch.setattr(writer, '_write', flaky_write)
+    queued_db.log_order(0, _order(0))
+    assert queued_db.flush(timeout=5)
+    queued_db.log_order(0, _order(1))
+    assert _order_count(queued_db) == 1
+    assert failures and writer._thread.is_alive()
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_flush_returns_when_writer_thread_died(tmp_path, monkeypatch):
+    writer = WriteBehindQueue(ConnectionManager(str(tmp_path / 'dead.db')))
+
+    def crash():
+        raise RuntimeError("writer crashed")
+
+    monkeypatch.setattr(writer, '_collect', crash)
+    writer.submit('CREATE TABLE t (a)', ())
+    assert writer.flush(timeout=None) is False
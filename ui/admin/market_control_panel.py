@@ -1,11 +1,12 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                             QPushButton, QLabel, QComboBox, QDoubleSpinBox,
                             QTextEdit, QTableWidget, QTableWidgetItem, QSpinBox)
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, pyqtSignal
 from PyQt5.QtGui import QColor  # Add this import
 from simulation import market_state
 from simulation.market_simulation import market_session
-import time
+from simulation.engine import (engine, PlaceOrder, OverridePrice, ChangePrice,
+                               StartSession, PauseSession, ResumeSession, EndSession)
 
 GROUP_BOX_STYLE = """
 QGroupBox {
@@ -75,13 +76,33 @@ COLORS = {
     'border': '#cccccc'
 }
 
+# Log lines for session commands: (on success, on failure)
+SESSION_MESSAGES = {
+    StartSession: ("New trading session started successfully", "Failed to start session"),
+    PauseSession: ("Trading session paused", "Failed to pause session"),
+    ResumeSession: ("Trading session resumed", "Failed to resume session"),
+    EndSession: ("Trading session ended", "Failed to end session"),
+}
+
 class MarketControlPanel(QWidget):
+    orders_processed = pyqtSignal(list)  # Per-order results of an order batch
+    command_done = pyqtSignal(object, object, object)  # Engine command, result, error
+    snapshot_published = pyqtSignal(object)  # New market snapshot from the engine
+
     def __init__(self):
         super().__init__()
+        self.price_display_version = None  # Market snapshot version shown in the price table
         # Create member variables first
         self.create_controls()
         self.init_ui()
         self.setup_timer()
+        # Batches may run off the GUI thread; the signal queues the refresh onto it
+        self.orders_processed.connect(self.on_orders_processed)
+        market_state.order_batch_listeners.append(self.orders_processed.emit)
+        # Engine results and snapshots arrive on the engine thread; the signals queue them here
+        self.command_done.connect(self.on_command_done)
+        self.snapshot_published.connect(lambda snapshot: self.update_price_display())
+        engine.snapshot_listeners.append(self.snapshot_published.emit)
         # Initialize button states
         self.update_button_states(False)
 
@@ -124,6 +145,7 @@ class MarketControlPanel(QWidget):
         # Add trade order controls with separate stock selector
         self.team_selector = QComboBox()
         self.team_selector.addItems([f"Team {i+1}" for i in range(market_state.TEAM_COUNT)])
+        self.team_selector.addItem("All Teams")
         
         self.order_type = QComboBox()
         self.order_type.addItems(["buy", "sell"])
@@ -310,38 +332,43 @@ class MarketControlPanel(QWidget):
 
     def update_price_display(self):
         """Enhanced price display with more stock information"""
+        snapshot = market_state.market_snapshot()
+        if snapshot.version == self.price_display_version:
+            return  # Nothing changed since the last redraw
+        self.price_display_version = snapshot.version
+        
         self.price_table.setColumnCount(5)  # Increased columns
         self.price_table.setHorizontalHeaderLabels([
             "Symbol (Name)", "Sector", "Price", "Change %", "Available"
         ])
         
-        stocks = market_state.stock_prices.keys()
-        self.price_table.setRowCount(len(stocks))
+        self.price_table.setRowCount(len(snapshot.symbols))
         
-        for row, symbol in enumerate(stocks):
-            info = market_state.get_stock_info(symbol)
-            if info:
+        for row, symbol in enumerate(snapshot.symbols):
+            details = market_state.STOCK_DETAILS.get(symbol)
+            if details:
                 # Symbol and name
                 self.price_table.setItem(row, 0, 
-                    QTableWidgetItem(f"{symbol} ({info['name']})"))
+                    QTableWidgetItem(f"{symbol} ({details['name']})"))
                 
                 # Sector
                 self.price_table.setItem(row, 1,
-                    QTableWidgetItem(info['sector']))
+                    QTableWidgetItem(details['sector']))
                 
                 # Price
                 self.price_table.setItem(row, 2,
-                    QTableWidgetItem(f"${info['current_price']:.2f}"))
+                    QTableWidgetItem(f"${snapshot.prices[symbol]:.2f}"))
                 
                 # Change %
-                change_item = QTableWidgetItem(f"{info['change']:+.2f}%")
+                change = snapshot.price_changes[symbol]
+                change_item = QTableWidgetItem(f"{change:+.2f}%")
                 change_item.setForeground(
-                    QColor('green') if info['change'] >= 0 else QColor('red'))
+                    QColor('green') if change >= 0 else QColor('red'))
                 self.price_table.setItem(row, 3, change_item)
                 
                 # Available quantity
                 self.price_table.setItem(row, 4,
-                    QTableWidgetItem(f"{info['available']:,}"))
+                    QTableWidgetItem(f"{snapshot.quantities.get(symbol, 0):,}"))
         
         self.price_table.resizeColumnsToContents()
         self.price_table.viewport().update()
@@ -390,63 +417,27 @@ class MarketControlPanel(QWidget):
             if reply == QMessageBox.No:
                 return
         
-        # Update the market state with validation
-        if market_state.manual_override_price(stock, new_price):
-            log_entry = (f"Manual override: {stock} price changed from "
-                        f"${current_price:.2f} to ${new_price:.2f} ({percent_change:+.2f}%)")
-            self.log_text.append(log_entry)
-            # Force immediate update of price display
-            self.update_price_display()
-        else:
-            self.log_text.append(f"Failed to override price for {stock}")
+        # The engine validates and applies it; on_command_done reports the outcome
+        self.log_text.append(f"Manual override requested: {stock} from ${current_price:.2f} "
+                             f"to ${new_price:.2f} ({percent_change:+.2f}%)")
+        engine.submit(OverridePrice(stock, new_price), self.command_done.emit)
 
     def start_session(self):
         """Start session without resetting market state"""
-        try:
-            if market_session.session_active:
-                self.log_text.append("Error: Session already active")
-                return False
-
-            # Remove market state initialization - preserve existing holdings
-            if market_session.start_session():
-                self.log_text.append("New trading session started successfully")
-                self.update_button_states(True)
-                self.update_session_status()
-                # Update displays immediately
-                self.update_price_display()
-                self.update_stock_list()
-                return True
-            else:
-                self.log_text.append("Failed to start session")
-                return False
-                
-        except Exception as e:
-            self.log_text.append(f"Error starting session: {str(e)}")
-            return False
+        if market_session.session_active:
+            self.log_text.append("Error: Session already active")
+            return
+        # Session control runs on the engine thread; on_command_done updates the controls
+        engine.submit(StartSession(), self.command_done.emit)
 
     def end_session(self):
-        if market_session.end_session():
-            self.log_text.append("Trading session ended")
-            self.update_button_states(False)
-            self.update_session_status()
-        else:
-            self.log_text.append("Failed to end session")
+        engine.submit(EndSession(), self.command_done.emit)
 
     def pause_session(self):
-        if market_session.pause():
-            self.log_text.append("Trading session paused")
-            self.update_button_states(True, True)
-            self.update_session_status()
-        else:
-            self.log_text.append("Failed to pause session")
+        engine.submit(PauseSession(), self.command_done.emit)
 
     def resume_session(self):
-        if market_session.resume():
-            self.log_text.append("Trading session resumed")
-            self.update_button_states(True, False)
-            self.update_session_status()
-        else:
-            self.log_text.append("Failed to resume session")
+        engine.submit(ResumeSession(), self.command_done.emit)
 
     def update_session_status(self):
         """Update session status with time remaining"""
@@ -477,11 +468,19 @@ class MarketControlPanel(QWidget):
 
     def place_team_order(self):
         """Enhanced team order placement with no session validation"""
-        team_id = int(self.team_selector.currentText().split()[-1]) - 1
         stock = self.team_order_stock_selector.currentText()
         quantity = self.quantity_spinner.value()
         order_type = self.order_type.currentText()
         
+        if self.team_selector.currentText() == "All Teams":
+            self.log_text.append(f"Placing {order_type} order for every team: {quantity} {stock}")
+            # Applied by the engine as one batch; on_orders_processed logs the results
+            engine.submit_all([PlaceOrder(team_id, stock, quantity, order_type)
+                               for team_id in range(market_state.TEAM_COUNT)])
+            return
+        
+        team_id = int(self.team_selector.currentText().split()[-1]) - 1
+        
         # Remove session check
         # Validate quantity
         if quantity <= 0:
@@ -493,13 +492,6 @@ class MarketControlPanel(QWidget):
             self.log_text.append(f"Error: Insufficient {stock} available in market")
             return
         
-        order = {
-            'stock': stock,
-            'quantity': quantity,
-            'type': order_type,
-            'timestamp': time.time()
-        }
-        
         # Get current price for logging
         current_price = market_state.stock_prices.get(stock, 0)
         estimated_value = current_price * quantity
@@ -507,17 +499,48 @@ class MarketControlPanel(QWidget):
         # Log attempt
         self.log_text.append(f"Attempting {order_type} order: {quantity} {stock} at ~${current_price:.2f} (Est. ${estimated_value:.2f})")
         
-        success = market_state.process_market_order(team_id, order)
-        
-        if success:
-            self.log_text.append(f"Order executed for Team {team_id}")
-            # Show updated portfolio value
-            portfolio = market_state.get_team_portfolio(team_id)
-            self.log_text.append(f"Team {team_id} new portfolio value: ${portfolio['total_value']:,.2f}")
-            # Reset quantity spinner after successful order
-            self.quantity_spinner.setValue(100)
-        else:
-            self.log_text.append(f"Order failed for Team {team_id}")
+        engine.submit(PlaceOrder(team_id, stock, quantity, order_type), self.command_done.emit)
+
+    def on_command_done(self, command, result, error):
+        """Report the outcome of a command this panel submitted to the engine"""
+        if type(command) in SESSION_MESSAGES:
+            done, failed = SESSION_MESSAGES[type(command)]
+            if result:
+                self.log_text.append(done)
+            else:
+                self.log_text.append(f"{failed}: {error}" if error else failed)
+            self.update_session_status()
+            if result and isinstance(command, StartSession):
+                # Update displays immediately
+                self.update_price_display()
+                self.update_stock_list()
+        elif isinstance(command, PlaceOrder):
+            # The outcome is logged by on_orders_processed, like every other order
+            if not error:
+                # Reset quantity spinner after successful order
+                self.quantity_spinner.setValue(100)
+        elif isinstance(command, OverridePrice):
+            if result:
+                self.log_text.append(f"Manual override: {command.stock} price set to ${command.price:.2f}")
+            else:
+                self.log_text.append(f"Failed to override price for {command.stock}")
+        elif isinstance(command, ChangePrice):
+            if result:
+                self.log_text.append(f"Price manipulation: {command.stock} changed by {command.percent*100:+.2f}%")
+                # Reset spinner to 0 after successful change
+                self.price_change_spinner.setValue(0.0)
+            else:
+                self.log_text.append(f"Failed to manipulate price for {command.stock}")
+
+    def on_orders_processed(self, results):
+        """Log each order of a batch and refresh the price table once"""
+        for result in results:
+            if result['status'] == 'executed':
+                self.log_text.append(f"Team {result['team_id']}: {result['type']} {result['quantity']} "
+                                     f"{result['stock']} @ ${result['price']:.2f}")
+            else:
+                self.log_text.append(f"Team {result['team_id']}: {result['status']} - {result['error']}")
+        self.update_price_display()
 
     def apply_price_change(self):
         """Apply percentage price change to selected stock with improved validation"""
@@ -541,11 +564,4 @@ class MarketControlPanel(QWidget):
             self.log_text.append("Error: Price cannot go below $0.01")
             return
         
-        if market_state.update_stock_price(stock, new_price):
-            log_entry = f"Price manipulation: {stock} changed by {percent_change*100:+.2f}% from ${current_price:.2f} to ${new_price:.2f}"
-            self.log_text.append(log_entry)
-            self.update_price_display()
-            # Reset spinner to 0 after successful change
-            self.price_change_spinner.setValue(0.0)
-        else:
-            self.log_text.append(f"Failed to manipulate price for {stock}")
+        engine.submit(ChangePrice(stock, percent_change), self.command_done.emit)
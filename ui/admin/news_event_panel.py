@@ -2,8 +2,9 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                             QPushButton, QLabel, QLineEdit, QDoubleSpinBox,
                             QTextEdit, QListWidget, QAbstractItemView, QFormLayout,
                             QCheckBox)  # Add QCheckBox
+import config
 from simulation import market_state
-from simulation.market_simulation import market_session, market_simulation  # Add market_simulation import
+from simulation.engine import engine, InjectNews
 
 GROUP_BOX_STYLE = """
 QGroupBox {
@@ -131,25 +132,16 @@ class NewsEventPanel(QWidget):
 
         # Get the target percentage exactly as shown in UI
         impact_percent = self.impact_spinner.value()
+        title = self.event_title.text()
         
-        # Pass EXACTLY the percentage value to the market session
-        # We don't convert to decimal here - let the simulation handle that
-        market_session.add_news_impact(selected_stocks, impact_percent)
-        
-        # Here we convert to decimal for the event_data structure
-        event_data = {
-            'title': self.event_title.text(),
-            'description': self.description.toPlainText(),
-            'stocks': selected_stocks,
-            'impact': impact_percent / 100.0  # Convert to decimal for event data
-        }
+        # The engine queues the impact with the market session and logs the event
+        engine.submit(InjectNews(selected_stocks, impact_percent, title, self.description.toPlainText()))
         
         # Log detailed info for debugging
-        self.log_event(f"Event Injected: {event_data['title']}")
+        self.log_event(f"Event Injected: {title}")
         self.log_event(f"Target Impact: {impact_percent:+.1f}% on {', '.join(selected_stocks)}")
-        self.log_event(f"Impact will be enforced EXACTLY at session end")
-        
-        market_simulation.inject_news_event(event_data)
+        self.log_event(f"Impact will ease in over {config.NEWS_IMPACT_DURATION}s ({config.NEWS_IMPACT_EASING}) "
+                       f"while the session is active; any remainder lands at session end")
         
         # Clear selections after injection
         self.stock_list.clearSelection()
@@ -1,14 +1,18 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                             QPushButton, QLabel, QSpinBox, QDoubleSpinBox,
                             QTextEdit, QComboBox, QFormLayout, QMessageBox)
+from PyQt5.QtCore import pyqtSignal
 import config
-import time  # Add this import
 from simulation import market_state
+from simulation.engine import engine, AdjustCash
 from utils.logger import logger
 
 class SettingsPanel(QWidget):
+    cash_adjusted = pyqtSignal(object, object, object)  # AdjustCash command, new balance, error
+
     def __init__(self):
         super().__init__()
+        self.cash_adjusted.connect(self.on_cash_adjusted)
         self.init_ui()
 
     def init_ui(self):
@@ -143,40 +147,32 @@ class SettingsPanel(QWidget):
         team_id = self.get_selected_team_id()
         try:
             portfolio = market_state.team_portfolios[team_id]
-            old_cash = portfolio['cash']
-            new_cash = old_cash + amount
-
-            if new_cash < 0:
+            if portfolio['cash'] + amount < 0:
                 QMessageBox.warning(self, "Invalid Operation", 
                     "Operation would result in negative cash balance!")
                 return
 
-            # Update the cash balance
-            portfolio['cash'] = new_cash
-            # Update total value
-            portfolio['total_value'] = portfolio['holdings_value'] + new_cash
-
-            # Log the transaction
-            transaction = {
-                'timestamp': time.time(),
-                'type': 'cash_adjustment',
-                'amount': amount,
-                'old_balance': old_cash,
-                'new_balance': new_cash
-            }
-            portfolio['transactions'].append(transaction)
-
-            # Update display
-            self.update_cash_display()
-            
-            # Log entry
-            action = "added to" if amount > 0 else "subtracted from"
-            self.cash_log.append(
-                f"${abs(amount):,.2f} {action} Team {team_id + 1}\n"
-                f"New balance: ${new_cash:,.2f}"
-            )
-            logger.info(f"Cash adjustment for Team {team_id}: {amount:+,.2f}")
+            # The engine updates the balance and records it in the event journal
+            engine.submit(AdjustCash(team_id, amount), self.cash_adjusted.emit)
 
         except Exception as e:
             logger.error(f"Error modifying cash: {e}")
             QMessageBox.critical(self, "Error", f"Failed to modify cash: {str(e)}")
+
+    def on_cash_adjusted(self, command, new_cash, error):
+        """Show the outcome of a cash adjustment applied by the engine"""
+        if error:
+            logger.error(f"Error modifying cash: {error}")
+            QMessageBox.critical(self, "Error", f"Failed to modify cash: {error}")
+            return
+
+        # Update display
+        self.update_cash_display()
+        
+        # Log entry
+        action = "added to" if command.amount > 0 else "subtracted from"
+        self.cash_log.append(
+            f"${abs(command.amount):,.2f} {action} Team {command.team_id + 1}\n"
+            f"New balance: ${new_cash:,.2f}"
+        )
+        logger.info(f"Cash adjustment for Team {command.team_id}: {command.amount:+,.2f}")
@@ -300,6 +300,8 @@ class ParticipantView(QWidget):
         if not hasattr(market_state, 'stock_prices') or not market_state.stock_prices:
             market_state.initialize_market()
         self.price_widgets = {}
+        self.market_version = None  # Market snapshot version last drawn
+        self.leaderboard_version = None  # Leaderboard version last drawn
         self.setupUI()
         self.setupTimers()
         
@@ -454,6 +456,8 @@ class ParticipantView(QWidget):
         
         self.market_log = QTextEdit()
         self.market_log.setReadOnly(True)
+        self.market_log.document().setMaximumBlockCount(500)  # Oldest lines drop off
+        self.trade_feed_seq = 0  # Last trade feed entry shown in the log
         self.market_log.setFixedHeight(120)  # Increased from 100
         self.market_log.setStyleSheet(f"""
             QTextEdit {{
@@ -511,18 +515,19 @@ class ParticipantView(QWidget):
     def update_display(self):
         """Update all display components with current market data"""
         try:
-            # Get latest market data
-            market_data = market_state.get_market_state()
-            
-            # Update price widgets
-            for symbol, widget in self.price_widgets.items():
-                price = market_data['prices'].get(symbol, 0)
-                change = market_data['price_changes'].get(symbol, 0)
-                volume = market_data['volumes'].get(symbol, 0)
-                widget.update_price(price, change, volume)
-            
-            # Update market table
-            self.update_market_table(market_data)
+            # Get latest market data; redraw prices only when the market moved
+            snapshot = market_state.market_snapshot()
+            if snapshot.version != self.market_version:
+                # Update price widgets
+                for symbol, widget in self.price_widgets.items():
+                    price = snapshot.prices.get(symbol, 0)
+                    change = snapshot.price_changes.get(symbol, 0)
+                    volume = snapshot.volumes.get(symbol, 0)
+                    widget.update_price(price, change, volume)
+                
+                # Update market table
+                self.update_market_table(snapshot)
+                self.market_version = snapshot.version
             
             # Update team performance data
             self.update_team_performance()
@@ -536,9 +541,9 @@ class ParticipantView(QWidget):
         except Exception as e:
             logger.error(f"Error updating display: {e}")
     
-    def update_market_table(self, market_data):
+    def update_market_table(self, snapshot):
         """Update market data table with current prices and volumes"""
-        symbols = market_state.stock_prices.keys()
+        symbols = snapshot.symbols
         self.market_table.setRowCount(len(symbols))
         
         for row, symbol in enumerate(symbols):
@@ -546,12 +551,12 @@ class ParticipantView(QWidget):
             symbol_item = QTableWidgetItem(symbol)
             
             # Price with formatting
-            price = market_data['prices'].get(symbol, 0)
+            price = snapshot.prices.get(symbol, 0)
             price_item = QTableWidgetItem(f"${price:,.2f}")
             price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             
             # Change percentage
-            change = market_data['price_changes'].get(symbol, 0)
+            change = snapshot.price_changes.get(symbol, 0)
             change_item = QTableWidgetItem(f"{change:+.2f}%")
             change_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             
@@ -572,12 +577,12 @@ class ParticipantView(QWidget):
                 trend_item.setForeground(QColor(THEME['neutral']))
             
             # Volume
-            volume = market_data['volumes'].get(symbol, 0)
+            volume = snapshot.volumes.get(symbol, 0)
             volume_item = QTableWidgetItem(f"{volume:,}")
             volume_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             
             # Available quantity
-            available = market_data['quantities'].get(symbol, 0)
+            available = snapshot.quantities.get(symbol, 0)
             available_item = QTableWidgetItem(f"{available:,}")
             available_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             
@@ -594,78 +599,22 @@ class ParticipantView(QWidget):
         self.market_table.resizeRowsToContents()
     
     def update_team_performance(self):
-        """Update team performance data"""
+        """Update team performance data, redrawing only the rows that changed"""
         try:
-            all_teams_data = []
-            total_transactions = 0
-            
-            # Get data for all teams
-            for team_id in range(market_state.TEAM_COUNT):
-                try:
-                    portfolio = market_state.get_team_portfolio(team_id)
-                    
-                    # Calculate performance metrics
-                    initial_value = market_state.STARTING_BUDGET
-                    profit_loss = portfolio['total_value'] - initial_value
-                    profit_percent = (profit_loss / initial_value) * 100 if initial_value > 0 else 0
-                    
-                    # Add to totals for transactions count
-                    if 'transactions' in portfolio:
-                        total_transactions += len(portfolio['transactions'])
-                    
-                    # Add to team data collection
-                    all_teams_data.append({
-                        'team_id': team_id,
-                        'cash': portfolio['cash'],
-                        'holdings_value': portfolio['holdings_value'],
-                        'total_value': portfolio['total_value'],
-                        'profit_percent': profit_percent
-                    })
-                except Exception as e:
-                    logger.error(f"Error getting portfolio for team {team_id}: {str(e)}")
+            # Teams come out of the leaderboard already ranked by total value
+            drawn_version = self.leaderboard_version
+            self.leaderboard_version = market_state.refresh_leaderboard()
+            ranked = market_state.leaderboard.top()
             
-            # Sort teams by total value (descending)
-            all_teams_data.sort(key=lambda x: x['total_value'], reverse=True)
+            if drawn_version is None or self.teams_table.rowCount() != len(ranked):
+                self.teams_table.setRowCount(len(ranked))
+                changed = None
+            else:
+                changed = market_state.leaderboard.changed_since(drawn_version)
             
-            # Update team table
-            self.teams_table.setRowCount(len(all_teams_data))
-            for row, team_data in enumerate(all_teams_data):
-                # Team ID with rank
-                team_item = QTableWidgetItem(f"Team {team_data['team_id']}")
-                if row < 3:  # Top 3 teams get special formatting
-                    team_item.setForeground(QColor(THEME['accent']))
-                    font = team_item.font()
-                    font.setBold(True)
-                    team_item.setFont(font)
-                
-                # Cash
-                cash_item = QTableWidgetItem(f"${team_data['cash']:,.2f}")
-                cash_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                # Holdings value
-                holdings_item = QTableWidgetItem(f"${team_data['holdings_value']:,.2f}")
-                holdings_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                # Total value
-                total_item = QTableWidgetItem(f"${team_data['total_value']:,.2f}")
-                total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                # Percent change
-                percent = team_data['profit_percent']
-                percent_item = QTableWidgetItem(f"{percent:+.2f}%")
-                percent_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                if percent > 0:
-                    percent_item.setForeground(QColor(THEME['positive']))
-                elif percent < 0:
-                    percent_item.setForeground(QColor(THEME['negative']))
-                
-                # Add items to table
-                self.teams_table.setItem(row, 0, team_item)
-                self.teams_table.setItem(row, 1, cash_item)
-                self.teams_table.setItem(row, 2, holdings_item)
-                self.teams_table.setItem(row, 3, total_item)
-                self.teams_table.setItem(row, 4, percent_item)
+            for row, (team_id, total_value) in enumerate(ranked):
+                if changed is None or team_id in changed:
+                    self.set_team_row(row, team_id, total_value)
             
             # Update market activity log with recent transactions
             self.update_market_activity_log()
@@ -678,34 +627,57 @@ class ParticipantView(QWidget):
             logger.error(f"Error updating team performance: {str(e)}")
             self.market_log.append(f"Error updating performance data: {str(e)}")
 
+    def set_team_row(self, row, team_id, total_value):
+        """Draw one team's row of the rankings table"""
+        initial_value = market_state.STARTING_BUDGET
+        cash = market_state.team_portfolios[team_id]['cash']
+        profit_loss = total_value - initial_value
+        
+        # Team ID with rank
+        team_item = QTableWidgetItem(f"Team {team_id}")
+        if row < 3:  # Top 3 teams get special formatting
+            team_item.setForeground(QColor(THEME['accent']))
+            font = team_item.font()
+            font.setBold(True)
+            team_item.setFont(font)
+        
+        # Cash
+        cash_item = QTableWidgetItem(f"${cash:,.2f}")
+        cash_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        
+        # Holdings value
+        holdings_item = QTableWidgetItem(f"${total_value - cash:,.2f}")
+        holdings_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        
+        # Total value
+        total_item = QTableWidgetItem(f"${total_value:,.2f}")
+        total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        
+        # Percent change
+        percent = (profit_loss / initial_value) * 100 if initial_value > 0 else 0
+        percent_item = QTableWidgetItem(f"{percent:+.2f}%")
+        percent_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        
+        if percent > 0:
+            percent_item.setForeground(QColor(THEME['positive']))
+        elif percent < 0:
+            percent_item.setForeground(QColor(THEME['negative']))
+        
+        # Add items to table
+        self.teams_table.setItem(row, 0, team_item)
+        self.teams_table.setItem(row, 1, cash_item)
+        self.teams_table.setItem(row, 2, holdings_item)
+        self.teams_table.setItem(row, 3, total_item)
+        self.teams_table.setItem(row, 4, percent_item)
+
     def update_market_activity_log(self):
-        """Update the market activity log with recent transactions"""
+        """Append the trades made since the last refresh to the market activity log"""
         try:
-            all_transactions = []
+            # Only the latest 10 on first display; afterwards everything new since the last refresh
+            limit = 10 if self.trade_feed_seq == 0 else None
+            new_trades = market_state.trade_feed.since(self.trade_feed_seq, limit)
             
-            # Collect recent transactions from all teams
-            for team_id in range(market_state.TEAM_COUNT):
-                try:
-                    portfolio = market_state.get_team_portfolio(team_id)
-                    if 'transactions' in portfolio and portfolio['transactions']:
-                        for tx in portfolio['transactions']:
-                            tx_copy = tx.copy()  # Create a copy to avoid modifying original
-                            tx_copy['team_id'] = team_id
-                            all_transactions.append(tx_copy)
-                except Exception as e:
-                    logger.error(f"Error getting transactions for team {team_id}: {str(e)}")
-            
-            # Sort by timestamp (most recent first)
-            all_transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-            
-            # Take only the most recent 10 transactions
-            recent_transactions = all_transactions[:10]
-            
-            # Get current log content to avoid duplicates
-            current_log = self.market_log.toPlainText()
-            
-            # Add recent transactions to log
-            for tx in recent_transactions:
+            for seq, tx in new_trades:
                 timestamp = time.strftime("%H:%M:%S", time.localtime(tx['timestamp']))
                 
                 # Format message based on transaction type
@@ -716,11 +688,8 @@ class ParticipantView(QWidget):
                 else:
                     msg = f"Team {tx['team_id']} {tx['type']} {tx['quantity']} {tx['stock']}"
                 
-                log_entry = f"[{timestamp}] {msg}"
-                
-                # Only add if not already in log
-                if log_entry not in current_log:
-                    self.market_log.append(log_entry)
+                self.market_log.append(f"[{timestamp}] {msg}")
+                self.trade_feed_seq = seq
                     
             # Add special handling for the log to ensure text is properly visible
             self.market_log.setFontPointSize(12)  # Set explicit point size for log text